@@ -0,0 +1,71 @@
+"""Add intake and meal event tables
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "intake_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "schedule_id",
+            sa.Integer(),
+            sa.ForeignKey("drug_schedules.id", ondelete="CASCADE", onupdate="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("event_date", sa.Date(), nullable=False),
+        sa.Column("taken_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            nullable=False,
+            # Naive UTC, like the model's default
+            server_default=sa.text("timezone('utc', now())"),
+        ),
+    )
+    op.create_index("ix_intake_events_id", "intake_events", ["id"])
+    op.create_index("ix_intake_events_schedule_id", "intake_events", ["schedule_id"])
+    op.create_index("ix_intake_events_event_date", "intake_events", ["event_date"])
+
+    op.create_table(
+        "meal_events",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "meal_schedule_id",
+            sa.Integer(),
+            sa.ForeignKey("meal_schedules.id", ondelete="CASCADE", onupdate="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("event_date", sa.Date(), nullable=False),
+        sa.Column("eaten_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            nullable=False,
+            # Naive UTC, like the model's default
+            server_default=sa.text("timezone('utc', now())"),
+        ),
+    )
+    op.create_index("ix_meal_events_id", "meal_events", ["id"])
+    op.create_index(
+        "ix_meal_events_meal_schedule_id", "meal_events", ["meal_schedule_id"]
+    )
+    op.create_index("ix_meal_events_event_date", "meal_events", ["event_date"])
+
+
+def downgrade() -> None:
+    op.drop_table("meal_events")
+    op.drop_table("intake_events")
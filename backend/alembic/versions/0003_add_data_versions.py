@@ -0,0 +1,28 @@
+"""Add data version counters
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "data_versions",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("data_versions")
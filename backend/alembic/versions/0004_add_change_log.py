@@ -0,0 +1,32 @@
+"""Add change log for delta sync
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "change_log",
+        sa.Column("seq", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("entity", sa.String(length=32), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("op", sa.String(length=10), nullable=False),
+        sa.Column("changed_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_change_log_entity", "change_log", ["entity", "entity_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("change_log")
@@ -0,0 +1,57 @@
+"""Add dose event log and daily adherence rollup
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dose_events",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("schedule_id", sa.Integer(), nullable=False),
+        sa.Column("drug_id", sa.Integer(), nullable=False),
+        sa.Column("dose_date", sa.Date(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("scheduled_time", sa.DateTime(), nullable=True),
+        sa.Column("occurred_at", sa.DateTime(), nullable=False),
+        sa.Column("delay_seconds", sa.Integer(), nullable=True),
+    )
+    op.create_index(
+        "ix_dose_events_drug_date", "dose_events", ["drug_id", "dose_date"]
+    )
+    op.create_index(
+        "uq_dose_events_once",
+        "dose_events",
+        ["schedule_id", "dose_date", "kind"],
+        unique=True,
+        postgresql_where=sa.text("kind IN ('due', 'missed')"),
+    )
+
+    op.create_table(
+        "adherence_daily",
+        sa.Column("drug_id", sa.Integer(), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("due_count", sa.Integer(), nullable=False),
+        sa.Column("taken_count", sa.Integer(), nullable=False),
+        sa.Column("snoozed_count", sa.Integer(), nullable=False),
+        sa.Column("dismissed_count", sa.Integer(), nullable=False),
+        sa.Column("missed_count", sa.Integer(), nullable=False),
+        sa.Column("delay_seconds_total", sa.BigInteger(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("adherence_daily")
+    op.drop_table("dose_events")
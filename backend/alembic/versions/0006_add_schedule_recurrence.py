@@ -0,0 +1,32 @@
+"""Add recurrence period and day mask to drug schedules
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "drug_schedules",
+        sa.Column("recurrence_period_days", sa.Integer(), nullable=True),
+    )
+    op.add_column(
+        "drug_schedules",
+        sa.Column("recurrence_mask", sa.BigInteger(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("drug_schedules", "recurrence_mask")
+    op.drop_column("drug_schedules", "recurrence_period_days")
@@ -0,0 +1,49 @@
+"""Add spacing rules between drugs
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "spacing_rules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "drug_id",
+            sa.Integer(),
+            sa.ForeignKey("drugs.id", ondelete="CASCADE", onupdate="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "other_drug_id",
+            sa.Integer(),
+            sa.ForeignKey("drugs.id", ondelete="CASCADE", onupdate="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("min_gap_minutes", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint(
+            "drug_id", "other_drug_id", name="uq_spacing_rules_pair"
+        ),
+        sa.CheckConstraint("drug_id <= other_drug_id", name="ck_spacing_rules_order"),
+    )
+    op.create_index("ix_spacing_rules_id", "spacing_rules", ["id"])
+    op.create_index(
+        "ix_spacing_rules_other_drug_id", "spacing_rules", ["other_drug_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("spacing_rules")
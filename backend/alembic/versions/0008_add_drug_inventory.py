@@ -0,0 +1,43 @@
+"""Add per-drug inventory with run-out forecast
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "drug_inventory",
+        sa.Column(
+            "drug_id",
+            sa.Integer(),
+            sa.ForeignKey("drugs.id", ondelete="CASCADE", onupdate="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("on_hand", sa.Integer(), nullable=False),
+        sa.Column("refill_lead_days", sa.Integer(), nullable=False),
+        sa.Column("daily_use", sa.Float(), nullable=False),
+        sa.Column("last_day", sa.Date(), nullable=True),
+        sa.Column("runs_out_on", sa.Date(), nullable=True),
+        sa.Column("refill_by", sa.Date(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index(
+        "ix_drug_inventory_runs_out_on", "drug_inventory", ["runs_out_on"]
+    )
+    op.create_index("ix_drug_inventory_refill_by", "drug_inventory", ["refill_by"])
+
+
+def downgrade() -> None:
+    op.drop_table("drug_inventory")
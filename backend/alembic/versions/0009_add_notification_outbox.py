@@ -0,0 +1,53 @@
+"""Add notification outbox
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_outbox",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("schedule_id", sa.Integer(), nullable=False),
+        sa.Column("drug_id", sa.Integer(), nullable=False),
+        sa.Column("dose_date", sa.Date(), nullable=False),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column("sink", sa.String(length=32), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint(
+            "schedule_id",
+            "dose_date",
+            "kind",
+            "sink",
+            name="uq_notification_outbox_message",
+        ),
+    )
+    op.create_index(
+        "ix_notification_outbox_pending",
+        "notification_outbox",
+        ["next_attempt_at"],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("notification_outbox")
@@ -0,0 +1,41 @@
+"""Add scheduled triggers for the dose scheduler
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "scheduled_triggers",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("schedule_id", sa.Integer(), nullable=False),
+        sa.Column("drug_id", sa.Integer(), nullable=False),
+        sa.Column("dose_date", sa.Date(), nullable=False),
+        sa.Column("fire_at", sa.DateTime(), nullable=False),
+        sa.Column("fired_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint(
+            "schedule_id", "dose_date", name="uq_scheduled_triggers_dose"
+        ),
+    )
+    op.create_index(
+        "ix_scheduled_triggers_pending",
+        "scheduled_triggers",
+        ["fire_at"],
+        postgresql_where=sa.text("fired_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("scheduled_triggers")
@@ -0,0 +1,44 @@
+"""Add dose escalations for missed-dose follow-up
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-21 10:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "dose_escalations",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("schedule_id", sa.Integer(), nullable=False),
+        sa.Column("drug_id", sa.Integer(), nullable=False),
+        sa.Column("dose_date", sa.Date(), nullable=False),
+        sa.Column("scheduled_time", sa.DateTime(), nullable=True),
+        sa.Column("state", sa.String(length=16), nullable=False),
+        sa.Column("reminders", sa.Integer(), nullable=False),
+        sa.Column("deadline", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint(
+            "schedule_id", "dose_date", name="uq_dose_escalations_dose"
+        ),
+    )
+    op.create_index(
+        "ix_dose_escalations_open",
+        "dose_escalations",
+        ["deadline"],
+        postgresql_where=sa.text("state IN ('pending', 'escalated')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("dose_escalations")
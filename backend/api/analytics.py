@@ -0,0 +1,34 @@
+import logging
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from backend.database import get_db
+from backend.services.adherence_analytics import AdherenceReport, adherence_report
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+MAX_ANALYTICS_DAYS = 731
+
+
+@router.get("/analytics/adherence")
+def get_adherence(
+    from_date: date = Query(..., alias="from", description="First day (inclusive)"),
+    to_date: date = Query(..., alias="to", description="Last day (inclusive)"),
+    db: Session = Depends(get_db),
+) -> AdherenceReport:
+    """Adherence rate, average lateness and missed-dose streaks per drug"""
+    logger.info("GET /analytics/adherence from=%s to=%s", from_date, to_date)
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (to_date - from_date).days >= MAX_ANALYTICS_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range is limited to {MAX_ANALYTICS_DAYS} days",
+        )
+
+    report = adherence_report(db, from_date, to_date)
+    logger.info("GET /analytics/adherence drugs=%d", len(report.drugs))
+    return report
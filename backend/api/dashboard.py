@@ -0,0 +1,151 @@
+import logging
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
+from backend.api.drug import DrugResponse, schedule_to_dict
+from backend.api.meal import MealScheduleDto, meal_schedule_to_dto
+from backend.api.notifications import (
+    NEXT_DUE_HEADER,
+    NotificationDto,
+    due_notifications,
+)
+from backend.api.responses import (
+    MSGPACK_RESPONSES,
+    FastJSONResponse,
+    collection_etag,
+    content_digest,
+    etag_headers,
+    etag_matches,
+    negotiated_response,
+    not_modified,
+)
+from backend.database import get_db
+from backend.models import DrugSchedule, MealSchedule
+from backend.services.data_version import DRUGS, MEAL_SCHEDULES, get_data_version
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+DASHBOARD_FIELDS = ("drugs", "meal_schedules", "notifications")
+
+
+class DashboardResponse(BaseModel):
+    drugs: list[DrugResponse] | None = Field(None, description="As GET /drug")
+    meal_schedules: list[MealScheduleDto] | None = Field(
+        None, description="As GET /meal-schedules"
+    )
+    notifications: list[NotificationDto] | None = Field(
+        None, description="As GET /notifications"
+    )
+
+
+class DashboardLoader:
+    """Loads each table at most once for all dashboard sections"""
+
+    def __init__(self, db_session: Session) -> None:
+        self.db: Session = db_session
+        self._meals: list[MealSchedule] | None = None
+        self._schedules: list[DrugSchedule] | None = None
+
+    def meals(self) -> list[MealSchedule]:
+        if self._meals is None:
+            statement = select(MealSchedule).order_by(MealSchedule.id)
+            self._meals = list(self.db.scalars(statement))
+        return self._meals
+
+    def schedules(self) -> list[DrugSchedule]:
+        """Active schedules with their drugs, as listed by GET /drug"""
+        if self._schedules is None:
+            # Meals first: schedules' meal relationships then resolve from
+            # the identity map instead of one query each
+            self.meals()
+            statement = (
+                select(DrugSchedule)
+                .options(joinedload(DrugSchedule.drug))
+                .where(DrugSchedule.is_active)
+                .order_by(DrugSchedule.id)
+            )
+            self._schedules = list(self.db.scalars(statement))
+        return self._schedules
+
+
+def parse_fields(fields: str | None) -> tuple[str, ...]:
+    """Requested dashboard sections, in response order"""
+    if fields is None:
+        return DASHBOARD_FIELDS
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested.difference(DASHBOARD_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown dashboard fields: {', '.join(sorted(unknown))}",
+        )
+    if not requested:
+        raise HTTPException(status_code=400, detail="No dashboard fields requested")
+    return tuple(f for f in DASHBOARD_FIELDS if f in requested)
+
+
+@router.get(
+    "/dashboard",
+    response_model=DashboardResponse,
+    response_class=FastJSONResponse,
+    responses=MSGPACK_RESPONSES,
+)
+def get_dashboard(
+    request: Request,
+    fields: str | None = Query(
+        None,
+        description="Comma-separated sections to include "
+        "(drugs, meal_schedules, notifications); all by default",
+    ),
+    db: Session = Depends(get_db),
+) -> Response:
+    """Drugs, meal schedules and due notifications in one round trip.
+
+    The sections share one loading pass, so each table is read once. The
+    ETag combines the collections' data versions with a digest of the due
+    notifications, which change with the clock as well as with writes.
+    """
+    sections = parse_fields(fields)
+    logger.info("GET /dashboard fields=%s", ",".join(sections))
+    loader = DashboardLoader(db)
+
+    validators: list[str] = []
+    headers: dict[str, str] = {}
+    if "drugs" in sections:
+        validators.append(f"d{get_data_version(db, DRUGS)}")
+    if "meal_schedules" in sections:
+        validators.append(f"m{get_data_version(db, MEAL_SCHEDULES)}")
+    notifications: list[dict[str, Any]] = []
+    if "notifications" in sections:
+        notifications, next_due = due_notifications(db, loader.schedules)
+        validators.append(f"n{content_digest([notifications, next_due])}")
+        if next_due is not None:
+            headers[NEXT_DUE_HEADER] = next_due.isoformat()
+
+    etag = collection_etag("dashboard", "-".join(validators), request)
+    if etag_matches(request, etag):
+        logger.info("GET /dashboard not modified etag=%s", etag)
+        response = not_modified(etag)
+        response.headers.update(headers)
+        return response
+
+    content: dict[str, Any] = {}
+    if "drugs" in sections:
+        content["drugs"] = [schedule_to_dict(s) for s in loader.schedules()]
+    if "meal_schedules" in sections:
+        content["meal_schedules"] = [
+            meal_schedule_to_dto(m).model_dump() for m in loader.meals()
+        ]
+    if "notifications" in sections:
+        content["notifications"] = notifications
+    logger.info(
+        "GET /dashboard %s",
+        " ".join(f"{name}={len(items)}" for name, items in content.items()),
+    )
+    headers.update(etag_headers(etag))
+    return negotiated_response(request, content, headers=headers)
@@ -1,17 +1,43 @@
 import logging
 from datetime import date, datetime, time, timedelta
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel, ConfigDict, Field, field_serializer
-from sqlalchemy.orm import Session
-
-from backend.database import get_db
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
+from backend.api.responses import (
+    STREAMING_RESPONSES,
+    FastJSONResponse,
+    collection_etag,
+    etag_headers,
+    etag_matches,
+    negotiated_response,
+    not_modified,
+    streamed_response,
+    wants_stream,
+)
+from backend.database import get_db, stream_rows
 from backend.models import (
     DependencyType,
     DrugORM,
     DrugSchedule,
     NotificationOverride,
 )
+from backend.services.change_feed import change_feed
+from backend.services.change_log import DELETE, NOTIFICATION_OVERRIDE, record_changes
+from backend.services.data_version import DRUGS, bump_data_version, get_data_version
+from backend.services.dependency_index import (
+    DependencyError,
+    dependency_index,
+    refresh_downstream,
+    validate_anchor,
+)
+from backend.services.dose_time_resolver import AffectedDose
+from backend.services.inventory import refresh_usage
+from backend.services.recurrence import RecurrenceRule, compile_rule
+from backend.services.spacing import SpacingConflict, spacing_conflicts
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -34,6 +60,9 @@ class DrugCreateCompat(BaseModel):
     )
     start_date: date | None = Field(None, description="Start date")
     end_date: date | None = Field(None, description="End date (optional)")
+    recurrence: RecurrenceRule | None = Field(
+        None, description="Repeat pattern; every day if never set"
+    )
     absolute_time: time | None = Field(
         None, description="Absolute time (for absolute dependency)"
     )
@@ -64,6 +93,8 @@ class DrugResponse(BaseModel):
     frequency_per_day: int
     start_date: date
     end_date: date | None
+    recurrence_period_days: int | None = None
+    recurrence_mask: int | None = None
     duration: int | None = None
     amount_per_day: int | None = None
     dependency_type: str
@@ -83,36 +114,59 @@ class DrugResponse(BaseModel):
         return value.isoformat() if value else None
 
 
-def schedule_to_response(schedule: DrugSchedule) -> DrugResponse:
-    """Helper function to convert a DrugSchedule to DrugResponse"""
-    return DrugResponse(
-        id=schedule.id,
-        name=schedule.drug.name,
-        kind=schedule.drug.kind,
-        amount_per_dose=schedule.drug.amount_per_dose,
-        frequency_per_day=schedule.frequency_per_day,
-        start_date=schedule.start_date,
-        end_date=schedule.end_date,
-        duration=(
+class DrugCreateResponse(DrugResponse):
+    conflicts: list[SpacingConflict] = Field(
+        default_factory=list,
+        description="Today's doses of the written schedules that break a spacing rule",
+    )
+
+
+class DrugWriteResponse(DrugCreateResponse):
+    affected_doses: list[AffectedDose] = Field(
+        default_factory=list,
+        description="Today's doses whose resolved time was recomputed by this write",
+    )
+
+
+def schedule_to_dict(schedule: DrugSchedule) -> dict[str, Any]:
+    """Plain DrugResponse-shaped dict for a DrugSchedule, without validation"""
+    return {
+        "id": schedule.id,
+        "name": schedule.drug.name,
+        "kind": schedule.drug.kind,
+        "amount_per_dose": schedule.drug.amount_per_dose,
+        "frequency_per_day": schedule.frequency_per_day,
+        "start_date": schedule.start_date,
+        "end_date": schedule.end_date,
+        "recurrence_period_days": schedule.recurrence_period_days,
+        "recurrence_mask": schedule.recurrence_mask,
+        "duration": (
             (schedule.end_date - schedule.start_date).days + 1
             if schedule.end_date is not None
             else None
         ),
-        amount_per_day=schedule.frequency_per_day,
-        dependency_type=schedule.dependency_type.value,
-        absolute_time=schedule.absolute_time,
-        meal_schedule_id=schedule.meal_schedule_id,
-        meal_offset_minutes=schedule.meal_offset_minutes,
-        meal_timing=schedule.meal_timing,
-        depends_on_drug_id=schedule.depends_on_drug_id,
-        drug_offset_minutes=schedule.drug_offset_minutes,
-        is_active=schedule.is_active,
-        created_at=schedule.created_at,
-    )
+        "amount_per_day": schedule.frequency_per_day,
+        "dependency_type": schedule.dependency_type.value,
+        "absolute_time": schedule.absolute_time,
+        "meal_schedule_id": schedule.meal_schedule_id,
+        "meal_offset_minutes": schedule.meal_offset_minutes,
+        "meal_timing": schedule.meal_timing,
+        "depends_on_drug_id": schedule.depends_on_drug_id,
+        "drug_offset_minutes": schedule.drug_offset_minutes,
+        "is_active": schedule.is_active,
+        "created_at": schedule.created_at,
+    }
+
+
+def schedule_to_response(schedule: DrugSchedule) -> DrugResponse:
+    """Helper function to convert a DrugSchedule to DrugResponse"""
+    return DrugResponse(**schedule_to_dict(schedule))
 
 
 @router.post("/drug")
-def add_drug(drug: DrugCreateCompat, db: Session = Depends(get_db)) -> DrugResponse:
+def add_drug(
+    drug: DrugCreateCompat, db: Session = Depends(get_db)
+) -> DrugCreateResponse:
     logger.info("POST /drug payload=%s", drug.model_dump())
 
     # Debug timezone conversion
@@ -159,12 +213,17 @@ def add_drug(drug: DrugCreateCompat, db: Session = Depends(get_db)) -> DrugRespo
         # Frontend now sends UTC time directly
         absolute_time = drug.absolute_time
         dependency_type = DependencyType(dep_type_str)
+    period, mask = (
+        compile_rule(drug.recurrence, start_date) if drug.recurrence else (None, None)
+    )
     schedule = DrugSchedule(
         drug_id=drug_orm.id,
         dependency_type=dependency_type,
         frequency_per_day=frequency_per_day,
         start_date=start_date,
         end_date=end_date,
+        recurrence_period_days=period,
+        recurrence_mask=mask,
         absolute_time=absolute_time,
         meal_schedule_id=drug.meal_schedule_id,
         meal_offset_minutes=drug.meal_offset_minutes,
@@ -172,39 +231,74 @@ def add_drug(drug: DrugCreateCompat, db: Session = Depends(get_db)) -> DrugRespo
         depends_on_drug_id=drug.depends_on_drug_id,
         drug_offset_minutes=drug.drug_offset_minutes,
     )
+    try:
+        validate_anchor(db, schedule)
+    except DependencyError as e:
+        logger.warning("POST /drug invalid dependency name=%s: %s", drug.name, e)
+        raise HTTPException(status_code=400, detail=str(e)) from None
     db.add(schedule)
+    bump_data_version(db, DRUGS)
     db.commit()
     db.refresh(schedule)  # Refresh to get the latest data
+    dependency_index.upsert(schedule)
+    change_feed.publish()
+    conflicts = spacing_conflicts(db, date.today(), {schedule.id})
 
-    logger.info("POST /drug success name=%s", drug.name)
-    return schedule_to_response(schedule)
+    logger.info("POST /drug success name=%s conflicts=%d", drug.name, len(conflicts))
+    return DrugCreateResponse(**schedule_to_dict(schedule), conflicts=conflicts)
 
 
-@router.get("/drug")
-def get_all_drugs(db: Session = Depends(get_db)) -> list[DrugResponse]:
-    logger.info("GET /drug")
-    schedules = db.query(DrugSchedule).filter(DrugSchedule.is_active).all()
+@router.get(
+    "/drug",
+    response_model=list[DrugResponse],
+    response_class=FastJSONResponse,
+    responses=STREAMING_RESPONSES,
+)
+def get_all_drugs(
+    request: Request,
+    stream: bool = Query(
+        False, description="Stream the list through a server-side cursor"
+    ),
+    db: Session = Depends(get_db),
+) -> Response:
+    logger.info("GET /drug stream=%s", stream)
+    etag = collection_etag(DRUGS, get_data_version(db, DRUGS), request)
+    if etag_matches(request, etag):
+        logger.info("GET /drug not modified etag=%s", etag)
+        return not_modified(etag)
+
+    statement = (
+        select(DrugSchedule)
+        .options(joinedload(DrugSchedule.drug))
+        .where(DrugSchedule.is_active)
+        .order_by(DrugSchedule.id)
+    )
+    if wants_stream(request, stream):
+        logger.info("GET /drug streaming")
+        schedules = stream_rows(db, statement)
+        stream_items = (_drug_item(s) for s in schedules)
+        return streamed_response(request, stream_items, headers=etag_headers(etag))
 
-    items = []
-    for schedule in schedules:
-        # Debug timezone conversion
-        if schedule.absolute_time and "Timezone" in schedule.drug.name:
-            logger.info("🔧 GET /drug Timezone Debug:")
-            logger.info(f"  Drug name: {schedule.drug.name}")
-            logger.info(f"  DB absolute_time: {schedule.absolute_time}")
-            logger.info(f"  Type: {type(schedule.absolute_time)}")
-            logger.info(f"  String: {str(schedule.absolute_time)}")
+    items = [_drug_item(s) for s in db.scalars(statement)]
+    logger.info("GET /drug count=%d", len(items))
+    return negotiated_response(request, items, headers=etag_headers(etag))
 
-        items.append(schedule_to_response(schedule))
 
-    logger.info("GET /drug count=%d", len(items))
-    return items
+def _drug_item(schedule: DrugSchedule) -> dict[str, Any]:
+    # Debug timezone conversion
+    if schedule.absolute_time and "Timezone" in schedule.drug.name:
+        logger.info("🔧 GET /drug Timezone Debug:")
+        logger.info(f"  Drug name: {schedule.drug.name}")
+        logger.info(f"  DB absolute_time: {schedule.absolute_time}")
+        logger.info(f"  Type: {type(schedule.absolute_time)}")
+        logger.info(f"  String: {str(schedule.absolute_time)}")
+    return schedule_to_dict(schedule)
 
 
 @router.put("/drug-id/{drug_id}")
 def update_drug(
     drug_id: int, drug: DrugCreateCompat, db: Session = Depends(get_db)
-) -> DrugResponse:
+) -> DrugWriteResponse:
     logger.info("PUT /drug/%d payload=%s", drug_id, drug.model_dump())
 
     schedule = db.query(DrugSchedule).filter(DrugSchedule.id == drug_id).first()
@@ -260,11 +354,22 @@ def update_drug(
                 )
             # Frontend now sends UTC time directly
             schedule.absolute_time = drug.absolute_time
+    if drug.recurrence is not None:
+        schedule.recurrence_period_days, schedule.recurrence_mask = compile_rule(
+            drug.recurrence, schedule.start_date
+        )
     schedule.meal_schedule_id = drug.meal_schedule_id
     schedule.meal_offset_minutes = drug.meal_offset_minutes
     schedule.meal_timing = drug.meal_timing
     schedule.depends_on_drug_id = drug.depends_on_drug_id
     schedule.drug_offset_minutes = drug.drug_offset_minutes
+    try:
+        validate_anchor(db, schedule)
+    except DependencyError as e:
+        logger.warning("PUT /drug/%d invalid dependency: %s", drug_id, e)
+        raise HTTPException(status_code=400, detail=str(e)) from None
+    # Dose size or recurrence may have changed the run-out forecast
+    refresh_usage(db, schedule.drug_id, date.today())
 
     # If absolute_time changed, clear notification overrides for today and future dates
     # This prevents snooze mechanism from using old times
@@ -276,24 +381,49 @@ def update_drug(
         )
         # Delete all notification overrides (snoozes and dismissals) for this schedule from today onwards
         # This ensures the next snooze will use the new absolute_time
-        deleted_count = (
-            db.query(NotificationOverride)
-            .filter(
-                NotificationOverride.schedule_id == schedule.id,
-                NotificationOverride.override_date >= today,
-            )
-            .delete()
+        overrides = db.query(NotificationOverride).filter(
+            NotificationOverride.schedule_id == schedule.id,
+            NotificationOverride.override_date >= today,
         )
+        # Bulk delete bypasses the ORM, so log the removed rows for sync
+        record_changes(
+            db,
+            [
+                (NOTIFICATION_OVERRIDE, o.id, DELETE)
+                for o in overrides.with_entities(NotificationOverride.id)
+            ],
+        )
+        deleted_count = overrides.delete()
         logger.info(
             "Cleared %d notification override(s) for schedule %d",
             deleted_count,
             schedule.id,
         )
 
+    bump_data_version(db, DRUGS)
     db.commit()
     db.refresh(schedule)  # Refresh to get the latest data
-    logger.info("PUT /drug/%d success name=%s", drug_id, drug.name)
-    return schedule_to_response(schedule)
+
+    # Recompute this schedule and everything chained to its drug
+    dependency_index.ensure_loaded(db)
+    dependency_index.upsert(schedule)
+    affected = {schedule.id} | dependency_index.dependents_of_drug(schedule.drug_id)
+    affected_doses = refresh_downstream(db, affected)
+    change_feed.publish()
+    conflicts = spacing_conflicts(db, date.today(), affected)
+
+    logger.info(
+        "PUT /drug/%d success name=%s affected=%d conflicts=%d",
+        drug_id,
+        drug.name,
+        len(affected_doses),
+        len(conflicts),
+    )
+    return DrugWriteResponse(
+        **dict(schedule_to_response(schedule)),
+        affected_doses=affected_doses,
+        conflicts=conflicts,
+    )
 
 
 @router.delete("/drug-id/{drug_id}")
@@ -308,11 +438,18 @@ def delete_drug(drug_id: int, db: Session = Depends(get_db)) -> DrugResponse:
     # Create response before deleting
     response = schedule_to_response(schedule)
 
+    # Schedules chained to this drug lose their anchor (direct ones cascade)
+    dependency_index.ensure_loaded(db)
+    affected = {schedule.id} | dependency_index.dependents_of_drug(schedule.drug_id)
+
     # Delete the schedule and its drug (for compatibility with tests expecting row removal)
     db.delete(schedule)
     # Also delete the drug row
     db.delete(schedule.drug)
+    bump_data_version(db, DRUGS)
     db.commit()
+    refresh_downstream(db, affected)
+    change_feed.publish()
 
     logger.info("DELETE /drug/%d success", drug_id)
     return response
@@ -322,7 +459,7 @@ def delete_drug(drug_id: int, db: Session = Depends(get_db)) -> DrugResponse:
 @router.put("/drug/{name}")
 def update_drug_by_name(
     name: str, drug: DrugCreateCompat, db: Session = Depends(get_db)
-) -> DrugResponse:
+) -> DrugWriteResponse:
     logger.info("PUT /drug/%s payload=%s", name, drug.model_dump())
     schedule = (
         db.query(DrugSchedule)
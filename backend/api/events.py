@@ -0,0 +1,152 @@
+import logging
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from backend.database import get_db
+from backend.models import DrugSchedule, IntakeEvent, MealEvent, MealSchedule
+from backend.services.change_feed import change_feed
+from backend.services.data_version import EVENTS, bump_data_version
+from backend.services.dependency_index import dependency_index
+from backend.services.dose_events import TAKEN, dose_event, record_dose_events
+from backend.services.dose_time_resolver import (
+    AffectedDose,
+    DoseTimeResolver,
+    refresh_resolved_times,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+class IntakeEventCreate(BaseModel):
+    schedule_id: int = Field(..., description="Schedule whose dose was taken")
+    taken_at: datetime | None = Field(
+        None, description="When the dose was taken (defaults to now)"
+    )
+
+
+class MealEventCreate(BaseModel):
+    meal_name: str = Field(..., description="Meal name (breakfast, lunch, dinner)")
+    eaten_at: datetime | None = Field(
+        None, description="When the meal was eaten (defaults to now)"
+    )
+
+
+class EventResponse(BaseModel):
+    event_id: int
+    occurred_at: str = Field(..., description="ISO timestamp of the event")
+    shifted_doses: list[AffectedDose] = Field(
+        default_factory=list,
+        description="Dependent doses re-anchored on the actual time for that day",
+    )
+
+
+def _to_local_naive(value: datetime | None) -> datetime:
+    """Event times are stored as naive local time, like the rest of the schema"""
+    if value is None:
+        return datetime.now()
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+@router.post("/events/intake")
+def record_intake(
+    event: IntakeEventCreate, db: Session = Depends(get_db)
+) -> EventResponse:
+    logger.info("POST /events/intake payload=%s", event.model_dump())
+
+    schedule = (
+        db.query(DrugSchedule).filter(DrugSchedule.id == event.schedule_id).first()
+    )
+    if not schedule:
+        logger.warning(
+            "POST /events/intake schedule not found id=%d", event.schedule_id
+        )
+        raise HTTPException(status_code=404, detail="Schedule not found")
+
+    taken_at = _to_local_naive(event.taken_at)
+    # The time the dose was due that day, before this intake is stored
+    scheduled_time = DoseTimeResolver(db, taken_at.date()).effective_time(schedule)
+    row = IntakeEvent(
+        schedule_id=schedule.id, event_date=taken_at.date(), taken_at=taken_at
+    )
+    db.add(row)
+    record_dose_events(
+        db,
+        [
+            dose_event(
+                schedule.id,
+                schedule.drug_id,
+                row.event_date,
+                TAKEN,
+                scheduled_time,
+                taken_at,
+            )
+        ],
+    )
+    bump_data_version(db, EVENTS)
+    db.commit()
+    db.refresh(row)
+
+    # Shift only the doses chained on this drug, for that day only
+    dependency_index.ensure_loaded(db)
+    shifted = refresh_resolved_times(
+        db,
+        dependency_index.dependents_of_drug(schedule.drug_id),
+        row.event_date,
+        only_date=True,
+    )
+    change_feed.publish()
+
+    logger.info(
+        "POST /events/intake success schedule_id=%d shifted=%d",
+        schedule.id,
+        len(shifted),
+    )
+    return EventResponse(
+        event_id=row.id, occurred_at=taken_at.isoformat(), shifted_doses=shifted
+    )
+
+
+@router.post("/events/meal")
+def record_meal(event: MealEventCreate, db: Session = Depends(get_db)) -> EventResponse:
+    logger.info("POST /events/meal payload=%s", event.model_dump())
+
+    meal = (
+        db.query(MealSchedule).filter(MealSchedule.meal_name == event.meal_name).first()
+    )
+    if not meal:
+        logger.warning("POST /events/meal meal not found meal_name=%s", event.meal_name)
+        raise HTTPException(status_code=404, detail="Meal schedule not found")
+
+    eaten_at = _to_local_naive(event.eaten_at)
+    row = MealEvent(
+        meal_schedule_id=meal.id, event_date=eaten_at.date(), eaten_at=eaten_at
+    )
+    db.add(row)
+    bump_data_version(db, EVENTS)
+    db.commit()
+    db.refresh(row)
+
+    # Shift only the doses anchored (transitively) on this meal, for that day only
+    dependency_index.ensure_loaded(db)
+    shifted = refresh_resolved_times(
+        db,
+        dependency_index.dependents_of_meal(meal.id),
+        row.event_date,
+        only_date=True,
+    )
+    change_feed.publish()
+
+    logger.info(
+        "POST /events/meal success meal_name=%s shifted=%d",
+        event.meal_name,
+        len(shifted),
+    )
+    return EventResponse(
+        event_id=row.id, occurred_at=eaten_at.isoformat(), shifted_doses=shifted
+    )
@@ -0,0 +1,117 @@
+import csv
+import logging
+from collections.abc import Iterator
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from backend.api.responses import NDJSON_MEDIA_TYPE, chunked, encode_json
+from backend.database import get_db
+from backend.services.change_log import latest_seq
+from backend.services.export import (
+    EXPORT_TABLES,
+    begin_snapshot,
+    csv_value,
+    export_columns,
+    export_rows,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+CSV_MEDIA_TYPE = "text/csv"
+
+
+class _Echo:
+    """File-like object that hands csv.writer's output straight back"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def parse_entities(entities: str | None) -> list[str]:
+    """Requested tables, in export order"""
+    if entities is None:
+        return list(EXPORT_TABLES)
+    requested = {e.strip() for e in entities.split(",") if e.strip()}
+    unknown = requested.difference(EXPORT_TABLES)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown export entities: {', '.join(sorted(unknown))}",
+        )
+    if not requested:
+        raise HTTPException(status_code=400, detail="No export entities requested")
+    return [e for e in EXPORT_TABLES if e in requested]
+
+
+def _ndjson(db: Session, entities: list[str]) -> Iterator[bytes]:
+    # The header's cursor is the change log position of the snapshot, so a
+    # restored client can continue with GET /sync?since=<cursor>
+    header = {
+        "exported_at": datetime.now(),
+        "cursor": latest_seq(db),
+        "entities": entities,
+    }
+    yield encode_json({"entity": "export", "data": header}) + b"\n"
+    for entity in entities:
+        for row in export_rows(db, entity):
+            yield encode_json({"entity": entity, "data": dict(row)}) + b"\n"
+
+
+def _csv(db: Session, entity: str) -> Iterator[bytes]:
+    columns = export_columns(entity)
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns).encode()
+    for row in export_rows(db, entity):
+        yield writer.writerow([csv_value(row[c]) for c in columns]).encode()
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}, CSV_MEDIA_TYPE: {}}}},
+)
+def export_data(
+    format: str = Query(
+        "ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"
+    ),
+    entities: str | None = Query(
+        None,
+        description="Comma-separated tables to export, all by default "
+        f"({', '.join(EXPORT_TABLES)}). CSV exports exactly one.",
+    ),
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    """Stream the full data set, or some of its tables, for backup or analysis.
+
+    All tables are read from one REPEATABLE READ snapshot through server-side
+    cursors, so the export is consistent and memory use does not grow with it.
+    NDJSON lines are `{"entity": ..., "data": {column: value}}`, after an
+    `export` header line; CSV has one header row and a row per record.
+    """
+    selected = parse_entities(entities)
+    logger.info("GET /export format=%s entities=%s", format, ",".join(selected))
+    begin_snapshot(db)
+
+    stamp = date.today().strftime("%Y%m%d")
+    if format == "csv":
+        if len(selected) != 1:
+            raise HTTPException(
+                status_code=400, detail="CSV export takes exactly one entity"
+            )
+        body = _csv(db, selected[0])
+        media_type = CSV_MEDIA_TYPE
+        filename = f"tabbuddy-{selected[0]}-{stamp}.csv"
+    else:
+        body = _ndjson(db, selected)
+        media_type = NDJSON_MEDIA_TYPE
+        filename = f"tabbuddy-export-{stamp}.ndjson"
+
+    return StreamingResponse(
+        chunked(body),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,71 @@
+import logging
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from backend.database import get_db
+from backend.models import DrugInventory, DrugORM
+from backend.services.inventory import (
+    DEFAULT_REFILL_LEAD_DAYS,
+    InventoryStatus,
+    inventory_statuses,
+    refill_alerts,
+    running_out,
+    set_stock,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+class InventoryUpdate(BaseModel):
+    on_hand: int = Field(..., ge=0, description="Units on hand (pills or ml)")
+    refill_lead_days: int = Field(
+        DEFAULT_REFILL_LEAD_DAYS,
+        ge=0,
+        le=365,
+        description="Days before running out to flag a refill",
+    )
+
+
+@router.put("/inventory/{drug_id}")
+def update_inventory(
+    drug_id: int, update: InventoryUpdate, db: Session = Depends(get_db)
+) -> InventoryStatus:
+    """Set a drug's stock after a refill or recount; taken doses draw it down"""
+    logger.info("PUT /inventory/%d payload=%s", drug_id, update.model_dump())
+    if db.get(DrugORM, drug_id) is None:
+        logger.warning("PUT /inventory drug not found id=%d", drug_id)
+        raise HTTPException(status_code=404, detail="Drug not found")
+    set_stock(db, drug_id, update.on_hand, update.refill_lead_days, date.today())
+    db.commit()
+    (status,) = inventory_statuses(db, DrugInventory.drug_id == drug_id)
+    logger.info("PUT /inventory/%d success runs_out_on=%s", drug_id, status.runs_out_on)
+    return status
+
+
+@router.get("/inventory")
+def get_inventory(db: Session = Depends(get_db)) -> list[InventoryStatus]:
+    logger.info("GET /inventory")
+    return inventory_statuses(db)
+
+
+@router.get("/inventory/running-out")
+def get_running_out(
+    days: int = Query(..., ge=0, le=3650, description="Forecast horizon in days"),
+    db: Session = Depends(get_db),
+) -> list[InventoryStatus]:
+    """Drugs forecast to run out within `days` days, soonest first"""
+    statuses = running_out(db, days, date.today())
+    logger.info("GET /inventory/running-out days=%d count=%d", days, len(statuses))
+    return statuses
+
+
+@router.get("/inventory/refill-alerts")
+def get_refill_alerts(db: Session = Depends(get_db)) -> list[InventoryStatus]:
+    """Drugs due for a refill: within their lead days of running out"""
+    statuses = refill_alerts(db, date.today())
+    logger.info("GET /inventory/refill-alerts count=%d", len(statuses))
+    return statuses
@@ -1,12 +1,33 @@
 import logging
 from datetime import time
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from backend.database import get_db
+from backend.api.responses import (
+    STREAMING_RESPONSES,
+    FastJSONResponse,
+    collection_etag,
+    etag_headers,
+    etag_matches,
+    negotiated_response,
+    not_modified,
+    streamed_response,
+    wants_stream,
+)
+from backend.database import get_db, stream_rows
 from backend.models import MealSchedule
+from backend.services.change_feed import change_feed
+from backend.services.data_version import (
+    DRUGS,
+    MEAL_SCHEDULES,
+    bump_data_version,
+    get_data_version,
+)
+from backend.services.dependency_index import dependency_index, refresh_downstream
+from backend.services.dose_time_resolver import AffectedDose
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -19,6 +40,13 @@ class MealScheduleDto(BaseModel):
     created_at: str = Field(..., description="Creation timestamp")
 
 
+class MealScheduleWriteResponse(MealScheduleDto):
+    affected_doses: list[AffectedDose] = Field(
+        default_factory=list,
+        description="Today's doses whose resolved time was recomputed by this write",
+    )
+
+
 class MealScheduleCreate(BaseModel):
     meal_name: str = Field(..., description="Meal name (breakfast, lunch, dinner)")
     base_time: str = Field(..., description="Base time in HH:MM format")
@@ -38,13 +66,37 @@ def meal_schedule_to_dto(meal: MealSchedule) -> MealScheduleDto:
     )
 
 
-@router.get("/meal-schedules")
-def get_meal_schedules(db: Session = Depends(get_db)) -> list[MealScheduleDto]:
-    logger.info("GET /meal-schedules")
-    rows = db.query(MealSchedule).all()
-    items = [meal_schedule_to_dto(r) for r in rows]
+@router.get(
+    "/meal-schedules",
+    response_model=list[MealScheduleDto],
+    response_class=FastJSONResponse,
+    responses=STREAMING_RESPONSES,
+)
+def get_meal_schedules(
+    request: Request,
+    stream: bool = Query(
+        False, description="Stream the list through a server-side cursor"
+    ),
+    db: Session = Depends(get_db),
+) -> Response:
+    logger.info("GET /meal-schedules stream=%s", stream)
+    etag = collection_etag(
+        MEAL_SCHEDULES, get_data_version(db, MEAL_SCHEDULES), request
+    )
+    if etag_matches(request, etag):
+        logger.info("GET /meal-schedules not modified etag=%s", etag)
+        return not_modified(etag)
+
+    statement = select(MealSchedule).order_by(MealSchedule.id)
+    if wants_stream(request, stream):
+        logger.info("GET /meal-schedules streaming")
+        meals = stream_rows(db, statement)
+        stream_items = (meal_schedule_to_dto(m).model_dump() for m in meals)
+        return streamed_response(request, stream_items, headers=etag_headers(etag))
+
+    items = [meal_schedule_to_dto(m).model_dump() for m in db.scalars(statement)]
     logger.info("GET /meal-schedules count=%d", len(items))
-    return items
+    return negotiated_response(request, items, headers=etag_headers(etag))
 
 
 @router.post("/meal-schedules")
@@ -71,8 +123,10 @@ def create_meal_schedule(
 
     row = MealSchedule(meal_name=meal.meal_name, base_time=time_obj)
     db.add(row)
+    bump_data_version(db, MEAL_SCHEDULES)
     db.commit()
     db.refresh(row)  # Refresh to get the latest data
+    change_feed.publish()
     logger.info("POST /meal-schedules success meal_name=%s", meal.meal_name)
     return meal_schedule_to_dto(row)
 
@@ -80,7 +134,7 @@ def create_meal_schedule(
 @router.put("/meal-schedules/{meal_name}")
 def update_meal_schedule(
     meal_name: str, meal: MealScheduleUpdate, db: Session = Depends(get_db)
-) -> MealScheduleDto:
+) -> MealScheduleWriteResponse:
     logger.info("PUT /meal-schedules/%s payload=%s", meal_name, meal.model_dump())
 
     row = db.query(MealSchedule).filter(MealSchedule.meal_name == meal_name).first()
@@ -97,10 +151,21 @@ def update_meal_schedule(
         ) from e
 
     row.base_time = time_obj
+    bump_data_version(db, MEAL_SCHEDULES)
     db.commit()
     db.refresh(row)  # Refresh to get the latest data
-    logger.info("PUT /meal-schedules/%s success", meal_name)
-    return meal_schedule_to_dto(row)
+
+    # Recompute only the schedules anchored (transitively) on this meal
+    dependency_index.ensure_loaded(db)
+    affected_doses = refresh_downstream(db, dependency_index.dependents_of_meal(row.id))
+    change_feed.publish()
+
+    logger.info(
+        "PUT /meal-schedules/%s success affected=%d", meal_name, len(affected_doses)
+    )
+    return MealScheduleWriteResponse(
+        **dict(meal_schedule_to_dto(row)), affected_doses=affected_doses
+    )
 
 
 @router.delete("/meal-schedules/{meal_name}")
@@ -116,7 +181,16 @@ def delete_meal_schedule(
 
     # Create response before deleting
     response = meal_schedule_to_dto(row)
+
+    # Schedules anchored on this meal cascade; their drug dependents lose an anchor
+    dependency_index.ensure_loaded(db)
+    affected = dependency_index.dependents_of_meal(row.id)
+
     db.delete(row)
+    # Drug schedules anchored on the meal are deleted with it
+    bump_data_version(db, MEAL_SCHEDULES, DRUGS)
     db.commit()
+    refresh_downstream(db, affected)
+    change_feed.publish()
     logger.info("DELETE /meal-schedules/%s success", meal_name)
     return response
@@ -1,13 +1,39 @@
 import logging
+from collections.abc import Callable
 from datetime import UTC, date, datetime, timedelta
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from backend.api.responses import (
+    MSGPACK_RESPONSES,
+    FastJSONResponse,
+    negotiated_response,
+)
 from backend.database import get_db
-from backend.models import DependencyType, DrugSchedule, NotificationOverride
-from backend.services.timeline_calculator import TimelineCalculator
+from backend.models import DoseEscalation, DrugORM, DrugSchedule, NotificationOverride
+from backend.services.change_feed import change_feed
+from backend.services.data_version import (
+    NOTIFICATION_OVERRIDES,
+    TIMELINE,
+    bump_data_version,
+    get_combined_version,
+)
+from backend.services.dose_events import (
+    DISMISSED,
+    SNOOZED,
+    dose_event,
+    record_dose_events,
+)
+from backend.services.dose_time_resolver import DoseTimeResolver
+from backend.services.escalations import OPEN_STATES, defer_escalation
+from backend.services.timeline_calculator import DUE_WINDOW_EARLY_SECONDS
+from backend.services.timeline_engine import get_timeline_calculator
+from backend.services.timeline_memo import timeline_memo
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -35,36 +61,130 @@ class DismissResponse(BaseModel):
     dismissed: bool = True
 
 
-@router.get("/notifications")
-def get_notifications(db: Session = Depends(get_db)) -> list[NotificationDto]:
+class EscalationDto(BaseModel):
+    schedule_id: int
+    drug_id: int
+    drug_name: str
+    dose_date: date
+    scheduled_time: datetime | None
+    state: str = Field(..., description="pending, or escalated to caregivers")
+    reminders: int = Field(..., description="Re-fires sent so far")
+    next_step_at: datetime | None
+
+
+# Response header carrying the next upcoming dose, so clients can sleep until then
+NEXT_DUE_HEADER = "X-Next-Due"
+MAX_WAIT_SECONDS = 300
+
+
+def due_notifications(
+    db: Session, load_schedules: Callable[[], list[DrugSchedule]] | None = None
+) -> tuple[list[dict[str, Any]], datetime | None]:
+    """Notifications ready now and the next due time after them.
+
+    Served from the shared timeline memo, so concurrent pollers asking the
+    same question cost one calculation per data version and time bucket.
+    On a miss, `load_schedules` can supply schedules the caller has loaded.
+    """
+    today = date.today()
+    # From the database, so writes committed by other workers count too
+    version = get_combined_version(db, TIMELINE)
+    timeline, next_due = timeline_memo.get_or_compute(
+        today,
+        version,
+        lambda: get_timeline_calculator(
+            db,
+            data_version=version,
+            schedules=load_schedules() if load_schedules is not None else None,
+        ).calculate_timeline_and_next_due(today),
+    )
+
+    # TimelineItem already has the NotificationDto fields; skip the model copy
+    notifications = [item.model_dump() for item in timeline]
+    return notifications, next_due
+
+
+def _load_notifications(
+    db: Session,
+) -> tuple[list[dict[str, Any]], datetime | None]:
+    notifications, next_due = due_notifications(db)
+    # End the transaction so a long-poll does not hold a connection
+    db.rollback()
+    return notifications, next_due
+
+
+@router.get(
+    "/notifications",
+    response_model=list[NotificationDto],
+    response_class=FastJSONResponse,
+    responses=MSGPACK_RESPONSES,
+)
+async def get_notifications(
+    request: Request,
+    wait: int = Query(
+        0,
+        ge=0,
+        le=MAX_WAIT_SECONDS,
+        description="Long-poll: seconds to hold the request while nothing is due",
+    ),
+    db: Session = Depends(get_db),
+) -> Response:
     """Return notifications that are ready to show now.
 
     This endpoint is designed for polling - it only returns notifications
-    that are due within a 5-minute window of the current time.
+    that are due within a short window of the current time. With `wait`, the
+    request is held until a dose becomes due, data changes, or the timeout
+    expires. The X-Next-Due header carries the next upcoming dose time.
     """
     logger.info("GET /notifications - checking for notifications ready now")
 
-    # Use TimelineCalculator to get notifications ready now
-    calculator = TimelineCalculator(db)
-    timeline = calculator.calculate_daily_timeline(date.today())
-
-    # Convert to NotificationDto format
-    notifications = []
-    for item in timeline:
-        notifications.append(
-            NotificationDto(
-                schedule_id=item.schedule_id,
-                drug_id=item.drug_id,
-                drug_name=item.drug_name,
-                kind=item.kind,
-                amount_per_dose=item.amount_per_dose,
-                dependency_type=item.dependency_type,
-                scheduled_time=item.scheduled_time.isoformat(),
-            )
-        )
-
+    version = change_feed.version
+    notifications, next_due = await run_in_threadpool(_load_notifications, db)
+
+    if wait and not notifications:
+        timeout = float(wait)
+        if next_due is not None:
+            # Wake when the next dose enters the due window
+            until_due = (next_due - datetime.now()).total_seconds()
+            timeout = min(timeout, max(0.0, until_due - DUE_WINDOW_EARLY_SECONDS))
+        changed = await change_feed.wait_for_change(version, timeout)
+        logger.info("GET /notifications long-poll woke changed=%s", changed)
+        notifications, next_due = await run_in_threadpool(_load_notifications, db)
+
+    headers: dict[str, str] = {}
+    if next_due is not None:
+        headers[NEXT_DUE_HEADER] = next_due.isoformat()
     logger.info("GET /notifications count=%d", len(notifications))
-    return notifications
+    return negotiated_response(request, notifications, headers=headers)
+
+
+@router.get("/notifications/escalations")
+def get_escalations(db: Session = Depends(get_db)) -> list[EscalationDto]:
+    """Doses that came due and are still unacknowledged, oldest first.
+
+    Unlike /notifications, this does not depend on polling inside the due
+    window, so a client that was away can still show what it missed.
+    """
+    logger.info("GET /notifications/escalations")
+    rows = db.execute(
+        select(DoseEscalation, DrugORM.name)
+        .join(DrugORM, DrugORM.id == DoseEscalation.drug_id)
+        .where(DoseEscalation.state.in_(OPEN_STATES))
+        .order_by(DoseEscalation.scheduled_time, DoseEscalation.id)
+    )
+    return [
+        EscalationDto(
+            schedule_id=escalation.schedule_id,
+            drug_id=escalation.drug_id,
+            drug_name=name,
+            dose_date=escalation.dose_date,
+            scheduled_time=escalation.scheduled_time,
+            state=escalation.state,
+            reminders=escalation.reminders,
+            next_step_at=escalation.deadline,
+        )
+        for escalation, name in rows
+    ]
 
 
 class SnoozeRequest(BaseModel):
@@ -102,58 +222,41 @@ def snooze_notification(
     if not schedule:
         logger.error("Schedule %d not found", schedule_id)
         raise HTTPException(status_code=404, detail="Schedule not found")
-    # Base time is absolute_time for now
-    if (
-        schedule.dependency_type != DependencyType.ABSOLUTE
-        or schedule.absolute_time is None
-    ):
-        raise HTTPException(
-            status_code=400,
-            detail="Snooze supported only for absolute notifications currently",
-        )
     today = date.today()
+    resolver = DoseTimeResolver(db, today)
 
     # Check if override already exists for this schedule and date
-    existing_override = (
-        db.query(NotificationOverride)
-        .filter(
-            NotificationOverride.schedule_id == schedule.id,
-            NotificationOverride.override_date == today,
-        )
-        .first()
-    )
+    existing_override = resolver.override_for(schedule.id)
 
     logger.info("Existing override check: %s", existing_override is not None)
 
     # Check if existing override is valid (not too old/stale)
     # If absolute_time was edited, overrides should have been cleared, but this is a safety check
-    if existing_override and existing_override.snoozed_until:
+    previous_snooze = existing_override.snoozed_until if existing_override else None
+    if existing_override and previous_snooze:
         # Check if the existing snooze is reasonable (not way in the past, which would indicate stale data)
         # If snoozed_until is more than 24 hours in the past, it's likely stale and we should reset
         now = datetime.now()
-        if existing_override.snoozed_until < now - timedelta(hours=24):
+        if previous_snooze < now - timedelta(hours=24):
             logger.warning(
                 "Existing override appears stale (snoozed_until=%s), resetting to original time",
-                existing_override.snoozed_until,
+                previous_snooze,
             )
             # Delete the stale override and start fresh
             db.delete(existing_override)
             existing_override = None
-            base_dt = datetime.combine(today, schedule.absolute_time)
+            base_dt = resolver.planned_time(schedule)
             logger.info(
                 "Starting from original time after clearing stale override: base_dt=%s",
                 base_dt,
             )
         else:
             # If there's already a valid snooze, add to the existing snoozed_until time
-            if existing_override.snoozed_until is None:
-                base_dt = datetime.combine(today, schedule.absolute_time)
-            else:
-                base_dt = existing_override.snoozed_until
+            base_dt = previous_snooze
             logger.info("Adding to existing snooze: base_dt=%s", base_dt)
     else:
-        # Otherwise, start from the original scheduled time
-        base_dt = datetime.combine(today, schedule.absolute_time)
+        # Otherwise, start from the resolved scheduled time
+        base_dt = resolver.planned_time(schedule)
         logger.info("Starting from original time: base_dt=%s", base_dt)
 
     # Add the new snooze minutes to the base time
@@ -177,7 +280,13 @@ def snooze_notification(
         db.add(ov)
         logger.info("Created new override in database")
 
+    record_dose_events(
+        db, [dose_event(schedule.id, schedule.drug_id, today, SNOOZED, base_dt)]
+    )
+    defer_escalation(db, schedule.id, today, snoozed_until)
+    bump_data_version(db, NOTIFICATION_OVERRIDES)
     db.commit()
+    change_feed.publish()
     logger.info(
         "Snooze saved successfully to database: schedule_id=%d, snoozed_until=%s",
         schedule_id,
@@ -204,25 +313,13 @@ def dismiss_notification(
         raise HTTPException(status_code=404, detail="Schedule not found")
 
     today = date.today()
+    resolver = DoseTimeResolver(db, today)
     # Check if override already exists for this schedule and date
-    existing_override = (
-        db.query(NotificationOverride)
-        .filter(
-            NotificationOverride.schedule_id == schedule.id,
-            NotificationOverride.override_date == today,
-        )
-        .first()
-    )
+    existing_override = resolver.override_for(schedule.id)
 
-    # Calculate the scheduled time for the notification
-    # If there's a snoozed_until, use that (it was the time shown)
-    # Otherwise, calculate from the schedule
-    if existing_override and existing_override.snoozed_until:
-        scheduled_time = existing_override.snoozed_until
-    else:
-        # Calculate using TimelineCalculator's logic
-        calculator = TimelineCalculator(db)
-        scheduled_time = calculator._calculate_drug_time(schedule, today, {})
+    # The scheduled time is the one that was shown: the snoozed time if the
+    # dose was snoozed, otherwise the resolved time from its dependency chain
+    scheduled_time = resolver.effective_time(schedule)
 
     if existing_override:
         # Update existing override to dismissed
@@ -236,7 +333,13 @@ def dismiss_notification(
         )
         db.add(ov)
 
+    record_dose_events(
+        db,
+        [dose_event(schedule.id, schedule.drug_id, today, DISMISSED, scheduled_time)],
+    )
+    bump_data_version(db, NOTIFICATION_OVERRIDES)
     db.commit()
+    change_feed.publish()
 
     # Create notification DTO
     notification = schedule_to_notification_dto(schedule, scheduled_time)
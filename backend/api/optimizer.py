@@ -0,0 +1,152 @@
+import logging
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from backend.database import get_db
+from backend.models import DependencyType, DrugSchedule, NotificationOverride
+from backend.services.change_feed import change_feed
+from backend.services.change_log import DELETE, NOTIFICATION_OVERRIDE, record_changes
+from backend.services.data_version import DRUGS, bump_data_version
+from backend.services.dependency_index import (
+    DependencyError,
+    dependency_index,
+    refresh_downstream,
+    validate_anchor,
+)
+from backend.services.dose_time_resolver import AffectedDose
+from backend.services.optimizer import (
+    DEFAULT_MAX_STEPS,
+    DrugConstraint,
+    ScheduleChange,
+    ScheduleProposal,
+    propose_schedule,
+)
+from backend.services.spacing import SpacingConflict, spacing_conflicts
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+class OptimizeRequest(BaseModel):
+    day: date | None = Field(None, description="Day to plan (default today)")
+    drug_ids: list[int] | None = Field(
+        None, description="Drugs that may move (default all); others stay put"
+    )
+    constraints: list[DrugConstraint] = Field(
+        default_factory=list, description="Food and time-window constraints per drug"
+    )
+    max_steps: int = Field(
+        DEFAULT_MAX_STEPS, ge=1, le=1_000_000, description="Search step budget"
+    )
+
+
+class ApplyRequest(BaseModel):
+    changes: list[ScheduleChange] = Field(
+        ..., min_length=1, description="Changes from a proposal"
+    )
+
+
+class ApplyResponse(BaseModel):
+    affected_doses: list[AffectedDose]
+    conflicts: list[SpacingConflict]
+
+
+@router.post("/optimizer/propose")
+def propose(
+    request: OptimizeRequest, db: Session = Depends(get_db)
+) -> ScheduleProposal:
+    """Propose dependency settings that satisfy spacing rules and constraints.
+
+    Spacing comes from /spacing-rules. The proposal moves as few doses as
+    little as possible; nothing is written until it is applied.
+    """
+    logger.info("POST /optimizer/propose payload=%s", request.model_dump())
+    proposal = propose_schedule(
+        db,
+        request.day or date.today(),
+        request.constraints,
+        request.drug_ids,
+        request.max_steps,
+    )
+    logger.info(
+        "POST /optimizer/propose feasible=%s changes=%d steps=%d",
+        proposal.feasible,
+        len(proposal.changes),
+        proposal.steps,
+    )
+    return proposal
+
+
+@router.post("/optimizer/apply")
+def apply(request: ApplyRequest, db: Session = Depends(get_db)) -> ApplyResponse:
+    """Write a proposal's changes in one transaction"""
+    logger.info("POST /optimizer/apply count=%d", len(request.changes))
+    ids = [change.schedule_id for change in request.changes]
+    schedules = {
+        s.id: s for s in db.query(DrugSchedule).filter(DrugSchedule.id.in_(ids))
+    }
+    for change in request.changes:
+        schedule = schedules.get(change.schedule_id)
+        if schedule is None:
+            logger.warning("POST /optimizer/apply not found id=%d", change.schedule_id)
+            raise HTTPException(status_code=404, detail="Drug schedule not found")
+        try:
+            schedule.dependency_type = DependencyType(change.dependency_type)
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown dependency type {change.dependency_type}",
+            ) from None
+        schedule.absolute_time = change.absolute_time
+        schedule.meal_schedule_id = change.meal_schedule_id
+        schedule.meal_timing = change.meal_timing
+        schedule.meal_offset_minutes = change.meal_offset_minutes
+        schedule.depends_on_drug_id = change.depends_on_drug_id
+        schedule.drug_offset_minutes = change.drug_offset_minutes
+    # Check the changes together on a private copy of the index; the shared
+    # one only learns about them once they are committed
+    dependency_index.ensure_loaded(db)
+    pending = dependency_index.copy()
+    for schedule in schedules.values():
+        try:
+            validate_anchor(db, schedule, pending)
+        except DependencyError as e:
+            logger.warning("POST /optimizer/apply invalid id=%d: %s", schedule.id, e)
+            raise HTTPException(status_code=400, detail=str(e)) from None
+        pending.upsert(schedule)
+
+    # Bump first: it takes the change log lock ahead of the data_versions row
+    bump_data_version(db, DRUGS)
+    # As on PUT /drug-id: snoozes and dismissals refer to the old times
+    overrides = db.query(NotificationOverride).filter(
+        NotificationOverride.schedule_id.in_(ids),
+        NotificationOverride.override_date >= date.today(),
+    )
+    record_changes(
+        db,
+        [
+            (NOTIFICATION_OVERRIDE, o.id, DELETE)
+            for o in overrides.with_entities(NotificationOverride.id)
+        ],
+    )
+    overrides.delete()
+    db.commit()
+
+    dependency_index.ensure_loaded(db)
+    affected = set(ids)
+    for schedule in schedules.values():
+        dependency_index.upsert(schedule)
+        affected |= dependency_index.dependents_of_drug(schedule.drug_id)
+    affected_doses = refresh_downstream(db, affected)
+    change_feed.publish()
+    conflicts = spacing_conflicts(db, date.today(), affected)
+
+    logger.info(
+        "POST /optimizer/apply success affected=%d conflicts=%d",
+        len(affected_doses),
+        len(conflicts),
+    )
+    return ApplyResponse(affected_doses=affected_doses, conflicts=conflicts)
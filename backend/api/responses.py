@@ -0,0 +1,178 @@
+import hashlib
+from collections.abc import Iterable, Iterator
+from datetime import date, time
+from typing import Any
+
+import msgpack
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack"}
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# OpenAPI entry for routes that negotiate MessagePack
+MSGPACK_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {"content": {MSGPACK_MEDIA_TYPE: {}}}
+}
+# ...and for collections that can also be streamed as NDJSON
+STREAMING_RESPONSES: dict[int | str, dict[str, Any]] = {
+    200: {"content": {MSGPACK_MEDIA_TYPE: {}, NDJSON_MEDIA_TYPE: {}}}
+}
+
+# Streamed rows are sent in chunks of about this many bytes
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _default(value: Any) -> Any:
+    # Dates and times are encoded as in Pydantic's JSON: ISO strings, UTC as
+    # "Z". orjson only calls this for subclasses (e.g. from test clocks)
+    if isinstance(value, date | time):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    raise TypeError(f"Type is not serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Hot read endpoints return this directly with plain dicts built from ORM
+    rows, which skips FastAPI's response-model validation and the model
+    copies. The route keeps `response_model` so the OpenAPI schema is
+    unchanged; content must already match it.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
+
+
+def encode_json(content: Any) -> bytes:
+    """JSON bytes as the fast responses render them; UTC as "Z", like Pydantic"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+class MsgPackResponse(Response):
+    """MessagePack encoding of the same content a FastJSONResponse carries"""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        packed: bytes = msgpack.packb(content, default=_default, datetime=False)
+        return packed
+
+
+def _accepts(request: Request, media_types: set[str]) -> bool:
+    for media_range in request.headers.get("accept", "").split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        if media_type.lower() in media_types:
+            return "q=0" not in params and "q=0.0" not in params
+    return False
+
+
+def wants_msgpack(request: Request) -> bool:
+    """Whether the client asked for MessagePack; JSON stays the default"""
+    return _accepts(request, _MSGPACK_MEDIA_TYPES)
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Whether the client asked for newline-delimited JSON"""
+    return _accepts(request, {NDJSON_MEDIA_TYPE})
+
+
+def wants_stream(request: Request, stream: bool) -> bool:
+    """Whether to stream a collection instead of rendering it in one piece.
+
+    NDJSON is always streamed; `stream` streams the plain JSON array.
+    MessagePack is only rendered whole.
+    """
+    return wants_ndjson(request) or (stream and not wants_msgpack(request))
+
+
+def negotiated_response(
+    request: Request, content: Any, headers: dict[str, str] | None = None
+) -> Response:
+    """Render with the encoding the request negotiated"""
+    response_class = MsgPackResponse if wants_msgpack(request) else FastJSONResponse
+    response = response_class(content, headers=headers)
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+def collection_etag(
+    name: str, version: int | str, request: Request | None = None
+) -> str:
+    """Strong ETag for a collection at a data version.
+
+    Strong ETags identify exact bytes, so each encoding gets its own tag.
+    """
+    if request is not None and wants_msgpack(request):
+        return f'"{name}-{version}-msgpack"'
+    if request is not None and wants_ndjson(request):
+        return f'"{name}-{version}-ndjson"'
+    return f'"{name}-{version}"'
+
+
+def content_digest(content: Any) -> str:
+    """Short hash of content's JSON encoding, to tag computed (unversioned) data"""
+    return hashlib.blake2b(encode_json(content), digest_size=8).hexdigest()
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already covers `etag`"""
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    # no-cache: clients may store the body but must revalidate every time
+    return {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+def streamed_response(
+    request: Request, items: Iterable[Any], headers: dict[str, str] | None = None
+) -> StreamingResponse:
+    """Encode `items` as they are produced, as NDJSON or a JSON array.
+
+    The JSON array is byte-for-byte what FastJSONResponse renders for the
+    same list, so both share an ETag.
+    """
+    if wants_ndjson(request):
+        body = chunked(encode_json(item) + b"\n" for item in items)
+        media_type = NDJSON_MEDIA_TYPE
+    else:
+        body = chunked(_json_array(items))
+        media_type = "application/json"
+    response = StreamingResponse(body, media_type=media_type, headers=headers)
+    response.headers["Vary"] = "Accept"
+    return response
+
+
+def _json_array(items: Iterable[Any]) -> Iterator[bytes]:
+    separator = b"["
+    for item in items:
+        yield separator
+        yield encode_json(item)
+        separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def chunked(pieces: Iterable[bytes]) -> Iterator[bytes]:
+    """Regroup small pieces into ~STREAM_CHUNK_SIZE chunks for streaming"""
+    # One ASGI message per row would dominate the cost of small rows
+    buffer = bytearray()
+    for piece in pieces:
+        buffer += piece
+        if len(buffer) >= STREAM_CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
@@ -0,0 +1,110 @@
+import logging
+from datetime import date, datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.database import get_db
+from backend.models import DrugORM, SpacingRule
+from backend.services.spacing import SpacingConflict, spacing_conflicts
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+
+class SpacingRuleCreate(BaseModel):
+    drug_id: int = Field(..., description="Drug ID")
+    other_drug_id: int = Field(
+        ..., description="Drug ID to keep apart from (the same ID spaces its doses)"
+    )
+    min_gap_minutes: int = Field(
+        ..., ge=1, le=24 * 60, description="Minimum minutes between their doses"
+    )
+
+
+class SpacingRuleResponse(BaseModel):
+    id: int
+    drug_id: int
+    other_drug_id: int
+    min_gap_minutes: int
+    created_at: datetime | None
+
+
+def rule_to_response(rule: SpacingRule) -> SpacingRuleResponse:
+    return SpacingRuleResponse(
+        id=rule.id,
+        drug_id=rule.drug_id,
+        other_drug_id=rule.other_drug_id,
+        min_gap_minutes=rule.min_gap_minutes,
+        created_at=rule.created_at,
+    )
+
+
+@router.post("/spacing-rules")
+def add_spacing_rule(
+    rule: SpacingRuleCreate, db: Session = Depends(get_db)
+) -> SpacingRuleResponse:
+    logger.info("POST /spacing-rules payload=%s", rule.model_dump())
+    drug_id, other_drug_id = sorted((rule.drug_id, rule.other_drug_id))
+    found = db.scalars(
+        select(DrugORM.id).where(DrugORM.id.in_((drug_id, other_drug_id)))
+    ).all()
+    if len(set(found)) != len({drug_id, other_drug_id}):
+        raise HTTPException(status_code=404, detail="Drug not found")
+    existing = db.scalars(
+        select(SpacingRule).where(
+            SpacingRule.drug_id == drug_id, SpacingRule.other_drug_id == other_drug_id
+        )
+    ).first()
+    if existing:
+        logger.warning(
+            "POST /spacing-rules duplicate drugs=%d,%d", drug_id, other_drug_id
+        )
+        raise HTTPException(status_code=400, detail="Spacing rule already exists")
+
+    spacing_rule = SpacingRule(
+        drug_id=drug_id,
+        other_drug_id=other_drug_id,
+        min_gap_minutes=rule.min_gap_minutes,
+    )
+    db.add(spacing_rule)
+    db.commit()
+    db.refresh(spacing_rule)
+    logger.info("POST /spacing-rules success id=%d", spacing_rule.id)
+    return rule_to_response(spacing_rule)
+
+
+@router.get("/spacing-rules")
+def get_spacing_rules(db: Session = Depends(get_db)) -> list[SpacingRuleResponse]:
+    logger.info("GET /spacing-rules")
+    rules = db.scalars(select(SpacingRule).order_by(SpacingRule.id))
+    return [rule_to_response(rule) for rule in rules]
+
+
+@router.get("/spacing-rules/conflicts")
+def get_spacing_conflicts(
+    day: date | None = Query(None, description="Date to check (default today)"),
+    db: Session = Depends(get_db),
+) -> list[SpacingConflict]:
+    """Doses on the date that are closer together than a rule allows"""
+    day = day or date.today()
+    conflicts = spacing_conflicts(db, day)
+    logger.info("GET /spacing-rules/conflicts day=%s count=%d", day, len(conflicts))
+    return conflicts
+
+
+@router.delete("/spacing-rules/{rule_id}")
+def delete_spacing_rule(
+    rule_id: int, db: Session = Depends(get_db)
+) -> SpacingRuleResponse:
+    logger.info("DELETE /spacing-rules/%d", rule_id)
+    rule = db.get(SpacingRule, rule_id)
+    if not rule:
+        logger.warning("DELETE /spacing-rules not found id=%d", rule_id)
+        raise HTTPException(status_code=404, detail="Spacing rule not found")
+    response = rule_to_response(rule)
+    db.delete(rule)
+    db.commit()
+    return response
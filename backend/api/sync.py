@@ -0,0 +1,182 @@
+import logging
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session, joinedload
+
+from backend.api.drug import schedule_to_dict
+from backend.api.meal import meal_schedule_to_dto
+from backend.api.responses import (
+    MSGPACK_RESPONSES,
+    FastJSONResponse,
+    negotiated_response,
+)
+from backend.database import get_db
+from backend.models import DrugSchedule, MealSchedule, NotificationOverride
+from backend.services.change_log import (
+    DELETE,
+    DRUG,
+    MEAL_SCHEDULE,
+    NOTIFICATION_OVERRIDE,
+    UPSERT,
+    Change,
+    changes_since,
+    compact_change_log,
+    compacted_seq,
+    latest_seq,
+    override_to_dict,
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+MAX_SYNC_CHANGES = 1000
+# Deletes older than this are compacted away; clients offline longer resync fully
+SYNC_LOG_RETENTION = timedelta(days=int(os.getenv("SYNC_LOG_RETENTION_DAYS", "30")))
+COMPACTION_INTERVAL_SECONDS = 3600
+
+_compaction_lock = threading.Lock()
+_last_compaction = 0.0
+
+
+class SyncChange(BaseModel):
+    entity: str = Field(..., description="drug, meal_schedule or notification_override")
+    id: int = Field(..., description="Entity id (schedule id for drugs)")
+    op: str = Field(..., description="upsert or delete")
+    seq: int = Field(..., description="Sequence number of the latest change")
+    data: dict[str, Any] | None = Field(
+        None, description="Current row for upserts, shaped like its GET resource"
+    )
+
+
+class SyncResponse(BaseModel):
+    cursor: int = Field(..., description="Pass as `since` on the next sync")
+    reset: bool = Field(
+        ..., description="Full snapshot: replace local data instead of merging"
+    )
+    has_more: bool = Field(..., description="More changes are waiting after cursor")
+    changes: list[SyncChange]
+
+
+def _load_rows(db: Session, entity: str, ids: list[int]) -> dict[int, dict[str, Any]]:
+    """Current payloads for the given ids of one entity; missing ids are gone"""
+    if entity == DRUG:
+        schedules = (
+            db.query(DrugSchedule)
+            .options(joinedload(DrugSchedule.drug))
+            .filter(DrugSchedule.id.in_(ids))
+        )
+        return {s.id: schedule_to_dict(s) for s in schedules}
+    if entity == MEAL_SCHEDULE:
+        meals = db.query(MealSchedule).filter(MealSchedule.id.in_(ids))
+        return {m.id: meal_schedule_to_dto(m).model_dump() for m in meals}
+    overrides = db.query(NotificationOverride).filter(NotificationOverride.id.in_(ids))
+    return {o.id: override_to_dict(o) for o in overrides}
+
+
+def _snapshot(db: Session, seq: int) -> list[dict[str, Any]]:
+    """Every synced row as an upsert; past days' overrides are left out"""
+    changes: list[dict[str, Any]] = []
+    schedules = db.query(DrugSchedule).options(joinedload(DrugSchedule.drug))
+    for schedule in schedules.order_by(DrugSchedule.id):
+        changes.append(
+            _change(DRUG, schedule.id, UPSERT, seq, schedule_to_dict(schedule))
+        )
+    for meal in db.query(MealSchedule).order_by(MealSchedule.id):
+        data = meal_schedule_to_dto(meal).model_dump()
+        changes.append(_change(MEAL_SCHEDULE, meal.id, UPSERT, seq, data))
+    overrides = db.query(NotificationOverride).filter(
+        NotificationOverride.override_date >= date.today()
+    )
+    for override in overrides.order_by(NotificationOverride.id):
+        data = override_to_dict(override)
+        changes.append(_change(NOTIFICATION_OVERRIDE, override.id, UPSERT, seq, data))
+    return changes
+
+
+def _change(
+    entity: str, entity_id: int, op: str, seq: int, data: dict[str, Any] | None
+) -> dict[str, Any]:
+    return {"entity": entity, "id": entity_id, "op": op, "seq": seq, "data": data}
+
+
+def _delta(db: Session, rows: list[Change]) -> list[dict[str, Any]]:
+    ids_by_entity: dict[str, list[int]] = {}
+    for row in rows:
+        if row.op == UPSERT:
+            ids_by_entity.setdefault(row.entity, []).append(row.entity_id)
+    payloads = {
+        entity: _load_rows(db, entity, ids) for entity, ids in ids_by_entity.items()
+    }
+
+    changes = []
+    for row in rows:
+        data = payloads.get(row.entity, {}).get(row.entity_id)
+        # An upserted row removed since (e.g. by a cascade) is reported deleted
+        op = UPSERT if data is not None else DELETE
+        changes.append(_change(row.entity, row.entity_id, op, row.seq, data))
+    return changes
+
+
+def _maybe_compact(db: Session) -> None:
+    """Compact the change log at most once per interval per process"""
+    global _last_compaction
+    now = time.monotonic()
+    if now - _last_compaction < COMPACTION_INTERVAL_SECONDS:
+        return
+    if not _compaction_lock.acquire(blocking=False):
+        return
+    try:
+        _last_compaction = now
+        compact_change_log(db, SYNC_LOG_RETENTION)
+        db.commit()
+    finally:
+        _compaction_lock.release()
+
+
+@router.get(
+    "/sync",
+    response_model=SyncResponse,
+    response_class=FastJSONResponse,
+    responses=MSGPACK_RESPONSES,
+)
+def sync(
+    request: Request,
+    since: int = Query(0, ge=0, description="Cursor from the previous sync; 0 = none"),
+    limit: int = Query(MAX_SYNC_CHANGES, ge=1, le=MAX_SYNC_CHANGES),
+    db: Session = Depends(get_db),
+) -> Response:
+    """Changes to drugs, meal schedules and overrides since a cursor.
+
+    Rows changed several times are returned once, in their current state.
+    A new client, or one whose cursor predates compaction, gets `reset` and
+    a full snapshot instead.
+    """
+    logger.info("GET /sync since=%d limit=%d", since, limit)
+    _maybe_compact(db)
+
+    if since == 0 or since < compacted_seq(db):
+        # Read the cursor first: the snapshot is then at least as new as it
+        cursor = latest_seq(db)
+        changes = _snapshot(db, cursor)
+        logger.info("GET /sync reset cursor=%d count=%d", cursor, len(changes))
+        return negotiated_response(
+            request,
+            {"cursor": cursor, "reset": True, "has_more": False, "changes": changes},
+        )
+
+    rows = changes_since(db, since, limit + 1)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    changes = _delta(db, rows)
+    cursor = rows[-1].seq if rows else since
+    logger.info("GET /sync cursor=%d count=%d", cursor, len(changes))
+    return negotiated_response(
+        request,
+        {"cursor": cursor, "reset": False, "has_more": has_more, "changes": changes},
+    )
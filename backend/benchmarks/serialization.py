@@ -0,0 +1,79 @@
+"""Per-item cost of GET /drug serialization, before and after the fast path.
+
+Runs on transient ORM objects; DATABASE_URL must be set for the imports, but
+no connection is made:
+
+    python -m backend.benchmarks.serialization [rows]
+"""
+
+import json
+import sys
+import time
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from datetime import time as time_of_day
+
+from pydantic import TypeAdapter
+
+from backend.api.drug import DrugResponse, schedule_to_dict, schedule_to_response
+from backend.api.responses import FastJSONResponse
+from backend.models import DependencyType, DrugORM, DrugSchedule
+
+
+def make_schedules(count: int) -> list[DrugSchedule]:
+    start = date(2025, 1, 1)
+    return [
+        DrugSchedule(
+            id=i,
+            drug=DrugORM(id=i, name=f"Drug {i}", kind="pill", amount_per_dose=1),
+            drug_id=i,
+            dependency_type=DependencyType.ABSOLUTE,
+            frequency_per_day=1,
+            start_date=start,
+            end_date=start + timedelta(days=30),
+            absolute_time=time_of_day(8 + i % 12, i % 60),
+            is_active=True,
+            created_at=datetime(2025, 1, 1, 12, 0),
+        )
+        for i in range(count)
+    ]
+
+
+def model_path(schedules: list[DrugSchedule]) -> bytes:
+    """Previous path: build models, then FastAPI re-validates and dumps them"""
+    adapter = TypeAdapter(list[DrugResponse])
+    items = [schedule_to_response(s) for s in schedules]
+    validated = adapter.validate_python(items, from_attributes=True)
+    return json.dumps(adapter.dump_python(validated, mode="json")).encode()
+
+
+def fast_path(schedules: list[DrugSchedule]) -> bytes:
+    """Plain dicts rendered by orjson"""
+    return bytes(FastJSONResponse([schedule_to_dict(s) for s in schedules]).body)
+
+
+def per_item_us(
+    fn: Callable[[list[DrugSchedule]], bytes], rows: list[DrugSchedule]
+) -> float:
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - started)
+    return best / len(rows) * 1_000_000
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rows = make_schedules(count)
+    assert json.loads(model_path(rows)) == json.loads(fast_path(rows))
+
+    before = per_item_us(model_path, rows)
+    after = per_item_us(fast_path, rows)
+    print(f"rows={count}")
+    print(f"model path: {before:.2f} us/item")
+    print(f"fast path:  {after:.2f} us/item ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
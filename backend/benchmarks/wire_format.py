@@ -0,0 +1,98 @@
+"""Payload size and encode time per endpoint, JSON vs MessagePack.
+
+Runs on transient ORM objects; DATABASE_URL must be set for the imports, but
+no connection is made:
+
+    python -m backend.benchmarks.wire_format [rows]
+"""
+
+import sys
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+import msgpack
+
+from backend.api.drug import schedule_to_dict
+from backend.api.responses import FastJSONResponse, MsgPackResponse
+from backend.benchmarks.serialization import make_schedules
+
+
+def notifications(count: int) -> list[dict[str, Any]]:
+    due = datetime(2025, 1, 1, 8, 0)
+    return [
+        {
+            "schedule_id": i,
+            "drug_id": i,
+            "drug_name": f"Drug {i}",
+            "scheduled_time": due + timedelta(seconds=i % 60),
+            "dependency_type": "absolute",
+            "amount_per_dose": 1,
+            "kind": "pill",
+        }
+        for i in range(count)
+    ]
+
+
+def drugs(count: int) -> list[dict[str, Any]]:
+    return [schedule_to_dict(s) for s in make_schedules(count)]
+
+
+def meal_schedules(count: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "id": i,
+            "meal_name": f"meal{i}",
+            "base_time": "08:00",
+            "created_at": "2025-01-01T12:00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def sync(count: int) -> dict[str, Any]:
+    changes = [
+        {"entity": "drug", "id": row["id"], "op": "upsert", "seq": i, "data": row}
+        for i, row in enumerate(drugs(count))
+    ]
+    return {"cursor": count, "reset": False, "has_more": False, "changes": changes}
+
+
+def encode_us(render: Callable[[Any], bytes], content: Any) -> float:
+    best = float("inf")
+    for _ in range(5):
+        started = time.perf_counter()
+        render(content)
+        best = min(best, time.perf_counter() - started)
+    return best * 1_000_000
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    endpoints: dict[str, Any] = {
+        "GET /notifications": notifications(count),
+        "GET /drug": drugs(count),
+        "GET /meal-schedules": meal_schedules(count),
+        "GET /sync": sync(count),
+    }
+    json_render = FastJSONResponse(None).render
+    msgpack_render = MsgPackResponse(None).render
+
+    print(f"rows={count}")
+    print(
+        f"{'endpoint':<22}{'json B':>11}{'msgpack B':>11}{'json us':>10}{'mp us':>10}"
+    )
+    for name, content in endpoints.items():
+        as_json = json_render(content)
+        packed = msgpack_render(content)
+        assert msgpack.unpackb(packed) is not None
+        print(
+            f"{name:<22}{len(as_json):>11}{len(packed):>11}"
+            f"{encode_us(json_render, content):>10.0f}"
+            f"{encode_us(msgpack_render, content):>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
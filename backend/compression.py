@@ -0,0 +1,194 @@
+import logging
+import os
+from typing import Any
+
+import anyio.to_thread
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipResponder, IdentityResponder
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import PathLike, StaticFiles
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Encodings in server preference order; an empty value disables compression
+COMPRESSION_ENCODINGS = [
+    e.strip()
+    for e in os.getenv("COMPRESSION_ENCODINGS", "br,gzip").split(",")
+    if e.strip()
+]
+# Smaller bodies (e.g. an empty notification poll) are sent as-is
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Built frontend to serve from the API process; unset to serve it separately
+FRONTEND_DIST_DIR = os.getenv("FRONTEND_DIST_DIR")
+
+# Content-hashed build output can be cached forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+# Larger chunks are compressed in a worker thread, as Starlette does for gzip
+_THREAD_MINIMUM_SIZE = 128 * 1024
+
+
+def accepted_encodings(headers: Headers) -> set[str]:
+    """Content codings the client accepts (q > 0)"""
+    accepted = set()
+    for item in headers.get("accept-encoding", "").split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if coding and "q=0" not in params and "q=0.0" not in params:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def available_encodings(encodings: list[str]) -> list[str]:
+    """Drop codings this process cannot produce"""
+    usable = []
+    for encoding in encodings:
+        if encoding == "br" and brotli is None:
+            logger.info("brotli is not installed, skipping br compression")
+        elif encoding in _EXTENSIONS:
+            usable.append(encoding)
+        else:
+            logger.warning("Unknown compression encoding %s", encoding)
+    return usable
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int) -> None:
+        super().__init__(app, minimum_size)
+        self.quality = quality
+        self._compressor: Any = None
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if len(body) >= _THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self._compress, body, more_body)
+        return self._compress(body, more_body)
+
+    def _compress(self, body: bytes, more_body: bool) -> bytes:
+        if self._compressor is None:
+            self._compressor = brotli.Compressor(quality=self.quality)
+        data: bytes = self._compressor.process(body)
+        # Flush each streamed chunk so clients can decode it as it arrives
+        tail: bytes = (
+            self._compressor.flush() if more_body else self._compressor.finish()
+        )
+        return data + tail
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding both sides support.
+
+    Bodies under `minimum_size`, responses that already carry a
+    Content-Encoding and already-compressed media types are passed through.
+    Streamed responses are compressed chunk by chunk.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        encodings: list[str] | None = None,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = GZIP_LEVEL,
+        brotli_quality: int = BROTLI_QUALITY,
+    ) -> None:
+        self.app = app
+        self.encodings = available_encodings(
+            COMPRESSION_ENCODINGS if encodings is None else encodings
+        )
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+
+        accepted = accepted_encodings(Headers(scope=scope))
+        encoding = next((e for e in self.encodings if e in accepted), None)
+        responder: ASGIApp
+        if encoding == "br":
+            responder = BrotliResponder(
+                self.app, self.minimum_size, self.brotli_quality
+            )
+        elif encoding == "gzip":
+            responder = GZipResponder(
+                self.app, self.minimum_size, compresslevel=self.gzip_level
+            )
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size)
+        await responder(scope, receive, send)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """Static files that prefer `<file>.br` / `<file>.gz` siblings.
+
+    Precompressed variants (see tools/precompress_frontend.py) are sent with
+    the original file's media type and validators. Files under `static/`
+    carry content hashes in their names and are marked immutable; everything
+    else (index.html) must be revalidated.
+    """
+
+    def __init__(self, directory: str, encodings: list[str] | None = None) -> None:
+        super().__init__(directory=directory, html=True)
+        self.root = os.path.realpath(directory)
+        # Serving a precompressed file needs no compressor library
+        self.encodings = [
+            e
+            for e in (COMPRESSION_ENCODINGS if encodings is None else encodings)
+            if e in _EXTENSIONS
+        ]
+
+    def file_response(
+        self,
+        full_path: PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if isinstance(response, FileResponse):
+            response = self._precompressed(response, str(full_path), scope)
+
+        relative = os.path.relpath(os.path.realpath(full_path), self.root)
+        immutable = relative.startswith("static" + os.sep)
+        response.headers["Cache-Control"] = (
+            IMMUTABLE_CACHE_CONTROL if immutable else "no-cache"
+        )
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    def _precompressed(
+        self, response: FileResponse, full_path: str, scope: Scope
+    ) -> FileResponse:
+        accepted = accepted_encodings(Headers(scope=scope))
+        for encoding in self.encodings:
+            if encoding not in accepted:
+                continue
+            encoded_path = full_path + _EXTENSIONS[encoding]
+            try:
+                encoded_stat = os.stat(encoded_path)
+            except OSError:
+                continue
+            encoded = FileResponse(
+                encoded_path,
+                status_code=response.status_code,
+                stat_result=encoded_stat,
+                media_type=response.media_type,
+            )
+            encoded.headers["Content-Encoding"] = encoding
+            # Keep the plain file's validators so revalidation works either way
+            encoded.headers["ETag"] = response.headers["etag"]
+            encoded.headers["Last-Modified"] = response.headers["last-modified"]
+            return encoded
+        return response
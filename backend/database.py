@@ -1,8 +1,8 @@
 import logging
 import os
-from collections.abc import Generator
+from collections.abc import Generator, Iterator
 
-from sqlalchemy import create_engine
+from sqlalchemy import Select, create_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 logger = logging.getLogger(__name__)
@@ -25,6 +25,9 @@ logger.info(
 engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_size=10, max_overflow=20)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Rows fetched per round trip when streaming a query
+STREAM_BATCH_SIZE = 500
+
 # Use DeclarativeBase for proper type checking
 # Import after other setup to avoid circular dependencies
 from sqlalchemy.orm import DeclarativeBase  # noqa: E402
@@ -47,3 +50,21 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
         logger.info("Closed PostgreSQL session")
+
+
+def stream_rows[T](
+    db: Session, statement: Select[T], batch_size: int = STREAM_BATCH_SIZE
+) -> Iterator[T]:
+    """Iterate a query through a server-side cursor in bounded memory.
+
+    Rows arrive in batches of `batch_size`; once a batch has been consumed,
+    its objects are expunged so the identity map never holds more than one
+    batch. Meant for read-only sessions: anything else in the session is
+    expunged too.
+    """
+    result = db.scalars(statement.execution_options(yield_per=batch_size))
+    for batch in result.partitions():
+        yield from batch
+        # expunge_all() would swap out the identity map the cursor loads into
+        for obj in list(db):
+            db.expunge(obj)
@@ -1,12 +1,32 @@
 import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.api.analytics import router as analytics_router
+from backend.api.dashboard import router as dashboard_router
 from backend.api.drug import router as drug_router
+from backend.api.events import router as events_router
+from backend.api.export import router as export_router
+from backend.api.inventory import router as inventory_router
 from backend.api.meal import router as meal_router
+from backend.api.notifications import NEXT_DUE_HEADER
 from backend.api.notifications import router as notifications_router
+from backend.api.optimizer import router as optimizer_router
+from backend.api.spacing import router as spacing_router
+from backend.api.sync import router as sync_router
+from backend.compression import (
+    FRONTEND_DIST_DIR,
+    CompressionMiddleware,
+    PrecompressedStaticFiles,
+)
 from backend.database import Base, engine
+from backend.services.adherence import adherence_rollup_job
+from backend.services.escalation_engine import escalation_engine
+from backend.services.outbox_worker import outbox_workers
+from backend.services.scheduler import dose_scheduler
 
 # Configure root logger
 logging.basicConfig(
@@ -15,7 +35,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="TabBuddy API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Fire due doses server-side, follow up on unacknowledged ones, and
+    # deliver both through the configured sinks
+    dose_scheduler.add_handler("escalations", escalation_engine.open)
+    dose_scheduler.add_queue("escalations", escalation_engine)
+    dose_scheduler.start()
+    outbox_workers.start()
+    adherence_rollup_job.start()
+    yield
+    adherence_rollup_job.stop()
+    outbox_workers.stop()
+    dose_scheduler.stop()
+
+
+app = FastAPI(title="TabBuddy API", version="1.0.0", lifespan=lifespan)
 
 # Create PostgreSQL tables
 try:
@@ -31,9 +67,25 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_DUE_HEADER, "ETag"],
 )
+# Outermost, so it compresses the final response
+app.add_middleware(CompressionMiddleware)
 
 app.include_router(drug_router)
 app.include_router(meal_router)
 app.include_router(notifications_router)
+app.include_router(events_router)
+app.include_router(sync_router)
+app.include_router(dashboard_router)
+app.include_router(export_router)
+app.include_router(analytics_router)
+app.include_router(spacing_router)
+app.include_router(optimizer_router)
+app.include_router(inventory_router)
+
+# Optionally serve the built frontend; mounted last so API routes take precedence
+if FRONTEND_DIST_DIR:
+    app.mount("/", PrecompressedStaticFiles(FRONTEND_DIST_DIR), name="frontend")
+    logger.info("Serving frontend from %s", FRONTEND_DIST_DIR)
 logger.info("TabBuddy API started successfully")
@@ -1,17 +1,26 @@
 import enum
 import logging
 from datetime import UTC, date, datetime, time
+from typing import Any
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
+    CheckConstraint,
     Date,
     DateTime,
     Enum,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     String,
+    Text,
     Time,
+    UniqueConstraint,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import (
     Mapped,
     mapped_column,
@@ -22,12 +31,23 @@ from sqlalchemy.orm import (
 from .database import Base
 
 __all__ = [
+    "AdherenceDaily",
     "Base",
+    "ChangeLogEntry",
+    "DataVersion",
     "DependencyType",
+    "DoseEscalation",
+    "DoseEvent",
+    "DrugInventory",
     "DrugORM",
     "DrugSchedule",
+    "IntakeEvent",
+    "MealEvent",
     "MealSchedule",
+    "NotificationOutbox",
     "NotificationOverride",
+    "ScheduledTrigger",
+    "SpacingRule",
 ]
 
 logger = logging.getLogger(__name__)
@@ -163,6 +183,10 @@ class DrugSchedule(Base):
     frequency_per_day: Mapped[int] = mapped_column(Integer, nullable=False)
     start_date: Mapped[date] = mapped_column(Date, nullable=False)
     end_date: Mapped[date | None] = mapped_column(Date, nullable=True)
+    # Recurrence (see services/recurrence.py): the schedule is active on days
+    # whose bit (day ordinal % period) is set in the mask; NULL means daily
+    recurrence_period_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    recurrence_mask: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None)
@@ -206,3 +230,259 @@ class NotificationOverride(Base):
     schedule: Mapped["DrugSchedule"] = relationship(
         "DrugSchedule", back_populates="notification_overrides"
     )
+
+
+# Minimum time between doses of two drugs (e.g. two hours apart from antacids).
+# Symmetric, so each pair is stored once with drug_id <= other_drug_id; a drug
+# paired with itself spaces its own doses.
+class SpacingRule(Base):
+    __tablename__ = "spacing_rules"
+    __table_args__ = (
+        UniqueConstraint("drug_id", "other_drug_id", name="uq_spacing_rules_pair"),
+        CheckConstraint("drug_id <= other_drug_id", name="ck_spacing_rules_order"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    drug_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("drugs.id", ondelete="CASCADE", onupdate="CASCADE"),
+        nullable=False,
+    )
+    other_drug_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("drugs.id", ondelete="CASCADE", onupdate="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    min_gap_minutes: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None)
+    )
+
+
+# Stock on hand per drug, in the units of amount_per_dose. Taken doses draw it
+# down and refresh the run-out forecast in the same transaction, so "what runs
+# out soon" is an index range scan rather than a schedule simulation.
+class DrugInventory(Base):
+    __tablename__ = "drug_inventory"
+
+    drug_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("drugs.id", ondelete="CASCADE", onupdate="CASCADE"),
+        primary_key=True,
+    )
+    on_hand: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Reorder this many days before running out
+    refill_lead_days: Mapped[int] = mapped_column(Integer, nullable=False, default=7)
+    # Average units used per day by the active schedules, and their last day
+    # (None while any of them is open-ended)
+    daily_use: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    last_day: Mapped[date | None] = mapped_column(Date, nullable=True)
+    # First day without enough stock, None if it lasts; refill_by is that
+    # minus the lead days
+    runs_out_on: Mapped[date | None] = mapped_column(Date, nullable=True, index=True)
+    refill_by: Mapped[date | None] = mapped_column(Date, nullable=True, index=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=lambda: datetime.now(UTC).replace(tzinfo=None),
+        onupdate=lambda: datetime.now(UTC).replace(tzinfo=None),
+    )
+
+
+# Actual intake of a dose, used to re-anchor drug-dependent schedules
+class IntakeEvent(Base):
+    __tablename__ = "intake_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    schedule_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("drug_schedules.id", ondelete="CASCADE", onupdate="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    event_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    taken_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None)
+    )
+
+    schedule: Mapped["DrugSchedule"] = relationship("DrugSchedule")
+
+
+# Actual meal time, used to re-anchor meal-dependent schedules
+class MealEvent(Base):
+    __tablename__ = "meal_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    meal_schedule_id: Mapped[int] = mapped_column(
+        Integer,
+        ForeignKey("meal_schedules.id", ondelete="CASCADE", onupdate="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    event_date: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    eaten_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None)
+    )
+
+    meal_schedule: Mapped["MealSchedule"] = relationship("MealSchedule")
+
+
+# Per-collection change counter, bumped in the same transaction as each write
+class DataVersion(Base):
+    __tablename__ = "data_versions"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+# Row-level change log feeding delta sync; seq orders changes across tables
+class ChangeLogEntry(Base):
+    __tablename__ = "change_log"
+    __table_args__ = (Index("ix_change_log_entity", "entity", "entity_id"),)
+
+    seq: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    entity: Mapped[str] = mapped_column(String(32), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    op: Mapped[str] = mapped_column(String(10), nullable=False)  # 'upsert' or 'delete'
+    changed_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None)
+    )
+
+
+# Append-only history of each dose: due, taken, snoozed, dismissed, missed.
+# No foreign keys, so the history outlives edited or deleted schedules.
+class DoseEvent(Base):
+    __tablename__ = "dose_events"
+    __table_args__ = (
+        Index("ix_dose_events_drug_date", "drug_id", "dose_date"),
+        # A dose becomes due, or is missed, at most once a day
+        Index(
+            "uq_dose_events_once",
+            "schedule_id",
+            "dose_date",
+            "kind",
+            unique=True,
+            postgresql_where=text("kind IN ('due', 'missed')"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    schedule_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    drug_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    dose_date: Mapped[date] = mapped_column(Date, nullable=False)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    # Naive local time the dose was due, like the resolver's times
+    scheduled_time: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    occurred_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    # occurred_at - scheduled_time, for taken doses
+    delay_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+
+# Per-drug per-day dose event counts, maintained incrementally from dose_events
+class AdherenceDaily(Base):
+    __tablename__ = "adherence_daily"
+
+    drug_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    due_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    taken_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    snoozed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    dismissed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Doses marked missed and not taken later
+    missed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Sum of taken doses' delay_seconds
+    delay_seconds_total: Mapped[int] = mapped_column(
+        BigInteger, nullable=False, default=0
+    )
+
+
+# Notifications waiting to go out through a delivery sink (webhook, email,
+# push), written in the same transaction as the dose event behind them.
+# Workers claim due rows with FOR UPDATE SKIP LOCKED, so any number of them can
+# drain the table without delivering a row twice at once.
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        UniqueConstraint(
+            "schedule_id",
+            "dose_date",
+            "kind",
+            "sink",
+            name="uq_notification_outbox_message",
+        ),
+        Index(
+            "ix_notification_outbox_pending",
+            "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    schedule_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    drug_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    dose_date: Mapped[date] = mapped_column(Date, nullable=False)
+    # Dose event kind that produced the message, or an escalation step
+    # (reminder-<n>, escalation)
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    sink: Mapped[str] = mapped_column(String(32), nullable=False)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
+    # pending -> sent, or dead once its attempts run out
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None)
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+# Armed due times of upcoming doses, kept for the scheduler's horizon only.
+# Persisted so a restart picks up where it left off; fired_at is set in the
+# same transaction as the handlers' writes, so a trigger fires once.
+class ScheduledTrigger(Base):
+    __tablename__ = "scheduled_triggers"
+    __table_args__ = (
+        UniqueConstraint("schedule_id", "dose_date", name="uq_scheduled_triggers_dose"),
+        Index(
+            "ix_scheduled_triggers_pending",
+            "fire_at",
+            postgresql_where=text("fired_at IS NULL"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    schedule_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    drug_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    dose_date: Mapped[date] = mapped_column(Date, nullable=False)
+    fire_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    fired_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+
+# Follow-up state of doses that came due: re-fired while unacknowledged,
+# escalated to caregivers, then marked missed. Only open rows carry a
+# deadline, so the escalation engine loads just the outstanding doses.
+class DoseEscalation(Base):
+    __tablename__ = "dose_escalations"
+    __table_args__ = (
+        UniqueConstraint("schedule_id", "dose_date", name="uq_dose_escalations_dose"),
+        Index(
+            "ix_dose_escalations_open",
+            "deadline",
+            postgresql_where=text("state IN ('pending', 'escalated')"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    schedule_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    drug_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    dose_date: Mapped[date] = mapped_column(Date, nullable=False)
+    scheduled_time: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # pending -> escalated -> missed, or acknowledged once taken or dismissed
+    state: Mapped[str] = mapped_column(String(16), nullable=False, default="pending")
+    reminders: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # When the next step is due; None once closed. Only ever moves later.
+    deadline: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
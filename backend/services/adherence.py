@@ -0,0 +1,225 @@
+import logging
+import os
+import threading
+from collections.abc import Callable
+from datetime import date, timedelta
+
+from sqlalchemy import DateTime, and_, cast, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+
+from backend.database import SessionLocal
+from backend.models import AdherenceDaily, DoseEvent
+from backend.services.data_version import get_data_version, set_data_version
+from backend.services.dose_events import (
+    DISMISSED,
+    DUE,
+    MISSED,
+    ONCE_INDEX_WHERE,
+    SNOOZED,
+    TAKEN,
+    WRITER_LOCK_KEY,
+)
+
+logger = logging.getLogger(__name__)
+
+# data_versions rows holding the rollup's progress
+ROLLUP_WATERMARK = "adherence_rollup"  # last dose_events id aggregated
+MISSED_THROUGH = "adherence_missed_through"  # ordinal of last day checked
+
+ADHERENCE_ROLLUP_INTERVAL_SECONDS = int(
+    os.getenv("ADHERENCE_ROLLUP_INTERVAL_SECONDS", "300")
+)
+
+_COUNT_COLUMNS = {
+    DUE: "due_count",
+    TAKEN: "taken_count",
+    SNOOZED: "snoozed_count",
+    DISMISSED: "dismissed_count",
+    MISSED: "missed_count",
+}
+
+
+def mark_missed_doses(db_session: Session, today: date) -> int:
+    """Append a missed event for each due dose of a closed day that was
+    neither taken nor dismissed. Only days not checked before are scanned."""
+    last_checked = get_data_version(db_session, MISSED_THROUGH)
+    yesterday = today - timedelta(days=1)
+    if last_checked >= yesterday.toordinal():
+        return 0
+    first_day = date.fromordinal(last_checked + 1) if last_checked else date.min
+
+    resolved = aliased(DoseEvent)
+    missed = select(
+        DoseEvent.schedule_id,
+        DoseEvent.drug_id,
+        DoseEvent.dose_date,
+        literal(MISSED),
+        DoseEvent.scheduled_time,
+        # The dose counts as missed when its day closes
+        cast(DoseEvent.dose_date + 1, DateTime),
+    ).where(
+        DoseEvent.kind == DUE,
+        DoseEvent.dose_date.between(first_day, yesterday),
+        ~select(resolved.id)
+        .where(
+            resolved.schedule_id == DoseEvent.schedule_id,
+            resolved.dose_date == DoseEvent.dose_date,
+            resolved.kind.in_((TAKEN, DISMISSED)),
+        )
+        .exists(),
+    )
+    inserted = db_session.execute(
+        pg_insert(DoseEvent)
+        .from_select(
+            [
+                "schedule_id",
+                "drug_id",
+                "dose_date",
+                "kind",
+                "scheduled_time",
+                "occurred_at",
+            ],
+            missed,
+        )
+        .on_conflict_do_nothing(
+            index_elements=[DoseEvent.schedule_id, DoseEvent.dose_date, DoseEvent.kind],
+            index_where=ONCE_INDEX_WHERE,
+        )
+        .returning(DoseEvent.id)
+    ).all()
+    set_data_version(db_session, MISSED_THROUGH, yesterday.toordinal())
+    return len(inserted)
+
+
+def rollup_adherence(db_session: Session, today: date | None = None) -> int:
+    """Fold dose events added since the last run into adherence_daily.
+
+    Marks missed doses of closed days first, then adds the new events'
+    counts to their (drug, day) rows. A dose taken after it was marked
+    missed keeps both events but counts as taken only. Returns the number
+    of events aggregated; the caller commits.
+    """
+    # Waits for in-flight event writers and blocks new ones until commit, so
+    # no event with an id below the new watermark can still appear
+    db_session.execute(
+        text("SELECT pg_advisory_xact_lock(:key)"), {"key": WRITER_LOCK_KEY}
+    )
+    missed = mark_missed_doses(db_session, today or date.today())
+
+    watermark = get_data_version(db_session, ROLLUP_WATERMARK)
+    latest = db_session.execute(select(func.max(DoseEvent.id))).scalar() or 0
+    if latest <= watermark:
+        return 0
+
+    new_events = and_(DoseEvent.id > watermark, DoseEvent.id <= latest)
+    counts = [
+        func.count().filter(DoseEvent.kind == kind).label(column)
+        for kind, column in _COUNT_COLUMNS.items()
+        if kind != MISSED
+    ]
+    # A dose's first intake takes back its missed mark, whichever run
+    # aggregated the mark, so missed_count stays "due and never taken"
+    other = aliased(DoseEvent)
+    same_dose = and_(
+        other.schedule_id == DoseEvent.schedule_id,
+        other.dose_date == DoseEvent.dose_date,
+    )
+    retracts_missed = and_(
+        DoseEvent.kind == TAKEN,
+        select(other.id).where(same_dose, other.kind == MISSED).exists(),
+        ~select(other.id)
+        .where(same_dose, other.kind == TAKEN, other.id < DoseEvent.id)
+        .exists(),
+    )
+    counts.append(
+        (
+            func.count().filter(DoseEvent.kind == MISSED)
+            - func.count().filter(retracts_missed)
+        ).label("missed_count")
+    )
+    delay = func.coalesce(
+        func.sum(DoseEvent.delay_seconds).filter(DoseEvent.kind == TAKEN), 0
+    ).label("delay_seconds_total")
+    increments = (
+        select(DoseEvent.drug_id, DoseEvent.dose_date, *counts, delay)
+        .where(new_events)
+        .group_by(DoseEvent.drug_id, DoseEvent.dose_date)
+    )
+    columns = ["drug_id", "day", *_COUNT_COLUMNS.values(), "delay_seconds_total"]
+    stmt = pg_insert(AdherenceDaily).from_select(columns, increments)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AdherenceDaily.drug_id, AdherenceDaily.day],
+        set_={
+            column: getattr(AdherenceDaily, column) + getattr(stmt.excluded, column)
+            for column in columns[2:]
+        },
+    )
+    db_session.execute(stmt)
+
+    aggregated = db_session.execute(
+        select(func.count()).select_from(DoseEvent).where(new_events)
+    ).scalar_one()
+    set_data_version(db_session, ROLLUP_WATERMARK, latest)
+    logger.info("Adherence rollup events=%d missed=%d", aggregated, missed)
+    return aggregated
+
+
+class AdherenceRollupJob:
+    """Thread running the rollup every interval, off the request paths.
+
+    The rollup blocks dose event writers while it runs, so it is kept out of
+    reads; a failed run is logged and retried at the next interval.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        interval: float = ADHERENCE_ROLLUP_INTERVAL_SECONDS,
+    ) -> None:
+        self.session_factory = session_factory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def run_once(self) -> int:
+        with self.session_factory() as db:
+            aggregated = rollup_adherence(db)
+            db.commit()
+        return aggregated
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="adherence-rollup", daemon=True
+        )
+        self._thread.start()
+        logger.info("Adherence rollup started, every %ss", self.interval)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Adherence rollup failed")
+            self._stop.wait(self.interval)
+
+
+adherence_rollup_job = AdherenceRollupJob()
+
+
+def daily_adherence(
+    db_session: Session, start: date, end: date, drug_id: int | None = None
+) -> list[AdherenceDaily]:
+    """Rolled-up rows for start <= day <= end, by day then drug"""
+    query = select(AdherenceDaily).where(AdherenceDaily.day.between(start, end))
+    if drug_id is not None:
+        query = query.where(AdherenceDaily.drug_id == drug_id)
+    query = query.order_by(AdherenceDaily.day, AdherenceDaily.drug_id)
+    return list(db_session.scalars(query))
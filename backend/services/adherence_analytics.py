@@ -0,0 +1,308 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable, Sequence
+from datetime import date, datetime
+from itertools import chain
+from typing import Any
+
+import numpy as np
+from pydantic import BaseModel, Field
+from sqlalchemy import (
+    BigInteger,
+    ColumnElement,
+    Date,
+    Integer,
+    cast,
+    func,
+    literal,
+    select,
+    type_coerce,
+    union_all,
+)
+from sqlalchemy.orm import QueryableAttribute, Session
+from sqlalchemy.sql import Select
+
+from backend.models import (
+    AdherenceDaily,
+    DataVersion,
+    DoseEvent,
+    DrugORM,
+    DrugSchedule,
+)
+from backend.services.adherence import ROLLUP_WATERMARK
+from backend.services.data_version import (
+    DRUGS,
+    TIMELINE,
+    get_combined_version,
+    get_data_version,
+)
+from backend.services.dose_events import DISMISSED, TAKEN
+from backend.services.recurrence import day_bitmap
+from backend.services.timeline_calculator import TimelineCalculator
+
+
+class DrugAdherence(BaseModel):
+    drug_id: int
+    drug_name: str
+    expected_doses: int = Field(..., description="Doses due in the range so far")
+    taken_doses: int = Field(..., description="Due doses that were taken")
+    missed_doses: int = Field(
+        ..., description="Doses of closed days neither taken nor dismissed"
+    )
+    adherence_rate: float | None = Field(
+        None, description="taken / expected; null when nothing was due"
+    )
+    average_delay_seconds: float | None = Field(
+        None, description="Mean lateness of taken doses"
+    )
+    longest_missed_streak_days: int = Field(
+        ..., description="Longest run of consecutive days with a missed dose"
+    )
+    current_missed_streak_days: int = Field(
+        ..., description="Run of days with a missed dose ending at the last closed day"
+    )
+
+
+class AdherenceReport(BaseModel):
+    start: date
+    end: date
+    drugs: list[DrugAdherence]
+
+
+class AdherenceReportCache:
+    """Small LRU of computed reports; keys carry every input's version"""
+
+    def __init__(self, max_entries: int = 64) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[Hashable, AdherenceReport] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> AdherenceReport | None:
+        with self._lock:
+            report = self._entries.get(key)
+            if report is not None:
+                self._entries.move_to_end(key)
+            return report
+
+    def put(self, key: Hashable, report: AdherenceReport) -> None:
+        with self._lock:
+            self._entries[key] = report
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+adherence_report_cache = AdherenceReportCache()
+
+
+def adherence_report(
+    db_session: Session, start: date, end: date, now: datetime | None = None
+) -> AdherenceReport:
+    """Cached per-drug adherence for start..end, from the daily rollup.
+
+    Past ranges are reused until new dose events arrive or schedules
+    change; a range covering today is also keyed on the data version and
+    the current minute, since doses keep becoming due.
+    """
+    now = now or datetime.now()
+    key: tuple[Hashable, ...] = (
+        start,
+        end,
+        db_session.execute(select(func.max(DoseEvent.id))).scalar() or 0,
+        get_data_version(db_session, DRUGS),
+    )
+    if end >= now.date():
+        key += (
+            get_combined_version(db_session, TIMELINE),
+            now.replace(second=0, microsecond=0),
+        )
+    report = adherence_report_cache.get(key)
+    if report is None:
+        report = compute_adherence(db_session, start, end, now)
+        adherence_report_cache.put(key, report)
+    return report
+
+
+def compute_adherence(
+    db_session: Session, start: date, end: date, now: datetime
+) -> AdherenceReport:
+    """Per-drug adherence as drug x day matrices.
+
+    Expected doses come from active schedules' day bitmaps (one dose per
+    schedule and active day, as the timeline resolves them); for today, only doses
+    already due in the TimelineCalculator's due index, plus dismissed ones,
+    count. Taken doses and delays come from adherence_daily plus the events
+    it has not folded in yet. Nothing loops over days or events in Python.
+    """
+    drug_rows = db_session.execute(
+        select(DrugORM.id, DrugORM.name).order_by(DrugORM.id)
+    ).all()
+    if not drug_rows:
+        return AdherenceReport(start=start, end=end, drugs=[])
+    drug_ids = np.array([row.id for row in drug_rows], dtype=np.int64)
+    n_drugs = len(drug_ids)
+    n_days = (end - start).days + 1
+    today = now.date()
+    # Days before this column are closed; later ones have nothing due yet
+    today_col = (today - start).days
+    closed_days = int(np.clip(today_col, 0, n_days))
+
+    # Plain Core rows with day offsets computed in SQL: numpy takes the
+    # columns as they are, without ORM loading or date conversions
+    connection = db_session.connection()
+
+    # Expected doses: each schedule's active days as a bitmap (date range and
+    # recurrence), unpacked into its drug's row of the matrix
+    schedules = connection.execute(
+        select(
+            DrugSchedule.drug_id,
+            DrugSchedule.start_date,
+            DrugSchedule.end_date,
+            DrugSchedule.recurrence_period_days,
+            DrugSchedule.recurrence_mask,
+        )
+        .where(DrugSchedule.is_active)
+        .where(DrugSchedule.start_date <= end)
+    ).all()
+    expected = np.zeros((n_drugs, n_days), dtype=np.int64)
+    if schedules:
+        n_bytes = (n_days + 7) // 8
+        packed = b"".join(
+            day_bitmap(first, last, period, mask, start, n_days).to_bytes(
+                n_bytes, "little"
+            )
+            for _, first, last, period, mask in schedules
+        )
+        days = np.unpackbits(
+            np.frombuffer(packed, dtype=np.uint8).reshape(-1, n_bytes),
+            axis=1,
+            count=n_days,
+            bitorder="little",
+        )
+        sched_drug = np.fromiter((row[0] for row in schedules), dtype=np.int64)
+        np.add.at(expected, np.searchsorted(drug_ids, sched_drug), days)
+    expected[:, closed_days:] = 0
+
+    taken = np.zeros((n_drugs, n_days), dtype=np.int64)
+    delay = np.zeros((n_drugs, n_days), dtype=np.int64)
+    dismissed = np.zeros((n_drugs, n_days), dtype=np.int64)
+    rollup = connection.execute(_daily_counts(start, min(end, today))).all()
+    if rollup:
+        r_drug, cols, r_taken, r_dismissed, r_delay = _int_columns(rollup, 5)
+        known = np.isin(r_drug, drug_ids)
+        rows = np.searchsorted(drug_ids, r_drug[known])
+        cols = cols[known]
+        taken[rows, cols] = r_taken[known]
+        dismissed[rows, cols] = r_dismissed[known]
+        delay[rows, cols] = r_delay[known]
+
+    if 0 <= today_col < n_days:
+        calculator = TimelineCalculator(
+            db_session, data_version=get_combined_version(db_session, TIMELINE)
+        )
+        due = calculator.due_index(today).until(now)
+        due_drugs = np.array([row.drug_id for row in due], dtype=np.int64)
+        due_drugs = due_drugs[np.isin(due_drugs, drug_ids)]
+        np.add.at(expected[:, today_col], np.searchsorted(drug_ids, due_drugs), 1)
+        expected[:, today_col] += dismissed[:, today_col]
+
+    taken_due = np.minimum(taken, expected)
+    # As in the rollup's missed marks: a dismissed dose was not missed
+    dismissed_due = np.minimum(dismissed, expected - taken_due)
+    missed = (expected - taken_due - dismissed_due)[:, :closed_days]
+    expected_total = expected.sum(axis=1)
+    taken_total = taken_due.sum(axis=1)
+    taken_all = taken.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = taken_total / expected_total
+        delays = delay.sum(axis=1) / taken_all
+    longest, current = _missed_streaks(missed > 0)
+
+    drugs = [
+        DrugAdherence(
+            drug_id=drug_id,
+            drug_name=name,
+            expected_doses=int(expected_total[i]),
+            taken_doses=int(taken_total[i]),
+            missed_doses=int(missed[i].sum()),
+            adherence_rate=float(rates[i]) if expected_total[i] else None,
+            average_delay_seconds=float(delays[i]) if taken_all[i] else None,
+            longest_missed_streak_days=int(longest[i]),
+            current_missed_streak_days=int(current[i]),
+        )
+        for i, (drug_id, name) in enumerate(drug_rows)
+    ]
+    return AdherenceReport(start=start, end=end, drugs=drugs)
+
+
+def _daily_counts(start: date, end: date) -> Select[Any]:
+    """(drug, day offset, taken, dismissed, delay) per drug and day.
+
+    adherence_daily rows plus the dose events above its watermark, in one
+    statement, so a rollup committing meanwhile is not counted twice.
+    """
+    watermark = (
+        select(func.coalesce(func.max(DataVersion.version), 0))
+        .where(DataVersion.name == ROLLUP_WATERMARK)
+        .scalar_subquery()
+    )
+    rolled = select(
+        AdherenceDaily.drug_id,
+        AdherenceDaily.day,
+        AdherenceDaily.taken_count.label("taken"),
+        AdherenceDaily.dismissed_count.label("dismissed"),
+        AdherenceDaily.delay_seconds_total.label("delay"),
+    ).where(AdherenceDaily.day.between(start, end))
+    tail = (
+        select(
+            DoseEvent.drug_id,
+            DoseEvent.dose_date,
+            func.count().filter(DoseEvent.kind == TAKEN),
+            func.count().filter(DoseEvent.kind == DISMISSED),
+            func.coalesce(
+                func.sum(DoseEvent.delay_seconds).filter(DoseEvent.kind == TAKEN), 0
+            ),
+        )
+        .where(DoseEvent.id > watermark, DoseEvent.dose_date.between(start, end))
+        .group_by(DoseEvent.drug_id, DoseEvent.dose_date)
+    )
+    counts = union_all(rolled, tail).subquery()
+    return select(
+        counts.c.drug_id,
+        _day_offset(counts.c.day, start),
+        cast(func.sum(counts.c.taken), BigInteger),
+        cast(func.sum(counts.c.dismissed), BigInteger),
+        cast(func.sum(counts.c.delay), BigInteger),
+    ).group_by(counts.c.drug_id, counts.c.day)
+
+
+def _int_columns(rows: Sequence[Sequence[int]], width: int) -> np.ndarray:
+    """Integer result rows as a (width, n) array of columns"""
+    # Flattening first: numpy reads Row objects element by element, ~100x slower
+    flat = np.fromiter(
+        chain.from_iterable(rows), dtype=np.int64, count=len(rows) * width
+    )
+    return flat.reshape(-1, width).T
+
+
+def _day_offset(
+    day: QueryableAttribute[date] | ColumnElement[date], start: date
+) -> ColumnElement[int]:
+    # date - date is a whole number of days in PostgreSQL
+    return type_coerce(day - literal(start, Date), Integer)
+
+
+def _missed_streaks(missed: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Longest and trailing run of True per row"""
+    if missed.shape[1] == 0:
+        zeros = np.zeros(missed.shape[0], dtype=np.int64)
+        return zeros, zeros
+    count = np.cumsum(missed, axis=1)
+    # Count at the last False so far; subtracting it restarts the run there
+    restart = np.maximum.accumulate(np.where(missed, 0, count), axis=1)
+    runs = count - restart
+    return runs.max(axis=1), runs[:, -1]
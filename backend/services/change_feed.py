@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+_Waiter = tuple[asyncio.AbstractEventLoop, asyncio.Future[int]]
+
+
+def _resolve(future: asyncio.Future[int], version: int) -> None:
+    if not future.done():
+        future.set_result(version)
+
+
+class ChangeFeed:
+    """In-process data version that long-polling requests can wait on.
+
+    Write paths call publish() after committing; waiting requests are parked
+    on asyncio futures and woken from whichever thread published, so an open
+    long-poll costs a future and no CPU until something changes.
+    """
+
+    def __init__(self) -> None:
+        self._version = 0
+        self._lock = threading.Lock()
+        self._waiters: list[_Waiter] = []
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def publish(self) -> int:
+        """Record that data changed and wake every waiting request"""
+        with self._lock:
+            self._version += 1
+            version = self._version
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future, version)
+            except RuntimeError:
+                # The waiter's event loop has already shut down
+                logger.debug("Skipping waiter on closed event loop")
+        return version
+
+    async def wait_for_change(self, since: int, timeout: float) -> bool:
+        """Wait until the version moves past `since`; False on timeout"""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[int] = loop.create_future()
+        entry: _Waiter = (loop, future)
+        with self._lock:
+            if self._version != since:
+                return True
+            self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(future, timeout=max(0.0, timeout))
+            return True
+        except TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,216 @@
+import logging
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+from typing import Any, NamedTuple
+
+from sqlalchemy import delete, event, func, insert, select, text
+from sqlalchemy.dialects.postgresql import distinct_on
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, UOWTransaction, aliased
+
+from backend.models import (
+    ChangeLogEntry,
+    DataVersion,
+    DrugORM,
+    DrugSchedule,
+    MealSchedule,
+    NotificationOverride,
+)
+
+logger = logging.getLogger(__name__)
+
+# Synced entities; drugs are keyed by schedule id, like the /drug resource
+DRUG = "drug"
+MEAL_SCHEDULE = "meal_schedule"
+NOTIFICATION_OVERRIDE = "notification_override"
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+# data_versions row holding the highest seq dropped by compaction
+COMPACTED_SEQ = "change_log_compacted"
+
+# Serializes change log writers, so seqs become visible in commit order and a
+# client cursor never skips a change committed late with a lower seq
+_WRITER_LOCK_KEY = 0x7AB0_5EC
+
+
+class Change(NamedTuple):
+    entity: str
+    entity_id: int
+    op: str
+    seq: int
+
+
+def lock_change_log(db_session: Session) -> None:
+    """Take the change log writer lock until the transaction ends.
+
+    Versioned writes take it before any data_versions row lock (see
+    bump_data_version), so writers that log first and bump later cannot
+    deadlock against ones that bump first. It is re-entrant.
+    """
+    db_session.connection().execute(
+        text("SELECT pg_advisory_xact_lock(:key)"), {"key": _WRITER_LOCK_KEY}
+    )
+
+
+def record_changes(
+    db_session: Session, changes: Iterable[tuple[str, int, str]]
+) -> None:
+    """Append (entity, id, op) entries in the caller's transaction"""
+    rows = [
+        {"entity": entity, "entity_id": entity_id, "op": op}
+        for entity, entity_id, op in changes
+    ]
+    if not rows:
+        return
+    lock_change_log(db_session)
+    db_session.connection().execute(insert(ChangeLogEntry), rows)
+
+
+def _entity_key(obj: object) -> tuple[str, int] | None:
+    if isinstance(obj, DrugSchedule):
+        return DRUG, obj.id
+    if isinstance(obj, MealSchedule):
+        return MEAL_SCHEDULE, obj.id
+    if isinstance(obj, NotificationOverride):
+        return NOTIFICATION_OVERRIDE, obj.id
+    return None
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flush(session: Session, flush_context: UOWTransaction) -> None:
+    """Log every ORM insert, update and delete of a synced entity.
+
+    ORM cascades (a drug's schedules, a schedule's overrides) show up here as
+    their own deletes. Bulk Query.delete() bypasses the ORM and must be
+    recorded by the caller with record_changes().
+    """
+    changes: list[tuple[str, int, str]] = []
+    for obj in session.new:
+        key = _entity_key(obj)
+        if key is not None:
+            changes.append((*key, UPSERT))
+    for obj in session.dirty:
+        if not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, DrugORM):
+            # Drug fields are part of each of its schedules' payload
+            schedule_ids = session.connection().execute(
+                select(DrugSchedule.id).where(DrugSchedule.drug_id == obj.id)
+            )
+            changes.extend((DRUG, sid, UPSERT) for sid in schedule_ids.scalars())
+            continue
+        key = _entity_key(obj)
+        if key is not None:
+            changes.append((*key, UPSERT))
+    for obj in session.deleted:
+        key = _entity_key(obj)
+        if key is not None:
+            changes.append((*key, DELETE))
+    record_changes(session, changes)
+
+
+def latest_seq(db_session: Session) -> int:
+    return db_session.execute(select(func.max(ChangeLogEntry.seq))).scalar() or 0
+
+
+def compacted_seq(db_session: Session) -> int:
+    """Cursors at or below this may have missed purged deletes"""
+    return (
+        db_session.execute(
+            select(DataVersion.version).where(DataVersion.name == COMPACTED_SEQ)
+        ).scalar()
+        or 0
+    )
+
+
+def changes_since(db_session: Session, since: int, limit: int) -> list[Change]:
+    """Latest change per entity row after `since`, oldest first.
+
+    Coalescing means a row edited many times costs one entry. Taking a prefix
+    in seq order keeps paging correct: every row whose latest change is at or
+    below the last returned seq is included.
+    """
+    latest = (
+        select(
+            ChangeLogEntry.entity,
+            ChangeLogEntry.entity_id,
+            ChangeLogEntry.op,
+            ChangeLogEntry.seq,
+        )
+        .where(ChangeLogEntry.seq > since)
+        .ext(distinct_on(ChangeLogEntry.entity, ChangeLogEntry.entity_id))
+        .order_by(
+            ChangeLogEntry.entity,
+            ChangeLogEntry.entity_id,
+            ChangeLogEntry.seq.desc(),
+        )
+        .subquery()
+    )
+    rows = db_session.execute(select(latest).order_by(latest.c.seq).limit(limit))
+    return [Change(r.entity, r.entity_id, r.op, r.seq) for r in rows]
+
+
+def compact_change_log(db_session: Session, retain: timedelta) -> int:
+    """Drop superseded entries and tombstones older than `retain`.
+
+    Superseded entries never affect what changes_since() returns. Purging old
+    deletes does, so the highest purged seq is stored as the compaction
+    watermark; clients behind it must resync from a snapshot. Returns the
+    number of entries removed; the caller commits.
+    """
+    newer = aliased(ChangeLogEntry)
+    superseded = len(
+        db_session.execute(
+            delete(ChangeLogEntry)
+            .where(
+                select(newer.seq)
+                .where(
+                    newer.entity == ChangeLogEntry.entity,
+                    newer.entity_id == ChangeLogEntry.entity_id,
+                    newer.seq > ChangeLogEntry.seq,
+                )
+                .exists()
+            )
+            .returning(ChangeLogEntry.seq)
+        ).all()
+    )
+
+    cutoff = datetime.now(UTC).replace(tzinfo=None) - retain
+    purged_seqs = (
+        db_session.execute(
+            delete(ChangeLogEntry)
+            .where(ChangeLogEntry.op == DELETE, ChangeLogEntry.changed_at < cutoff)
+            .returning(ChangeLogEntry.seq)
+        )
+        .scalars()
+        .all()
+    )
+    if purged_seqs:
+        watermark = max(purged_seqs)
+        db_session.execute(
+            pg_insert(DataVersion)
+            .values(name=COMPACTED_SEQ, version=watermark)
+            .on_conflict_do_update(
+                index_elements=[DataVersion.name],
+                set_={"version": func.greatest(DataVersion.version, watermark)},
+            )
+        )
+    removed = superseded + len(purged_seqs)
+    logger.info(
+        "Compacted change log superseded=%d tombstones=%d", superseded, len(purged_seqs)
+    )
+    return removed
+
+
+def override_to_dict(override: NotificationOverride) -> dict[str, Any]:
+    """Plain dict for a NotificationOverride in sync payloads"""
+    return {
+        "id": override.id,
+        "schedule_id": override.schedule_id,
+        "override_date": override.override_date,
+        "snoozed_until": override.snoozed_until,
+        "dismissed": override.dismissed,
+        "created_at": override.created_at,
+    }
@@ -0,0 +1,72 @@
+from collections.abc import Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from backend.models import DataVersion
+from backend.services.change_log import lock_change_log
+
+# Collection names, one counter each
+DRUGS = "drugs"
+MEAL_SCHEDULES = "meal_schedules"
+# Intake and meal events, which move the doses anchored on them
+EVENTS = "events"
+# Snoozes and dismissals
+NOTIFICATION_OVERRIDES = "notification_overrides"
+# Collections the day's dose times and due list depend on
+TIMELINE = (DRUGS, MEAL_SCHEDULES, EVENTS, NOTIFICATION_OVERRIDES)
+
+
+def bump_data_version(db_session: Session, *names: str) -> None:
+    """Increment collection versions inside the caller's transaction.
+
+    Call before committing a write, so the new version becomes visible
+    together with the data it describes.
+    """
+    # The change log lock always comes before the row locks, whether the
+    # caller flushes (and logs) before or after bumping
+    lock_change_log(db_session)
+    # Fixed order, so concurrent writers touching several counters cannot deadlock
+    for name in sorted(set(names)):
+        stmt = (
+            insert(DataVersion)
+            .values(name=name, version=1)
+            .on_conflict_do_update(
+                index_elements=[DataVersion.name],
+                set_={"version": DataVersion.version + 1},
+            )
+        )
+        db_session.execute(stmt)
+
+
+def get_data_version(db_session: Session, name: str) -> int:
+    """Current version of a collection; 0 if it was never written"""
+    version = db_session.execute(
+        select(DataVersion.version).where(DataVersion.name == name)
+    ).scalar()
+    return version or 0
+
+
+def get_combined_version(db_session: Session, names: Iterable[str]) -> int:
+    """One number that moves whenever any of the named counters is bumped.
+
+    Counters only ever grow, so their sum is a valid cache key shared by
+    every worker reading the same database.
+    """
+    version = db_session.execute(
+        select(func.sum(DataVersion.version)).where(DataVersion.name.in_(names))
+    ).scalar()
+    return int(version or 0)
+
+
+def set_data_version(db_session: Session, name: str, version: int) -> None:
+    """Store a counter outright, e.g. a background job's watermark"""
+    stmt = (
+        insert(DataVersion)
+        .values(name=name, version=version)
+        .on_conflict_do_update(
+            index_elements=[DataVersion.name], set_={"version": version}
+        )
+    )
+    db_session.execute(stmt)
@@ -0,0 +1,284 @@
+import threading
+from collections import deque
+from datetime import date
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from backend.models import DependencyType, DrugSchedule, MealSchedule
+from backend.services.dose_time_resolver import AffectedDose, refresh_resolved_times
+
+# Most drug-to-drug links allowed between a dose and its meal/absolute anchor
+MAX_CHAIN_DEPTH = 8
+
+
+class DependencyError(ValueError):
+    """A schedule's anchor would leave its dose time unresolvable"""
+
+
+class DependencyIndex:
+    """Reverse index from anchors (meals, drugs) to the schedules depending on them.
+
+    The index is built from the database on first use and then maintained
+    incrementally by the write paths, so finding the schedules affected by a
+    write costs time proportional to the affected subtree only.
+    """
+
+    def __init__(self) -> None:
+        self._loaded = False
+        self._lock = threading.Lock()
+        # anchor id -> ids of schedules anchored on it
+        self._meal_dependents: dict[int, set[int]] = {}
+        self._drug_dependents: dict[int, set[int]] = {}
+        # schedule id -> (drug_id, meal anchor, drug anchor)
+        self._schedules: dict[int, tuple[int, int | None, int | None]] = {}
+        # drug id -> ids of its schedules
+        self._drug_schedules: dict[int, set[int]] = {}
+
+    def ensure_loaded(self, db_session: Session) -> None:
+        """Build the index from the database if it has not been built yet"""
+        if self._loaded:
+            return
+        rows = db_session.query(
+            DrugSchedule.id,
+            DrugSchedule.drug_id,
+            DrugSchedule.dependency_type,
+            DrugSchedule.meal_schedule_id,
+            DrugSchedule.depends_on_drug_id,
+        ).all()
+        with self._lock:
+            # Adding a row twice is harmless if two requests race to load
+            for row in rows:
+                self._add(
+                    row.id,
+                    row.drug_id,
+                    row.dependency_type,
+                    row.meal_schedule_id,
+                    row.depends_on_drug_id,
+                )
+            self._loaded = True
+
+    def upsert(self, schedule: DrugSchedule) -> None:
+        """Record a created or updated schedule's anchors"""
+        with self._lock:
+            if not self._loaded:
+                return
+            self._remove(schedule.id)
+            self._add(
+                schedule.id,
+                schedule.drug_id,
+                schedule.dependency_type,
+                schedule.meal_schedule_id,
+                schedule.depends_on_drug_id,
+            )
+
+    def remove(self, schedule_id: int) -> None:
+        """Forget a deleted schedule"""
+        with self._lock:
+            if self._loaded:
+                self._remove(schedule_id)
+
+    def dependents_of_meal(self, meal_schedule_id: int) -> set[int]:
+        """Schedule ids transitively depending on a meal"""
+        with self._lock:
+            direct = set(self._meal_dependents.get(meal_schedule_id, ()))
+            return self._expand(direct)
+
+    def dependents_of_drug(self, drug_id: int) -> set[int]:
+        """Schedule ids transitively depending on a drug's dose"""
+        with self._lock:
+            direct = set(self._drug_dependents.get(drug_id, ()))
+            return self._expand(direct)
+
+    def check_drug_anchor(self, drug_id: int, depends_on_drug_id: int) -> None:
+        """Raise DependencyError if the link drug -> anchor drug is not allowed.
+
+        Rejects self-references, links that close a cycle and chains longer
+        than MAX_CHAIN_DEPTH. Only the anchor's chain upwards and the drug's
+        dependents downwards are walked, so checking a new drug costs the
+        length of its anchor's chain rather than a rebuild of the graph.
+        """
+        if drug_id == depends_on_drug_id:
+            raise DependencyError("A drug cannot depend on itself")
+        with self._lock:
+            depth = (
+                self._links_above(depends_on_drug_id, drug_id, frozenset())
+                + 1
+                + self._links_below(drug_id, frozenset())
+            )
+        if depth > MAX_CHAIN_DEPTH:
+            raise DependencyError(
+                f"Dependency chain would be {depth} drugs deep "
+                f"(at most {MAX_CHAIN_DEPTH})"
+            )
+
+    def copy(self) -> "DependencyIndex":
+        """Private snapshot, to check a batch of edits before they commit"""
+        snapshot = DependencyIndex()
+        with self._lock:
+            snapshot._loaded = self._loaded
+            for source, target in (
+                (self._meal_dependents, snapshot._meal_dependents),
+                (self._drug_dependents, snapshot._drug_dependents),
+                (self._drug_schedules, snapshot._drug_schedules),
+            ):
+                target.update((key, set(ids)) for key, ids in source.items())
+            snapshot._schedules.update(self._schedules)
+        return snapshot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._loaded = False
+            self._meal_dependents.clear()
+            self._drug_dependents.clear()
+            self._schedules.clear()
+            self._drug_schedules.clear()
+
+    def _add(
+        self,
+        schedule_id: int,
+        drug_id: int,
+        dependency_type: DependencyType,
+        meal_schedule_id: int | None,
+        depends_on_drug_id: int | None,
+    ) -> None:
+        meal_anchor = (
+            meal_schedule_id if dependency_type == DependencyType.MEAL else None
+        )
+        drug_anchor = (
+            depends_on_drug_id if dependency_type == DependencyType.DRUG else None
+        )
+        self._schedules[schedule_id] = (drug_id, meal_anchor, drug_anchor)
+        self._drug_schedules.setdefault(drug_id, set()).add(schedule_id)
+        if meal_anchor is not None:
+            self._meal_dependents.setdefault(meal_anchor, set()).add(schedule_id)
+        if drug_anchor is not None:
+            self._drug_dependents.setdefault(drug_anchor, set()).add(schedule_id)
+
+    def _remove(self, schedule_id: int) -> None:
+        entry = self._schedules.pop(schedule_id, None)
+        if entry is None:
+            return
+        drug_id, meal_anchor, drug_anchor = entry
+        self._drug_schedules.get(drug_id, set()).discard(schedule_id)
+        if meal_anchor is not None:
+            self._meal_dependents.get(meal_anchor, set()).discard(schedule_id)
+        if drug_anchor is not None:
+            self._drug_dependents.get(drug_anchor, set()).discard(schedule_id)
+
+    def _links_above(self, drug_id: int, dependent: int, path: frozenset[int]) -> int:
+        """Longest run of drug links from drug_id up to a non-drug anchor"""
+        if drug_id == dependent:
+            raise DependencyError("Dependency would create a cycle")
+        if drug_id in path or len(path) >= MAX_CHAIN_DEPTH:
+            # An existing cycle or an over-long chain; either way too deep
+            raise DependencyError(
+                f"Dependency chain would be more than {MAX_CHAIN_DEPTH} drugs deep"
+            )
+        path = path | {drug_id}
+        links = 0
+        for schedule_id in self._drug_schedules.get(drug_id, ()):
+            anchor = self._schedules[schedule_id][2]
+            if anchor is not None:
+                links = max(links, 1 + self._links_above(anchor, dependent, path))
+        return links
+
+    def _links_below(self, drug_id: int, path: frozenset[int]) -> int:
+        """Longest run of drug links from drug_id down to its last dependent"""
+        if drug_id in path or len(path) >= MAX_CHAIN_DEPTH:
+            raise DependencyError(
+                f"Dependency chain would be more than {MAX_CHAIN_DEPTH} drugs deep"
+            )
+        path = path | {drug_id}
+        links = 0
+        for schedule_id in self._drug_dependents.get(drug_id, ()):
+            child = self._schedules[schedule_id][0]
+            links = max(links, 1 + self._links_below(child, path))
+        return links
+
+    def _expand(self, direct: set[int]) -> set[int]:
+        """Breadth-first walk from direct dependents through drug anchors"""
+        affected = set(direct)
+        queue = deque(direct)
+        while queue:
+            entry = self._schedules.get(queue.popleft())
+            if entry is None:
+                continue
+            for child in self._drug_dependents.get(entry[0], ()):
+                if child not in affected:
+                    affected.add(child)
+                    queue.append(child)
+        return affected
+
+
+dependency_index = DependencyIndex()
+
+
+def validate_anchor(
+    db_session: Session,
+    schedule: DrugSchedule,
+    index: DependencyIndex | None = None,
+) -> None:
+    """Raise DependencyError unless the schedule's anchor resolves on its dates.
+
+    A meal anchor must exist and be active; a drug anchor must keep the
+    graph acyclic and shallow, and the anchor drug needs an active schedule
+    covering every date of this one. Call before committing the write.
+    Drug links are checked against `index`, by default the shared one.
+    """
+    if schedule.dependency_type == DependencyType.MEAL:
+        if schedule.meal_schedule_id is None:
+            raise DependencyError("Meal dependency needs a meal_schedule_id")
+        meal = db_session.get(MealSchedule, schedule.meal_schedule_id)
+        if meal is None or not meal.is_active:
+            raise DependencyError("Meal schedule not found or inactive")
+    elif schedule.dependency_type == DependencyType.DRUG:
+        anchor = schedule.depends_on_drug_id
+        if anchor is None:
+            raise DependencyError("Drug dependency needs a depends_on_drug_id")
+        if index is None:
+            index = dependency_index
+            index.ensure_loaded(db_session)
+        index.check_drug_anchor(schedule.drug_id, anchor)
+        ends_in_time = (
+            DrugSchedule.end_date.is_(None)
+            if schedule.end_date is None
+            else or_(
+                DrugSchedule.end_date.is_(None),
+                DrugSchedule.end_date >= schedule.end_date,
+            )
+        )
+        covering = db_session.scalars(
+            select(DrugSchedule.id).where(
+                DrugSchedule.drug_id == anchor,
+                DrugSchedule.is_active,
+                DrugSchedule.start_date <= schedule.start_date,
+                ends_in_time,
+            )
+        ).first()
+        if covering is None:
+            raise DependencyError(
+                "Anchor drug is not active on every date of this schedule"
+            )
+
+
+def refresh_downstream(
+    db_session: Session, schedule_ids: set[int]
+) -> list[AffectedDose]:
+    """Re-index written schedules and recompute today's times for them.
+
+    Call after the write is committed. Schedule ids that no longer exist are
+    dropped from the index; the rest are re-indexed and their cached times
+    recomputed, without touching any schedule outside the given set.
+    """
+    dependency_index.ensure_loaded(db_session)
+    if not schedule_ids:
+        return []
+    existing = (
+        db_session.query(DrugSchedule).filter(DrugSchedule.id.in_(schedule_ids)).all()
+    )
+    for schedule_id in schedule_ids:
+        dependency_index.remove(schedule_id)
+    for schedule in existing:
+        dependency_index.upsert(schedule)
+    return refresh_resolved_times(db_session, schedule_ids, date.today())
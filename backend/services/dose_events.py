@@ -0,0 +1,75 @@
+from datetime import date, datetime
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.models import DoseEvent
+from backend.services.escalations import settle_escalations
+from backend.services.inventory import consume_doses
+from backend.services.outbox import enqueue_notifications
+
+DUE = "due"
+TAKEN = "taken"
+SNOOZED = "snoozed"
+DISMISSED = "dismissed"
+MISSED = "missed"
+# Due and missed are recorded at most once per dose and day; the predicate of
+# their partial unique index (uq_dose_events_once), for ON CONFLICT
+ONCE_INDEX_WHERE = text("kind IN ('due', 'missed')")
+
+# Writers hold this lock shared until commit; the adherence rollup takes it
+# exclusively, so every event id it has passed is already committed
+WRITER_LOCK_KEY = 0x7AB0_D05E
+
+
+def dose_event(
+    schedule_id: int,
+    drug_id: int,
+    dose_date: date,
+    kind: str,
+    scheduled_time: datetime | None,
+    occurred_at: datetime | None = None,
+) -> dict[str, Any]:
+    """Row for record_dose_events(); taken doses carry their delay"""
+    occurred = occurred_at or datetime.now()
+    delay = None
+    if kind == TAKEN and scheduled_time is not None:
+        delay = int((occurred - scheduled_time).total_seconds())
+    return {
+        "schedule_id": schedule_id,
+        "drug_id": drug_id,
+        "dose_date": dose_date,
+        "kind": kind,
+        "scheduled_time": scheduled_time,
+        "occurred_at": occurred,
+        "delay_seconds": delay,
+    }
+
+
+def record_dose_events(db_session: Session, events: list[dict[str, Any]]) -> None:
+    """Append dose events in the caller's transaction with one batched insert.
+
+    Repeats of a once-a-day kind (due, missed) are dropped. Taken doses also
+    draw down their drug's inventory, due doses queue outbox messages, and
+    taken, dismissed or missed doses close their escalations.
+    """
+    if not events:
+        return
+    connection = db_session.connection()
+    connection.execute(
+        text("SELECT pg_advisory_xact_lock_shared(:key)"), {"key": WRITER_LOCK_KEY}
+    )
+    stmt = pg_insert(DoseEvent).on_conflict_do_nothing(
+        index_elements=[DoseEvent.schedule_id, DoseEvent.dose_date, DoseEvent.kind],
+        index_where=ONCE_INDEX_WHERE,
+    )
+    connection.execute(stmt, events)
+    consume_doses(
+        db_session,
+        (event["drug_id"] for event in events if event["kind"] == TAKEN),
+        date.today(),
+    )
+    enqueue_notifications(db_session, [e for e in events if e["kind"] == DUE])
+    settle_escalations(db_session, events)
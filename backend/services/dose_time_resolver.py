@@ -0,0 +1,362 @@
+import threading
+from collections.abc import Iterable
+from datetime import date as date_type
+from datetime import datetime, time, timedelta
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Query, Session
+
+from backend.models import (
+    DependencyType,
+    DrugSchedule,
+    IntakeEvent,
+    MealEvent,
+    NotificationOverride,
+)
+from backend.services.data_version import TIMELINE, get_combined_version
+from backend.services.recurrence import occurs_on, recurs_on_clause
+
+# Time used when a schedule's anchor cannot be resolved
+FALLBACK_TIME = time(9, 0)
+
+
+class AffectedDose(BaseModel):
+    """A dose whose resolved time was recomputed after a write"""
+
+    schedule_id: int
+    drug_id: int
+    drug_name: str
+    scheduled_time: datetime
+
+
+class ResolvedTimeCache:
+    """Process-wide cache of planned dose times, keyed by date and schedule id.
+
+    Each cached date remembers the data version (see TIMELINE) its times
+    were resolved at, and is dropped as soon as a lookup brings a different
+    one, so writes committed by other workers are picked up too. Within a
+    process the write paths also evict exactly the schedules they affect.
+    """
+
+    def __init__(self, max_dates: int = 3) -> None:
+        self._max_dates = max_dates
+        self._by_date: dict[date_type, tuple[int, dict[int, datetime]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, date: date_type, version: int, schedule_id: int) -> datetime | None:
+        with self._lock:
+            entry = self._by_date.get(date)
+            if entry is None:
+                return None
+            if entry[0] != version:
+                del self._by_date[date]
+                return None
+            return entry[1].get(schedule_id)
+
+    def put(
+        self, date: date_type, version: int, schedule_id: int, value: datetime
+    ) -> None:
+        with self._lock:
+            entry = self._by_date.get(date)
+            if entry is None or entry[0] != version:
+                if entry is None and len(self._by_date) >= self._max_dates:
+                    # Drop the oldest cached date
+                    del self._by_date[min(self._by_date)]
+                entry = self._by_date[date] = (version, {})
+            entry[1][schedule_id] = value
+
+    def invalidate(
+        self, schedule_ids: Iterable[int], date: date_type | None = None
+    ) -> None:
+        """Evict schedules on one date, or on every cached date if none is given"""
+        ids = set(schedule_ids)
+        with self._lock:
+            for cached_date, (_, times) in self._by_date.items():
+                if date is not None and cached_date != date:
+                    continue
+                for schedule_id in ids:
+                    times.pop(schedule_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_date.clear()
+
+
+resolved_time_cache = ResolvedTimeCache()
+
+
+class DoseTimeResolver:
+    """Resolve the time a schedule is due on a given date.
+
+    Planned times follow the schedule's dependency (absolute time, meal offset,
+    or offset from another drug's dose). Anchors use the actual time recorded
+    for the date (intake or meal event) when there is one. Drug chains are
+    resolved through their ancestors and memoized in the shared
+    ResolvedTimeCache, so each schedule is computed once per date and data
+    version.
+    The effective time additionally applies today's snooze override.
+    """
+
+    def __init__(
+        self,
+        db_session: Session,
+        date: date_type,
+        cache: ResolvedTimeCache | None = None,
+        schedules: Iterable[DrugSchedule] | None = None,
+        data_version: int | None = None,
+    ) -> None:
+        """`schedules`, if given, are already-loaded schedules (with their
+        drugs) to pick the date's active ones from instead of querying.
+        `data_version` is the TIMELINE version read before they were loaded;
+        it is read here when not given."""
+        self.db: Session = db_session
+        self.date: date_type = date
+        self.cache: ResolvedTimeCache = (
+            cache if cache is not None else resolved_time_cache
+        )
+        # Read before any schedule or event, so no time is cached under a
+        # version newer than the data it was resolved from
+        self.data_version: int = (
+            data_version
+            if data_version is not None
+            else get_combined_version(db_session, TIMELINE)
+        )
+        self._schedules: list[DrugSchedule] | None = None
+        self._schedule_by_drug: dict[int, DrugSchedule | None] = {}
+        if schedules is not None:
+            self._schedules = sorted(
+                (s for s in schedules if self._is_active(s)), key=lambda s: s.id
+            )
+            self._index_by_drug(self._schedules)
+        self._overrides: dict[int, NotificationOverride] | None = None
+        self._intakes: dict[int, datetime] | None = None
+        self._meals_eaten: dict[int, datetime] | None = None
+        self._resolving: set[int] = set()
+
+    def _active_query(self) -> Query[DrugSchedule]:
+        return self.db.query(DrugSchedule).filter(
+            DrugSchedule.start_date <= self.date,
+            (DrugSchedule.end_date >= self.date) | (DrugSchedule.end_date.is_(None)),
+            DrugSchedule.is_active,
+            recurs_on_clause(self.date),
+        )
+
+    def _is_active(self, schedule: DrugSchedule) -> bool:
+        # Python twin of _active_query()
+        return (
+            schedule.is_active
+            and schedule.start_date <= self.date
+            and (schedule.end_date is None or schedule.end_date >= self.date)
+            and occurs_on(
+                schedule.recurrence_period_days, schedule.recurrence_mask, self.date
+            )
+        )
+
+    def _index_by_drug(self, schedules: list[DrugSchedule]) -> None:
+        for schedule in schedules:
+            self._schedule_by_drug.setdefault(schedule.drug_id, schedule)
+
+    def active_schedules(self) -> list[DrugSchedule]:
+        """Schedules active on the resolver's date, ordered by id"""
+        if self._schedules is None:
+            self._schedules = self._active_query().order_by(DrugSchedule.id).all()
+            self._index_by_drug(self._schedules)
+        return self._schedules
+
+    def schedules_by_id(self, schedule_ids: Iterable[int]) -> list[DrugSchedule]:
+        """Active schedules among the given ids, ordered by id"""
+        ids = list(schedule_ids)
+        if not ids:
+            return []
+        return (
+            self._active_query()
+            .filter(DrugSchedule.id.in_(ids))
+            .order_by(DrugSchedule.id)
+            .all()
+        )
+
+    def schedule_for_drug(self, drug_id: int | None) -> DrugSchedule | None:
+        """First active schedule of a drug on the resolver's date"""
+        if drug_id is None:
+            return None
+        if drug_id not in self._schedule_by_drug:
+            if self._schedules is not None:
+                # All active schedules are loaded, so the drug has none today
+                return None
+            self._schedule_by_drug[drug_id] = (
+                self._active_query()
+                .filter(DrugSchedule.drug_id == drug_id)
+                .order_by(DrugSchedule.id)
+                .first()
+            )
+        return self._schedule_by_drug[drug_id]
+
+    def override_for(self, schedule_id: int) -> NotificationOverride | None:
+        """Latest notification override for a schedule on the resolver's date"""
+        if self._overrides is None:
+            self._overrides = {}
+            rows = (
+                self.db.query(NotificationOverride)
+                .filter(NotificationOverride.override_date == self.date)
+                .order_by(NotificationOverride.id)
+                .all()
+            )
+            for row in rows:
+                self._overrides[row.schedule_id] = row
+        return self._overrides.get(schedule_id)
+
+    def intake_time(self, schedule_id: int) -> datetime | None:
+        """Latest recorded intake of a schedule's dose on the resolver's date"""
+        if self._intakes is None:
+            self._intakes = {}
+            rows = (
+                self.db.query(IntakeEvent)
+                .filter(IntakeEvent.event_date == self.date)
+                .order_by(IntakeEvent.id)
+                .all()
+            )
+            for row in rows:
+                self._intakes[row.schedule_id] = row.taken_at
+        return self._intakes.get(schedule_id)
+
+    def meal_time(self, meal_schedule_id: int) -> datetime | None:
+        """Latest recorded time a meal was eaten on the resolver's date"""
+        if self._meals_eaten is None:
+            self._meals_eaten = {}
+            rows = (
+                self.db.query(MealEvent)
+                .filter(MealEvent.event_date == self.date)
+                .order_by(MealEvent.id)
+                .all()
+            )
+            for row in rows:
+                self._meals_eaten[row.meal_schedule_id] = row.eaten_at
+        return self._meals_eaten.get(meal_schedule_id)
+
+    def anchor_time(self, schedule: DrugSchedule) -> datetime:
+        """Time dependents of a schedule anchor on: actual intake or planned"""
+        taken_at = self.intake_time(schedule.id)
+        if taken_at is not None:
+            return taken_at
+        return self.planned_time(schedule)
+
+    def planned_time(self, schedule: DrugSchedule) -> datetime:
+        """Time the schedule is due before any snooze is applied"""
+        cached = self.cache.get(self.date, self.data_version, schedule.id)
+        if cached is not None:
+            return cached
+
+        if schedule.id in self._resolving:
+            # Dependency cycle: every schedule on the cycle uses the fallback
+            return self._fallback()
+
+        self._resolving.add(schedule.id)
+        try:
+            planned = self._compute_planned_time(schedule)
+        finally:
+            self._resolving.discard(schedule.id)
+
+        if self._is_on_cycle(schedule):
+            planned = self._fallback()
+        self.cache.put(self.date, self.data_version, schedule.id, planned)
+        return planned
+
+    def effective_time(self, schedule: DrugSchedule) -> datetime:
+        """Planned time, or the snoozed time if the dose was snoozed today"""
+        override = self.override_for(schedule.id)
+        if override is not None and override.snoozed_until is not None:
+            return override.snoozed_until
+        return self.planned_time(schedule)
+
+    def is_dismissed(self, schedule: DrugSchedule) -> bool:
+        """Whether the dose was dismissed for the resolver's date"""
+        override = self.override_for(schedule.id)
+        return override is not None and bool(override.dismissed)
+
+    def _fallback(self) -> datetime:
+        return datetime.combine(self.date, FALLBACK_TIME)
+
+    def _is_on_cycle(self, schedule: DrugSchedule) -> bool:
+        """Whether following drug dependencies from the schedule returns to it.
+
+        A recorded intake breaks the chain, since dependents anchor on it.
+        """
+        seen: set[int] = set()
+        current: DrugSchedule | None = schedule
+        while current is not None and current.dependency_type == DependencyType.DRUG:
+            if current.id in seen:
+                return False
+            seen.add(current.id)
+            current = self.schedule_for_drug(current.depends_on_drug_id)
+            if current is None or self.intake_time(current.id) is not None:
+                return False
+            if current.id == schedule.id:
+                return True
+        return False
+
+    def _compute_planned_time(self, schedule: DrugSchedule) -> datetime:
+        """Calculate time for a drug based on its dependency type"""
+
+        if schedule.dependency_type == DependencyType.ABSOLUTE:
+            # Absolute time: take at specific time
+            if schedule.absolute_time is None:
+                return self._fallback()
+            return datetime.combine(self.date, schedule.absolute_time)
+
+        elif schedule.dependency_type == DependencyType.MEAL:
+            # Meal dependency: take before/after meal
+            if schedule.meal_schedule is None or schedule.meal_offset_minutes is None:
+                return self._fallback()
+            eaten_at = self.meal_time(schedule.meal_schedule.id)
+            if eaten_at is not None:
+                base_time = eaten_at
+            else:
+                base_time = datetime.combine(
+                    self.date, schedule.meal_schedule.base_time
+                )
+
+            if schedule.meal_timing == "before":
+                return base_time - timedelta(minutes=schedule.meal_offset_minutes)
+            else:  # 'after'
+                return base_time + timedelta(minutes=schedule.meal_offset_minutes)
+
+        elif schedule.dependency_type == DependencyType.DRUG:
+            # Drug dependency: take after/before another drug's dose
+            parent = self.schedule_for_drug(schedule.depends_on_drug_id)
+            if parent is None:
+                # Parent drug has no active schedule today
+                return self._fallback()
+            base_time = self.anchor_time(parent)
+            if schedule.drug_offset_minutes is None:
+                return base_time
+            return base_time + timedelta(minutes=schedule.drug_offset_minutes)
+
+        else:  # INDEPENDENT
+            return self._fallback()
+
+
+def refresh_resolved_times(
+    db_session: Session,
+    schedule_ids: Iterable[int],
+    date: date_type,
+    only_date: bool = False,
+) -> list[AffectedDose]:
+    """Evict and recompute the resolved times of the given schedules.
+
+    Only the listed schedules are touched; ancestors outside the set are
+    served from the cache. Schedule edits evict every cached date, while
+    events for a single day pass only_date to leave other days alone.
+    Returns the recomputed doses active on the date.
+    """
+    ids = set(schedule_ids)
+    resolved_time_cache.invalidate(ids, date if only_date else None)
+    resolver = DoseTimeResolver(db_session, date)
+    return [
+        AffectedDose(
+            schedule_id=schedule.id,
+            drug_id=schedule.drug_id,
+            drug_name=schedule.drug.name,
+            scheduled_time=resolver.planned_time(schedule),
+        )
+        for schedule in resolver.schedules_by_id(ids)
+    ]
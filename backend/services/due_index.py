@@ -0,0 +1,87 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date as date_type
+from datetime import datetime, time
+from typing import NamedTuple
+
+
+class DueRow(NamedTuple):
+    """Plain-tuple form of a dose, kept until it is actually due"""
+
+    scheduled_time: datetime
+    schedule_id: int
+    drug_id: int
+    drug_name: str
+    dependency_type: str
+    amount_per_dose: int
+    kind: str
+
+
+class DueIndex:
+    """Effective dose times of one day, sorted for due-window lookups.
+
+    Times are stored as microseconds from the day's midnight in an int64
+    array, with the rows in a parallel list, so finding the doses in a window
+    is two binary searches. Rows are ordered by time, then schedule id.
+    """
+
+    def __init__(self, date: date_type, rows: list[DueRow]) -> None:
+        self.date = date
+        self._midnight = datetime.combine(date, time())
+        self._rows = sorted(rows, key=lambda r: (r.scheduled_time, r.schedule_id))
+        self._keys = array("q", (self._offset(r.scheduled_time) for r in self._rows))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def rows(self) -> list[DueRow]:
+        """Every row, in time order"""
+        return self._rows
+
+    def window(self, start: datetime, end: datetime) -> list[DueRow]:
+        """Rows with start <= scheduled_time <= end"""
+        lo = bisect_left(self._keys, self._offset(start))
+        hi = bisect_right(self._keys, self._offset(end))
+        return self._rows[lo:hi]
+
+    def until(self, moment: datetime) -> list[DueRow]:
+        """Rows with scheduled_time <= moment"""
+        return self._rows[: bisect_right(self._keys, self._offset(moment))]
+
+    def first_after(self, moment: datetime) -> datetime | None:
+        """Earliest scheduled time strictly after `moment`"""
+        i = bisect_right(self._keys, self._offset(moment))
+        return self._rows[i].scheduled_time if i < len(self._rows) else None
+
+    def _offset(self, moment: datetime) -> int:
+        # Resolved times may fall outside the day (e.g. before an early meal)
+        delta = moment - self._midnight
+        return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class DueIndexCache:
+    """Holds the latest DueIndex, valid for one date and data version"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entry: tuple[date_type, int, DueIndex] | None = None
+
+    def get(self, date: date_type, version: int) -> DueIndex | None:
+        with self._lock:
+            entry = self._entry
+        if entry is not None and entry[0] == date and entry[1] == version:
+            return entry[2]
+        return None
+
+    def put(self, version: int, index: DueIndex) -> None:
+        with self._lock:
+            self._entry = (index.date, version, index)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entry = None
+
+
+due_index_cache = DueIndexCache()
@@ -0,0 +1,177 @@
+import heapq
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from backend.models import DoseEscalation
+from backend.services.dose_events import MISSED, dose_event, record_dose_events
+from backend.services.escalations import (
+    ESCALATED,
+    ESCALATION_INTERVAL_MINUTES,
+    ESCALATION_REMINDERS,
+    OPEN_STATES,
+    PENDING,
+    open_escalations,
+)
+from backend.services.escalations import MISSED as MISSED_STATE
+from backend.services.notification_sinks import sinks
+from backend.services.outbox import enqueue_notifications
+from backend.services.scheduler import Trigger
+
+logger = logging.getLogger(__name__)
+
+# Sinks reaching caregivers; every sink is used if none of these is registered
+ESCALATION_SINKS = [
+    name.strip()
+    for name in os.getenv("ESCALATION_SINKS", "email").split(",")
+    if name.strip()
+]
+# Closed escalations are kept this long
+ESCALATION_RETENTION_DAYS = 30
+
+
+def _message(escalation: DoseEscalation, kind: str) -> dict[str, Any]:
+    """Event dict for enqueue_notifications()"""
+    return {
+        "schedule_id": escalation.schedule_id,
+        "drug_id": escalation.drug_id,
+        "dose_date": escalation.dose_date,
+        "kind": kind,
+        "scheduled_time": escalation.scheduled_time,
+    }
+
+
+class EscalationEngine:
+    """Min-heap of open escalation deadlines, run by the dose scheduler.
+
+    Each dose the scheduler fires gets an escalation. At every deadline an
+    unacknowledged dose is re-fired to all sinks; after `reminders` re-fires
+    it goes to the caregiver sinks, and one interval later it is marked
+    missed. A step costs a heap pop and push and one row update, however
+    many doses are outstanding.
+
+    Entries are never removed from the heap: one whose row was closed is
+    dropped when it pops, and one whose deadline moved later (a snooze) is
+    pushed back with the new deadline.
+    """
+
+    def __init__(
+        self,
+        interval: timedelta = timedelta(minutes=ESCALATION_INTERVAL_MINUTES),
+        reminders: int = ESCALATION_REMINDERS,
+        caregiver_sinks: list[str] = ESCALATION_SINKS,
+    ) -> None:
+        self.interval = interval
+        self.reminders = reminders
+        self.caregiver_sinks = caregiver_sinks
+        self._heap: list[tuple[datetime, int]] = []
+        self._loaded = False
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def next_deadline(self) -> datetime | None:
+        return self._heap[0][0] if self._heap else None
+
+    def reset(self) -> None:
+        self._heap = []
+        self._loaded = False
+
+    def load(self, db_session: Session, now: datetime) -> None:
+        """Rebuild the heap from the open escalations and prune old closed ones"""
+        db_session.execute(
+            delete(DoseEscalation).where(
+                DoseEscalation.state.not_in(OPEN_STATES),
+                DoseEscalation.dose_date
+                < now.date() - timedelta(days=ESCALATION_RETENTION_DAYS),
+            )
+        )
+        rows = db_session.execute(
+            select(DoseEscalation.deadline, DoseEscalation.id).where(
+                DoseEscalation.state.in_(OPEN_STATES)
+            )
+        )
+        self._heap = [(row.deadline, row.id) for row in rows]
+        heapq.heapify(self._heap)
+        self._loaded = True
+        logger.info("Escalation engine loaded %d open dose(s)", len(self._heap))
+
+    def open(self, db_session: Session, triggers: list[Trigger]) -> None:
+        """Trigger handler: start escalating the doses that just came due"""
+        entries = open_escalations(
+            db_session,
+            ((t.schedule_id, t.drug_id, t.dose_date, t.fire_at) for t in triggers),
+            self.interval,
+            datetime.now(),
+        )
+        # Otherwise the next run_due() loads them with the rest
+        if self._loaded:
+            for entry in entries:
+                heapq.heappush(self._heap, entry)
+
+    def run_due(self, db_session: Session, now: datetime) -> None:
+        """Take the next step for every escalation whose deadline has passed"""
+        if not self._loaded:
+            self.load(db_session, now)
+        due: set[int] = set()
+        while self._heap and self._heap[0][0] <= now:
+            due.add(heapq.heappop(self._heap)[1])
+        if not due:
+            return
+        rows = db_session.scalars(
+            select(DoseEscalation)
+            .where(DoseEscalation.id.in_(due), DoseEscalation.state.in_(OPEN_STATES))
+            .order_by(DoseEscalation.id)
+            .with_for_update()
+        )
+        reminders: list[dict[str, Any]] = []
+        escalated: list[dict[str, Any]] = []
+        missed: list[dict[str, Any]] = []
+        for escalation in rows:
+            if escalation.deadline is not None and escalation.deadline > now:
+                heapq.heappush(self._heap, (escalation.deadline, escalation.id))
+                continue
+            escalation.updated_at = now
+            if escalation.state == PENDING and escalation.reminders < self.reminders:
+                escalation.reminders += 1
+                reminders.append(
+                    _message(escalation, f"reminder-{escalation.reminders}")
+                )
+            elif escalation.state == PENDING:
+                escalation.state = ESCALATED
+                escalated.append(_message(escalation, "escalation"))
+            else:
+                escalation.state = MISSED_STATE
+                escalation.deadline = None
+                missed.append(
+                    dose_event(
+                        escalation.schedule_id,
+                        escalation.drug_id,
+                        escalation.dose_date,
+                        MISSED,
+                        escalation.scheduled_time,
+                        now,
+                    )
+                )
+                continue
+            escalation.deadline = now + self.interval
+            heapq.heappush(self._heap, (escalation.deadline, escalation.id))
+
+        enqueue_notifications(db_session, reminders)
+        caregivers = [name for name in self.caregiver_sinks if name in sinks]
+        enqueue_notifications(db_session, escalated, caregivers or None)
+        record_dose_events(db_session, missed)
+        if reminders or escalated or missed:
+            logger.info(
+                "Escalations: %d re-fired, %d escalated, %d missed",
+                len(reminders),
+                len(escalated),
+                len(missed),
+            )
+
+
+escalation_engine = EscalationEngine()
@@ -0,0 +1,137 @@
+import os
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.models import DoseEscalation
+
+PENDING = "pending"
+ESCALATED = "escalated"
+ACKNOWLEDGED = "acknowledged"
+MISSED = "missed"
+OPEN_STATES = (PENDING, ESCALATED)
+
+# Gap between the due notification, each re-fire, the caregiver escalation
+# and the final missed mark
+ESCALATION_INTERVAL_MINUTES = float(os.getenv("ESCALATION_INTERVAL_MINUTES", "15"))
+# Re-fires to the patient before caregivers are told
+ESCALATION_REMINDERS = int(os.getenv("ESCALATION_REMINDERS", "2"))
+
+# Dose event kinds (see dose_events) that close a dose's escalation, and the
+# state they leave it in; only an intake reopens a missed one
+TAKEN = "taken"
+CLOSING_KINDS = {TAKEN: ACKNOWLEDGED, "dismissed": ACKNOWLEDGED, "missed": MISSED}
+
+
+def open_escalations(
+    db_session: Session,
+    doses: Iterable[tuple[int, int, date, datetime]],
+    interval: timedelta,
+    now: datetime,
+) -> list[tuple[datetime, int]]:
+    """Start escalations for (schedule, drug, day, due time) doses.
+
+    A dose that already has a row (opened before, or taken early) is left
+    alone. Returns (deadline, id) of the rows inserted.
+    """
+    rows = [
+        {
+            "schedule_id": schedule_id,
+            "drug_id": drug_id,
+            "dose_date": dose_date,
+            "scheduled_time": due,
+            "state": PENDING,
+            "reminders": 0,
+            "deadline": max(due, now) + interval,
+            "updated_at": now,
+        }
+        for schedule_id, drug_id, dose_date, due in doses
+    ]
+    if not rows:
+        return []
+    inserted = db_session.execute(
+        pg_insert(DoseEscalation)
+        .values(rows)
+        .on_conflict_do_nothing(constraint="uq_dose_escalations_dose")
+        .returning(DoseEscalation.deadline, DoseEscalation.id)
+    )
+    return [(row.deadline, row.id) for row in inserted]
+
+
+def settle_escalations(db_session: Session, events: list[dict[str, Any]]) -> None:
+    """Close the escalations of taken, dismissed or missed doses.
+
+    Runs in the caller's transaction from record_dose_events(). A dose
+    without a row gets a closed one, so its due time does not open one.
+    A dose taken after it was marked missed is acknowledged after all; its
+    missed event stays in the log, and the adherence rollup takes it back.
+    The engine's heap entries for closed rows are dropped when popped.
+    """
+    now = datetime.now()
+    # Per group, one row per dose: ON CONFLICT DO UPDATE cannot touch a row
+    # twice in one statement
+    taken: dict[tuple[int, date], dict[str, Any]] = {}
+    others: dict[tuple[int, date], dict[str, Any]] = {}
+    for event in events:
+        state = CLOSING_KINDS.get(event["kind"])
+        if state is None:
+            continue
+        rows = taken if event["kind"] == TAKEN else others
+        rows[(event["schedule_id"], event["dose_date"])] = {
+            "schedule_id": event["schedule_id"],
+            "drug_id": event["drug_id"],
+            "dose_date": event["dose_date"],
+            "scheduled_time": event["scheduled_time"],
+            "state": state,
+            "reminders": 0,
+            "deadline": None,
+            "updated_at": now,
+        }
+    _close(db_session, list(others.values()), OPEN_STATES)
+    _close(db_session, list(taken.values()), (*OPEN_STATES, MISSED))
+
+
+def _close(
+    db_session: Session, rows: list[dict[str, Any]], from_states: tuple[str, ...]
+) -> None:
+    if not rows:
+        return
+    stmt = pg_insert(DoseEscalation).values(rows)
+    db_session.execute(
+        stmt.on_conflict_do_update(
+            constraint="uq_dose_escalations_dose",
+            set_={
+                "state": stmt.excluded.state,
+                "deadline": None,
+                "updated_at": stmt.excluded.updated_at,
+            },
+            where=DoseEscalation.state.in_(from_states),
+        )
+    )
+
+
+def defer_escalation(
+    db_session: Session, schedule_id: int, dose_date: date, snoozed_until: datetime
+) -> None:
+    """Hold off a snoozed dose's next step to one interval after the snooze.
+
+    Deadlines only move later, so the engine's older heap entry for the row
+    still pops first and is pushed back with the new deadline.
+    """
+    until = snoozed_until + timedelta(minutes=ESCALATION_INTERVAL_MINUTES)
+    db_session.execute(
+        update(DoseEscalation)
+        .where(
+            DoseEscalation.schedule_id == schedule_id,
+            DoseEscalation.dose_date == dose_date,
+            DoseEscalation.state.in_(OPEN_STATES),
+        )
+        .values(
+            deadline=func.greatest(DoseEscalation.deadline, until),
+            updated_at=datetime.now(),
+        )
+    )
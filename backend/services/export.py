@@ -0,0 +1,81 @@
+import enum
+from collections.abc import Iterator
+from datetime import date, time
+from typing import Any
+
+from sqlalchemy import RowMapping, Table, select
+from sqlalchemy.orm import Session
+
+from backend.database import STREAM_BATCH_SIZE, Base
+from backend.models import (
+    DoseEvent,
+    DrugInventory,
+    DrugORM,
+    DrugSchedule,
+    IntakeEvent,
+    MealEvent,
+    MealSchedule,
+    NotificationOverride,
+    SpacingRule,
+)
+
+# Exported tables, in an order that satisfies foreign keys on re-import
+EXPORT_TABLES: dict[str, Table] = {
+    model.__tablename__: Base.metadata.tables[model.__tablename__]
+    for model in (
+        DrugORM,
+        DrugInventory,
+        MealSchedule,
+        DrugSchedule,
+        NotificationOverride,
+        SpacingRule,
+        IntakeEvent,
+        MealEvent,
+        DoseEvent,
+    )
+}
+
+
+def begin_snapshot(db_session: Session) -> None:
+    """Start the session's transaction as a read-only REPEATABLE READ snapshot.
+
+    Must run before the session's first statement; every table read in the
+    transaction then sees the database as of that first statement.
+    """
+    db_session.connection(
+        execution_options={
+            "isolation_level": "REPEATABLE READ",
+            "postgresql_readonly": True,
+        }
+    )
+
+
+def export_columns(entity: str) -> list[str]:
+    return [column.name for column in EXPORT_TABLES[entity].columns]
+
+
+def export_rows(
+    db_session: Session, entity: str, batch_size: int = STREAM_BATCH_SIZE
+) -> Iterator[RowMapping]:
+    """Raw rows of one table in primary key order, through a server-side cursor.
+
+    Core rows never enter the identity map, so memory stays at one batch.
+    """
+    table = EXPORT_TABLES[entity]
+    statement = (
+        select(table)
+        .order_by(*table.primary_key.columns)
+        .execution_options(yield_per=batch_size)
+    )
+    yield from db_session.execute(statement).mappings()
+
+
+def csv_value(value: Any) -> Any:
+    """Plain CSV cell for a column value; NULL is an empty cell"""
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, date | time):
+        return value.isoformat()
+    return value
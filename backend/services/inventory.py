@@ -0,0 +1,174 @@
+from collections import Counter
+from collections.abc import Iterable
+from datetime import date, timedelta
+
+from pydantic import BaseModel
+from sqlalchemy import ColumnElement, or_, select
+from sqlalchemy.orm import Session
+
+from backend.models import DrugInventory, DrugORM, DrugSchedule
+
+DEFAULT_REFILL_LEAD_DAYS = 7
+
+
+class InventoryStatus(BaseModel):
+    drug_id: int
+    drug_name: str
+    on_hand: int
+    refill_lead_days: int
+    daily_use: float
+    runs_out_on: date | None
+    refill_by: date | None
+
+
+def forecast(
+    on_hand: int, daily_use: float, last_day: date | None, today: date
+) -> date | None:
+    """First day the stock cannot cover, or None if it lasts.
+
+    The stock covers on_hand / daily_use whole days from `today`; when every
+    schedule ends before that, it never runs out.
+    """
+    if daily_use <= 0:
+        return None
+    days = int(on_hand / daily_use)
+    if days > ((last_day or date.max) - today).days:
+        return None
+    return today + timedelta(days=days)
+
+
+def drug_usage(
+    db_session: Session, drug_id: int, today: date
+) -> tuple[float, date | None]:
+    """(units per day, last day) over the drug's current and future schedules.
+
+    A recurring schedule counts the share of its period it is active on.
+    The last day is None while any schedule is open-ended.
+    """
+    rows = db_session.execute(
+        select(
+            DrugORM.amount_per_dose,
+            DrugSchedule.end_date,
+            DrugSchedule.recurrence_period_days,
+            DrugSchedule.recurrence_mask,
+        )
+        .join(DrugSchedule.drug)
+        .where(
+            DrugSchedule.drug_id == drug_id,
+            DrugSchedule.is_active,
+            or_(DrugSchedule.end_date.is_(None), DrugSchedule.end_date >= today),
+        )
+    )
+    daily_use = 0.0
+    last_day: date | None = None
+    open_ended = False
+    for row in rows:
+        share = 1.0
+        if row.recurrence_period_days and row.recurrence_mask is not None:
+            share = row.recurrence_mask.bit_count() / row.recurrence_period_days
+        daily_use += row.amount_per_dose * share
+        if row.end_date is None:
+            open_ended = True
+        elif last_day is None or row.end_date > last_day:
+            last_day = row.end_date
+    return daily_use, None if open_ended else last_day
+
+
+def _update_forecast(inventory: DrugInventory, today: date) -> None:
+    inventory.runs_out_on = forecast(
+        inventory.on_hand, inventory.daily_use, inventory.last_day, today
+    )
+    inventory.refill_by = (
+        inventory.runs_out_on - timedelta(days=inventory.refill_lead_days)
+        if inventory.runs_out_on is not None
+        else None
+    )
+
+
+def set_stock(
+    db_session: Session,
+    drug_id: int,
+    on_hand: int,
+    refill_lead_days: int,
+    today: date,
+) -> None:
+    """Record a stock count (after a refill or recount) and forecast from it"""
+    inventory = db_session.get(DrugInventory, drug_id, with_for_update=True)
+    if inventory is None:
+        inventory = DrugInventory(drug_id=drug_id)
+        db_session.add(inventory)
+    inventory.on_hand = on_hand
+    inventory.refill_lead_days = refill_lead_days
+    inventory.daily_use, inventory.last_day = drug_usage(db_session, drug_id, today)
+    _update_forecast(inventory, today)
+
+
+def refresh_usage(db_session: Session, drug_id: int, today: date) -> None:
+    """Re-read a drug's usage after its schedules changed; no-op if untracked"""
+    # Sessions do not autoflush, and the usage query must see the edits
+    db_session.flush()
+    inventory = db_session.get(DrugInventory, drug_id, with_for_update=True)
+    if inventory is None:
+        return
+    inventory.daily_use, inventory.last_day = drug_usage(db_session, drug_id, today)
+    _update_forecast(inventory, today)
+
+
+def consume_doses(db_session: Session, drug_ids: Iterable[int], today: date) -> None:
+    """Draw down stock for taken doses, one drug id per dose.
+
+    Runs in the caller's transaction. Each drug's forecast is moved using
+    its stored daily use, so a dose costs one row update however long the
+    schedule is. Untracked drugs are skipped.
+    """
+    doses = Counter(drug_ids)
+    if not doses:
+        return
+    rows = db_session.execute(
+        select(DrugInventory, DrugORM.amount_per_dose)
+        .join(DrugORM, DrugORM.id == DrugInventory.drug_id)
+        .where(DrugInventory.drug_id.in_(doses))
+        # Lock in a fixed order so concurrent intakes cannot deadlock
+        .order_by(DrugInventory.drug_id)
+        .with_for_update(of=DrugInventory)
+    )
+    for inventory, amount_per_dose in rows:
+        used = amount_per_dose * doses[inventory.drug_id]
+        inventory.on_hand = max(inventory.on_hand - used, 0)
+        _update_forecast(inventory, today)
+
+
+def inventory_statuses(
+    db_session: Session, *criteria: ColumnElement[bool]
+) -> list[InventoryStatus]:
+    """Tracked drugs matching the criteria, soonest to run out first"""
+    rows = db_session.execute(
+        select(DrugInventory, DrugORM.name)
+        .join(DrugORM, DrugORM.id == DrugInventory.drug_id)
+        .where(*criteria)
+        .order_by(DrugInventory.runs_out_on.asc().nulls_last(), DrugInventory.drug_id)
+    )
+    return [
+        InventoryStatus(
+            drug_id=inventory.drug_id,
+            drug_name=name,
+            on_hand=inventory.on_hand,
+            refill_lead_days=inventory.refill_lead_days,
+            daily_use=inventory.daily_use,
+            runs_out_on=inventory.runs_out_on,
+            refill_by=inventory.refill_by,
+        )
+        for inventory, name in rows
+    ]
+
+
+def running_out(db_session: Session, days: int, today: date) -> list[InventoryStatus]:
+    """Drugs forecast to run out within `days` days (a range scan on its index)"""
+    return inventory_statuses(
+        db_session, DrugInventory.runs_out_on <= today + timedelta(days=days)
+    )
+
+
+def refill_alerts(db_session: Session, today: date) -> list[InventoryStatus]:
+    """Drugs whose refill-by date has come"""
+    return inventory_statuses(db_session, DrugInventory.refill_by <= today)
@@ -0,0 +1,173 @@
+import json
+import logging
+import os
+import smtplib
+import threading
+import urllib.request
+from email.message import EmailMessage
+from typing import Any, Protocol
+
+logger = logging.getLogger(__name__)
+
+SINK_TIMEOUT_SECONDS = float(os.getenv("NOTIFICATION_SINK_TIMEOUT_SECONDS", "10"))
+
+
+class NotificationSink(Protocol):
+    """Delivers one outbox message; raises if it was not accepted.
+
+    Delivery is at least once, so a message may arrive again after a crash
+    or timeout; `message_id` is stable across attempts for deduplication.
+    """
+
+    name: str
+
+    def send(self, message_id: int, payload: dict[str, Any]) -> None: ...
+
+
+def message_text(payload: dict[str, Any]) -> str:
+    """One-line reminder for a message payload"""
+    unit = "ml" if payload.get("drug_kind") == "liquid" else "pill(s)"
+    due = str(payload.get("scheduled_time") or "")[11:16]
+    dose = f"{payload['amount_per_dose']} {unit} of {payload['drug_name']}"
+    kind = str(payload.get("kind") or "")
+    if kind == "escalation":
+        text = f"Dose not taken yet: {dose}"
+    elif kind.startswith("reminder"):
+        text = f"Reminder: time to take {dose}"
+    else:
+        text = f"Time to take {dose}"
+    return f"{text} (due {due})" if due else text
+
+
+class WebhookSink:
+    """POSTs the payload as JSON, with the message id as Idempotency-Key"""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = SINK_TIMEOUT_SECONDS) -> None:
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, message_id: int, payload: dict[str, Any]) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"id": message_id, **payload}).encode(),
+            headers={
+                "Content-Type": "application/json",
+                "Idempotency-Key": str(message_id),
+            },
+            method="POST",
+        )
+        # Non-2xx answers raise HTTPError
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class PushSink:
+    """POSTs the reminder text to a push gateway topic URL (ntfy-style)"""
+
+    name = "push"
+
+    def __init__(self, url: str, timeout: float = SINK_TIMEOUT_SECONDS) -> None:
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, message_id: int, payload: dict[str, Any]) -> None:
+        request = urllib.request.Request(
+            self.url,
+            data=message_text(payload).encode(),
+            headers={"Title": "TabBuddy", "X-Message-Id": str(message_id)},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class SmtpSink:
+    """Emails the reminder text to fixed recipients (e.g. caregivers)"""
+
+    name = "email"
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        sender: str,
+        recipients: list[str],
+        username: str | None = None,
+        password: str | None = None,
+        timeout: float = SINK_TIMEOUT_SECONDS,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+
+    def send(self, message_id: int, payload: dict[str, Any]) -> None:
+        email = EmailMessage()
+        email["Subject"] = f"TabBuddy: {payload['drug_name']}"
+        email["From"] = self.sender
+        email["To"] = ", ".join(self.recipients)
+        email["X-TabBuddy-Message-Id"] = str(message_id)
+        email.set_content(message_text(payload))
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.username:
+                smtp.starttls()
+                smtp.login(self.username, self.password or "")
+            smtp.send_message(email)
+
+
+class FakeSink:
+    """Records messages in memory, failing the first `fail_times` sends"""
+
+    def __init__(self, name: str = "fake", fail_times: int = 0) -> None:
+        self.name = name
+        self.fail_times = fail_times
+        self.sent: list[tuple[int, dict[str, Any]]] = []
+        self._lock = threading.Lock()
+
+    def send(self, message_id: int, payload: dict[str, Any]) -> None:
+        with self._lock:
+            if self.fail_times > 0:
+                self.fail_times -= 1
+                raise RuntimeError("fake sink failure")
+            self.sent.append((message_id, payload))
+
+
+# Registered sinks by name; each due dose gets one outbox message per sink
+sinks: dict[str, NotificationSink] = {}
+
+
+def register_sink(sink: NotificationSink) -> None:
+    sinks[sink.name] = sink
+
+
+def configured_sinks() -> list[NotificationSink]:
+    """Sinks set up through environment variables"""
+    configured: list[NotificationSink] = []
+    if url := os.getenv("NOTIFICATION_WEBHOOK_URL"):
+        configured.append(WebhookSink(url))
+    if url := os.getenv("NOTIFICATION_PUSH_URL"):
+        configured.append(PushSink(url))
+    host = os.getenv("SMTP_HOST")
+    recipients = os.getenv("NOTIFICATION_EMAIL_TO")
+    if host and recipients:
+        configured.append(
+            SmtpSink(
+                host,
+                int(os.getenv("SMTP_PORT", "587")),
+                os.getenv("NOTIFICATION_EMAIL_FROM", "tabbuddy@localhost"),
+                [r.strip() for r in recipients.split(",") if r.strip()],
+                os.getenv("SMTP_USERNAME"),
+                os.getenv("SMTP_PASSWORD"),
+            )
+        )
+    return configured
+
+
+for _sink in configured_sinks():
+    register_sink(_sink)
+    logger.info("Notification sink enabled: %s", _sink.name)
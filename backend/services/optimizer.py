@@ -0,0 +1,517 @@
+import os
+import time as clock
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Iterable, Sequence
+from datetime import date, datetime, time, timedelta
+from heapq import heappop, heappush
+from typing import NamedTuple
+
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.models import DependencyType, MealSchedule
+from backend.services.dose_time_resolver import FALLBACK_TIME, DoseTimeResolver
+from backend.services.due_index import DueRow
+from backend.services.spacing import SpacingConflict, find_conflicts, spacing_rules
+
+# Candidate absolute times are this many minutes apart
+SLOT_MINUTES = 15
+DEFAULT_WINDOW = (time(6, 0), time(22, 0))
+# "With food" is up to 30 minutes after a meal starts; "without food" keeps
+# an hour before and two hours after every meal clear
+WITH_FOOD_MINUTES = 30
+EMPTY_STOMACH_BEFORE_MINUTES = 60
+EMPTY_STOMACH_AFTER_MINUTES = 120
+
+# Costs, in minutes of disruption: changing a dose's placement costs the
+# minutes it moves, plus an hour's worth if it changes what it is anchored on.
+# A kept placement costs nothing even if its anchor moves, and any broken
+# constraint outweighs every possible move
+ANCHOR_CHANGE_COST = 60
+VIOLATION_COST = 100_000
+
+DEFAULT_MAX_STEPS = 10_000
+# Wall-clock safety net; the step budget normally ends the search first, so
+# the same input yields the same proposal
+TIME_BUDGET_SECONDS = float(os.getenv("OPTIMIZER_TIME_BUDGET_SECONDS", "2"))
+
+_FALLBACK_MINUTE = FALLBACK_TIME.hour * 60 + FALLBACK_TIME.minute
+
+
+class Placement(NamedTuple):
+    """What a dose is anchored on; mirrors DrugSchedule's dependency columns"""
+
+    dependency_type: DependencyType
+    absolute_time: time | None = None
+    meal_schedule_id: int | None = None
+    meal_timing: str | None = None
+    meal_offset_minutes: int | None = None
+    depends_on_drug_id: int | None = None
+    drug_offset_minutes: int | None = None
+
+
+class Dose(NamedTuple):
+    """One active schedule's daily dose, as the optimizer sees it"""
+
+    schedule_id: int
+    drug_id: int
+    drug_name: str
+    placement: Placement
+    movable: bool
+
+
+class DrugConstraint(BaseModel):
+    drug_id: int = Field(..., description="Drug ID")
+    food: str | None = Field(
+        None, pattern="^(with|without)$", description="with or without food"
+    )
+    window_start: time | None = Field(None, description="Earliest preferred time")
+    window_end: time | None = Field(None, description="Latest preferred time")
+
+
+class ScheduleChange(BaseModel):
+    """New dependency settings for one schedule"""
+
+    schedule_id: int
+    drug_id: int
+    drug_name: str
+    dependency_type: str
+    absolute_time: time | None = None
+    meal_schedule_id: int | None = None
+    meal_timing: str | None = None
+    meal_offset_minutes: int | None = None
+    depends_on_drug_id: int | None = None
+    drug_offset_minutes: int | None = None
+    previous_time: datetime
+    proposed_time: datetime
+
+
+class UnmetConstraint(BaseModel):
+    schedule_id: int
+    drug_id: int
+    drug_name: str
+    constraint: str = Field(..., description="food or window")
+
+
+class ScheduleProposal(BaseModel):
+    day: date
+    feasible: bool = Field(..., description="Every constraint and spacing rule holds")
+    complete: bool = Field(
+        ..., description="The search finished; otherwise the best within budget"
+    )
+    steps: int
+    cost: int = Field(..., description="Minutes of disruption, plus violations")
+    changes: list[ScheduleChange]
+    conflicts: list[SpacingConflict]
+    unmet_constraints: list[UnmetConstraint]
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+class ScheduleOptimizer:
+    """Branch-and-bound search for a minimally disruptive feasible day.
+
+    Every dose gets a list of candidate placements: its current one, plus,
+    for movable doses, meal anchors that satisfy its food constraint and
+    absolute times every SLOT_MINUTES inside its window. Doses are assigned
+    parents first (drug chains follow their anchor), cheapest candidate
+    first, so the first descent is a greedy solution; the rest of the search
+    only keeps branches that can still beat the best so far. Spacing is
+    checked incrementally against per-drug sorted times, O(log n) per check.
+    Ties are broken by position, so results are deterministic.
+    """
+
+    def __init__(
+        self,
+        doses: Sequence[Dose],
+        meals: dict[int, time],
+        rules: Iterable[tuple[int, int, int]],
+        constraints: Iterable[DrugConstraint] = (),
+        max_steps: int = DEFAULT_MAX_STEPS,
+        time_budget: float = TIME_BUDGET_SECONDS,
+    ) -> None:
+        self.doses = list(doses)
+        self.meals = {meal_id: _minutes(t) for meal_id, t in meals.items()}
+        self.constraints = {c.drug_id: c for c in constraints}
+        self.max_steps = max_steps
+        self.time_budget = time_budget
+        self.gaps: dict[int, dict[int, int]] = {}
+        for drug_id, other_drug_id, minutes in rules:
+            self.gaps.setdefault(drug_id, {})[other_drug_id] = minutes
+            self.gaps.setdefault(other_drug_id, {})[drug_id] = minutes
+        # The resolver anchors drug chains on each drug's lowest schedule id
+        self.primary: dict[int, int] = {}
+        for i, dose in enumerate(self.doses):
+            current = self.primary.get(dose.drug_id)
+            if current is None or dose.schedule_id < self.doses[current].schedule_id:
+                self.primary[dose.drug_id] = i
+
+        # Times already assigned during the search, sorted per drug
+        self.by_drug: dict[int, list[int]] = {}
+        self.order = self._parents_first()
+        self.current = self._evaluate([d.placement for d in self.doses])
+        self.candidates = [self._candidates(i) for i in range(len(self.doses))]
+        # Cheapest any dose could possibly be, summed from each position on
+        floor = [self._floor(i) for i in self.order]
+        self.remaining_floor = [sum(floor[k:]) for k in range(len(floor) + 1)]
+
+    def solve(self, day: date) -> ScheduleProposal:
+        # The current day is the incumbent to beat
+        self.best = [d.placement for d in self.doses]
+        self.best_cost = self._violations(self.best)
+        self.steps = 0
+        self.deadline = clock.monotonic() + self.time_budget
+        self.assigned: list[Placement | None] = [None] * len(self.doses)
+        self.minutes: list[int] = [0] * len(self.doses)
+        complete = True
+        try:
+            self._search(0, 0)
+        except _BudgetExhausted:
+            complete = False
+        return self._proposal(day, complete)
+
+    def _search(self, position: int, cost: int) -> None:
+        self.steps += 1
+        if self.steps > self.max_steps or (
+            self.steps % 256 == 0 and clock.monotonic() > self.deadline
+        ):
+            raise _BudgetExhausted
+        if position == len(self.order):
+            self.best_cost = cost
+            self.best = [p for p in self.assigned if p is not None]
+            return
+        i = self.order[position]
+        drug_id = self.doses[i].drug_id
+        # Candidates come cheapest first by their cost without spacing, a lower
+        # bound; a candidate's full cost is only worked out when it comes up,
+        # and it is tried once nothing still to come can be cheaper
+        ready: list[tuple[int, int, int, Placement]] = []
+        for rank, (lower, minute, placement) in enumerate(self.candidates[i]):
+            while ready and ready[0][0] <= lower:
+                if not self._descend(position, i, cost, heappop(ready)):
+                    return
+            if cost + lower + self.remaining_floor[position + 1] >= self.best_cost:
+                return
+            step_cost = lower
+            if minute is None:
+                # Drug chains follow wherever their anchor was placed
+                minute = self._minute(placement, self.minutes, self.assigned)
+                step_cost += VIOLATION_COST * self._unmet(i, minute)
+            step_cost += VIOLATION_COST * self._spacing_violations(drug_id, minute)
+            heappush(ready, (step_cost, rank, minute, placement))
+        while ready:
+            if not self._descend(position, i, cost, heappop(ready)):
+                return
+
+    def _descend(
+        self,
+        position: int,
+        i: int,
+        cost: int,
+        option: tuple[int, int, int, Placement],
+    ) -> bool:
+        """Place dose i and search on; False once the option cannot win"""
+        step_cost, _, minute, placement = option
+        total = cost + step_cost
+        if total + self.remaining_floor[position + 1] >= self.best_cost:
+            return False
+        drug_id = self.doses[i].drug_id
+        self.assigned[i] = placement
+        self.minutes[i] = minute
+        insort(self.by_drug.setdefault(drug_id, []), minute)
+        self._search(position + 1, total)
+        self.by_drug[drug_id].remove(minute)
+        self.assigned[i] = None
+        return True
+
+    def _parents_first(self) -> list[int]:
+        """Dose indexes with drug-chain anchors before their dependents"""
+        order: list[int] = []
+        state: dict[int, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(i: int) -> None:
+            if state.get(i):
+                # Cycles are left as found; their doses use the fallback time
+                return
+            state[i] = 1
+            placement = self.doses[i].placement
+            if placement.dependency_type == DependencyType.DRUG:
+                parent = self.primary.get(placement.depends_on_drug_id or -1)
+                if parent is not None:
+                    visit(parent)
+            state[i] = 2
+            order.append(i)
+
+        for i in range(len(self.doses)):
+            visit(i)
+        return order
+
+    def _evaluate(self, placements: list[Placement]) -> list[int]:
+        """Minute of each dose with the given placements"""
+        minutes = [0] * len(placements)
+        assigned: list[Placement | None] = [None] * len(placements)
+        for i in self.order:
+            minutes[i] = self._minute(placements[i], minutes, assigned)
+            assigned[i] = placements[i]
+        return minutes
+
+    def _minute(
+        self,
+        placement: Placement,
+        minutes: list[int],
+        assigned: list[Placement | None],
+    ) -> int:
+        """Planned minute of a placement, like DoseTimeResolver.planned_time"""
+        kind = placement.dependency_type
+        if kind == DependencyType.ABSOLUTE and placement.absolute_time is not None:
+            return _minutes(placement.absolute_time)
+        if kind == DependencyType.MEAL:
+            meal = self.meals.get(placement.meal_schedule_id or -1)
+            if meal is None or placement.meal_offset_minutes is None:
+                return _FALLBACK_MINUTE
+            if placement.meal_timing == "before":
+                return meal - placement.meal_offset_minutes
+            return meal + placement.meal_offset_minutes
+        if kind == DependencyType.DRUG:
+            parent = self.primary.get(placement.depends_on_drug_id or -1)
+            if parent is None or assigned[parent] is None:
+                return _FALLBACK_MINUTE
+            return minutes[parent] + (placement.drug_offset_minutes or 0)
+        return _FALLBACK_MINUTE
+
+    def _candidates(self, i: int) -> list[tuple[int, int | None, Placement]]:
+        """(cost, minute, placement) options for a dose, cheapest first.
+
+        Costs and minutes are worked out once here, spacing aside; the
+        minute of a drug-chained placement depends on its anchor and is None.
+        """
+        dose = self.doses[i]
+        options = [(0, dose.placement)]
+        if dose.movable:
+            options.extend(self._moves(dose))
+
+        empty: list[Placement | None] = [None] * len(self.doses)
+        candidates: list[tuple[int, int | None, Placement]] = []
+        for rank, (base, placement) in enumerate(options):
+            if placement.dependency_type == DependencyType.DRUG:
+                candidates.append((base, None, placement))
+                continue
+            minute = self._minute(placement, [], empty)
+            unmet = self._unmet(i, minute)
+            if rank == 0:
+                candidates.append((VIOLATION_COST * unmet, minute, placement))
+            elif not unmet and placement != dose.placement:
+                # Only the current placement may break the constraints
+                move = abs(minute - self.current[i])
+                candidates.append((base + move, minute, placement))
+        # Stable, so ties keep the order above
+        return sorted(candidates, key=lambda candidate: candidate[0])
+
+    def _moves(self, dose: Dose) -> list[tuple[int, Placement]]:
+        """(anchor change cost, placement) alternatives for a movable dose"""
+        constraint = self.constraints.get(dose.drug_id)
+        food = constraint.food if constraint else None
+        moves = []
+        anchor_cost = (
+            0 if dose.placement.dependency_type == DependencyType.MEAL else 1
+        ) * ANCHOR_CHANGE_COST
+        offsets = {
+            "with": [("after", 0), ("after", 15), ("after", WITH_FOOD_MINUTES)],
+            "without": [
+                ("before", EMPTY_STOMACH_BEFORE_MINUTES),
+                ("after", EMPTY_STOMACH_AFTER_MINUTES),
+            ],
+        }.get(food or "", [])
+        for meal_id in sorted(self.meals):
+            for timing, offset in offsets:
+                placement = Placement(
+                    DependencyType.MEAL,
+                    meal_schedule_id=meal_id,
+                    meal_timing=timing,
+                    meal_offset_minutes=offset,
+                )
+                moves.append((anchor_cost, placement))
+
+        anchor_cost = (
+            0 if dose.placement.dependency_type == DependencyType.ABSOLUTE else 1
+        ) * ANCHOR_CHANGE_COST
+        if food == "with":
+            # Meal anchors follow later meal changes; prefer them
+            anchor_cost += ANCHOR_CHANGE_COST
+        start, end = self._window(dose.drug_id)
+        for minute in range(start + (-start) % SLOT_MINUTES, end + 1, SLOT_MINUTES):
+            placement = Placement(
+                DependencyType.ABSOLUTE, absolute_time=time(minute // 60, minute % 60)
+            )
+            moves.append((anchor_cost, placement))
+        return moves
+
+    def _floor(self, i: int) -> int:
+        """Lower bound on a dose's cost, spacing aside"""
+        return min(cost for cost, _, _ in self.candidates[i])
+
+    def _window(self, drug_id: int) -> tuple[int, int]:
+        start, end = DEFAULT_WINDOW
+        constraint = self.constraints.get(drug_id)
+        if constraint is not None:
+            start = constraint.window_start or start
+            end = constraint.window_end or end
+        return _minutes(start), _minutes(end)
+
+    def _unmet(self, i: int, minute: int) -> int:
+        return len(self._unmet_constraints(i, minute))
+
+    def _unmet_constraints(self, i: int, minute: int) -> list[str]:
+        drug_id = self.doses[i].drug_id
+        constraint = self.constraints.get(drug_id)
+        if constraint is None:
+            return []
+        unmet = []
+        if constraint.window_start or constraint.window_end:
+            start, end = self._window(drug_id)
+            if not start <= minute <= end:
+                unmet.append("window")
+        if constraint.food == "with" and not any(
+            meal <= minute <= meal + WITH_FOOD_MINUTES for meal in self.meals.values()
+        ):
+            unmet.append("food")
+        if constraint.food == "without" and any(
+            meal - EMPTY_STOMACH_BEFORE_MINUTES
+            < minute
+            < meal + EMPTY_STOMACH_AFTER_MINUTES
+            for meal in self.meals.values()
+        ):
+            unmet.append("food")
+        return unmet
+
+    def _spacing_violations(self, drug_id: int, minute: int) -> int:
+        """Doses already placed too close to `minute`"""
+        count = 0
+        for other_drug_id, gap in self.gaps.get(drug_id, {}).items():
+            placed = self.by_drug.get(other_drug_id)
+            if placed:
+                count += bisect_left(placed, minute + gap) - bisect_right(
+                    placed, minute - gap
+                )
+        return count
+
+    def _violations(self, placements: list[Placement]) -> int:
+        """Cost of the constraints and spacing rules a full day breaks"""
+        minutes = self._evaluate(placements)
+        by_drug, self.by_drug = self.by_drug, {}
+        count = 0
+        for i in self.order:
+            drug_id = self.doses[i].drug_id
+            count += self._unmet(i, minutes[i])
+            count += self._spacing_violations(drug_id, minutes[i])
+            insort(self.by_drug.setdefault(drug_id, []), minutes[i])
+        self.by_drug = by_drug
+        return VIOLATION_COST * count
+
+    def _proposal(self, day: date, complete: bool) -> ScheduleProposal:
+        midnight = datetime.combine(day, time())
+        minutes = self._evaluate(self.best)
+        changes: list[ScheduleChange] = []
+        rows: list[DueRow] = []
+        unmet: list[UnmetConstraint] = []
+        for i, dose in enumerate(self.doses):
+            placement = self.best[i]
+            proposed = midnight + timedelta(minutes=minutes[i])
+            rows.append(
+                DueRow(
+                    scheduled_time=proposed,
+                    schedule_id=dose.schedule_id,
+                    drug_id=dose.drug_id,
+                    drug_name=dose.drug_name,
+                    dependency_type=placement.dependency_type.value,
+                    amount_per_dose=0,
+                    kind="",
+                )
+            )
+            unmet.extend(
+                UnmetConstraint(
+                    schedule_id=dose.schedule_id,
+                    drug_id=dose.drug_id,
+                    drug_name=dose.drug_name,
+                    constraint=name,
+                )
+                for name in self._unmet_constraints(i, minutes[i])
+            )
+            if placement == dose.placement:
+                continue
+            fields = placement._asdict()
+            fields["dependency_type"] = placement.dependency_type.value
+            changes.append(
+                ScheduleChange(
+                    schedule_id=dose.schedule_id,
+                    drug_id=dose.drug_id,
+                    drug_name=dose.drug_name,
+                    previous_time=midnight + timedelta(minutes=self.current[i]),
+                    proposed_time=proposed,
+                    **fields,
+                )
+            )
+        rows.sort(key=lambda r: (r.scheduled_time, r.schedule_id))
+        rules = [
+            (drug_id, other, gap)
+            for drug_id, others in self.gaps.items()
+            for other, gap in others.items()
+            if drug_id <= other
+        ]
+        conflicts = find_conflicts(rows, rules)
+        return ScheduleProposal(
+            day=day,
+            feasible=not conflicts and not unmet,
+            complete=complete,
+            steps=self.steps,
+            cost=self.best_cost,
+            changes=changes,
+            conflicts=conflicts,
+            unmet_constraints=unmet,
+        )
+
+
+def _minutes(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+def placement_of(schedule: object) -> Placement:
+    """A DrugSchedule's current dependency settings"""
+    return Placement(*(getattr(schedule, field) for field in Placement._fields))
+
+
+def propose_schedule(
+    db_session: Session,
+    day: date,
+    constraints: Sequence[DrugConstraint] = (),
+    drug_ids: Iterable[int] | None = None,
+    max_steps: int = DEFAULT_MAX_STEPS,
+) -> ScheduleProposal:
+    """Optimize the placement of the day's active doses.
+
+    Only doses of `drug_ids` (default: every drug) may move; the rest stay
+    put but still count for spacing. Meals are taken at their base times.
+    """
+    movable = set(drug_ids) if drug_ids is not None else None
+    resolver = DoseTimeResolver(db_session, day)
+    doses = [
+        Dose(
+            schedule.id,
+            schedule.drug_id,
+            schedule.drug.name,
+            placement_of(schedule),
+            movable is None or schedule.drug_id in movable,
+        )
+        for schedule in resolver.active_schedules()
+    ]
+    meal_rows = db_session.execute(
+        select(MealSchedule.id, MealSchedule.base_time).where(MealSchedule.is_active)
+    )
+    meals = {row.id: row.base_time for row in meal_rows}
+    optimizer = ScheduleOptimizer(
+        doses, meals, spacing_rules(db_session), constraints, max_steps
+    )
+    return optimizer.solve(day)
@@ -0,0 +1,231 @@
+import logging
+import os
+import time
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.models import DrugORM, NotificationOutbox
+from backend.services.notification_sinks import (
+    SINK_TIMEOUT_SECONDS,
+    NotificationSink,
+    sinks,
+)
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENT = "sent"
+DEAD = "dead"
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+# Retry n waits base * 2^(n-1) seconds, up to the maximum
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "30"))
+OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "3600"))
+# A claimed message is not handed to another worker for this long; keep it
+# well above the sink timeout
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "300"))
+
+
+def enqueue_notifications(
+    db_session: Session,
+    events: list[dict[str, Any]],
+    sink_names: Iterable[str] | None = None,
+) -> int:
+    """Queue one message per registered sink (or per named one) for each event.
+
+    Runs in the caller's transaction, so a message exists exactly when its
+    event does. A message already queued for the same dose, day, kind and
+    sink is skipped. Returns how many rows were offered.
+    """
+    names = list(sinks) if sink_names is None else [n for n in sink_names if n in sinks]
+    if not events or not names:
+        return 0
+    drugs = {
+        row.id: row
+        for row in db_session.execute(
+            select(
+                DrugORM.id, DrugORM.name, DrugORM.amount_per_dose, DrugORM.kind
+            ).where(DrugORM.id.in_({event["drug_id"] for event in events}))
+        )
+    }
+    now = datetime.now()
+    rows = []
+    for event in events:
+        drug = drugs.get(event["drug_id"])
+        if drug is None:
+            continue
+        scheduled = event["scheduled_time"]
+        payload = {
+            "schedule_id": event["schedule_id"],
+            "drug_id": drug.id,
+            "drug_name": drug.name,
+            "drug_kind": drug.kind,
+            "amount_per_dose": drug.amount_per_dose,
+            "dose_date": event["dose_date"].isoformat(),
+            "scheduled_time": scheduled.isoformat() if scheduled else None,
+            "kind": event["kind"],
+        }
+        for name in names:
+            rows.append(
+                {
+                    "schedule_id": event["schedule_id"],
+                    "drug_id": drug.id,
+                    "dose_date": event["dose_date"],
+                    "kind": event["kind"],
+                    "sink": name,
+                    "payload": payload,
+                    "status": PENDING,
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "created_at": now,
+                }
+            )
+    if rows:
+        db_session.execute(
+            pg_insert(NotificationOutbox).on_conflict_do_nothing(
+                constraint="uq_notification_outbox_message"
+            ),
+            rows,
+        )
+    return len(rows)
+
+
+def backoff(attempts: int) -> timedelta:
+    """Wait before the next try after `attempts` failed ones"""
+    seconds = OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, OUTBOX_MAX_BACKOFF_SECONDS))
+
+
+class ClaimedMessage(NamedTuple):
+    id: int
+    sink: str
+    payload: dict[str, Any]
+    attempts: int
+    lease_until: datetime
+
+
+def claim_batch(
+    db_session: Session,
+    now: datetime,
+    limit: int = OUTBOX_BATCH_SIZE,
+    lease: timedelta = timedelta(seconds=OUTBOX_LEASE_SECONDS),
+) -> list[ClaimedMessage]:
+    """Lease up to `limit` pending messages that are due, oldest first.
+
+    Rows locked by another claimer are skipped rather than waited on. The
+    claim moves next_attempt_at to the end of the lease and commits, so no
+    row lock is held while sending; another worker takes the messages again
+    only if the lease runs out first (e.g. this worker died).
+    """
+    lease_until = now + lease
+    claimable = (
+        select(NotificationOutbox.id)
+        .where(
+            NotificationOutbox.status == PENDING,
+            NotificationOutbox.next_attempt_at <= now,
+        )
+        .order_by(NotificationOutbox.next_attempt_at, NotificationOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db_session.execute(
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id.in_(claimable.scalar_subquery()))
+        .values(next_attempt_at=lease_until)
+        .returning(
+            NotificationOutbox.id,
+            NotificationOutbox.sink,
+            NotificationOutbox.payload,
+            NotificationOutbox.attempts,
+        )
+    ).all()
+    db_session.commit()
+    return sorted(
+        ClaimedMessage(row.id, row.sink, row.payload, row.attempts, lease_until)
+        for row in rows
+    )
+
+
+def _record_outcome(
+    db_session: Session, message: ClaimedMessage, **values: Any
+) -> None:
+    """Store a send's outcome and commit, if the lease is still this worker's"""
+    db_session.execute(
+        update(NotificationOutbox)
+        .where(
+            NotificationOutbox.id == message.id,
+            NotificationOutbox.status == PENDING,
+            NotificationOutbox.next_attempt_at == message.lease_until,
+        )
+        .values(attempts=message.attempts + 1, **values)
+    )
+    db_session.commit()
+
+
+def deliver_batch(
+    db_session: Session,
+    now: datetime | None = None,
+    limit: int = OUTBOX_BATCH_SIZE,
+    max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+    lease: timedelta = timedelta(seconds=OUTBOX_LEASE_SECONDS),
+) -> int:
+    """Lease a batch and send each message through its sink.
+
+    Each outcome is committed on its own, so a slow sink or a failed commit
+    affects only that message. A message is marked sent only after its sink
+    accepted it; if the worker dies first, it is sent again once the lease
+    runs out (at least once). Messages the lease no longer covers a full
+    send for are left to that retry. Failures are retried with exponential
+    backoff until `max_attempts`, then the message is marked dead. Returns
+    how many were claimed.
+    """
+    now = now or datetime.now()
+    batch = claim_batch(db_session, now, limit, lease)
+    # Stop while a send could still finish inside the lease
+    send_by = time.monotonic() + (lease.total_seconds() - SINK_TIMEOUT_SECONDS)
+    for message in batch:
+        if time.monotonic() > send_by:
+            logger.warning("Outbox lease running out; leaving the rest of the batch")
+            break
+        sink: NotificationSink | None = sinks.get(message.sink)
+        try:
+            if sink is None:
+                raise LookupError(f"no sink named {message.sink!r}")
+            sink.send(message.id, message.payload)
+        except Exception as e:
+            attempts = message.attempts + 1
+            error = f"{type(e).__name__}: {e}"[:1000]
+            if attempts >= max_attempts:
+                _record_outcome(db_session, message, status=DEAD, last_error=error)
+                logger.error(
+                    "Outbox message %d to %s dead after %d attempts: %s",
+                    message.id,
+                    message.sink,
+                    attempts,
+                    error,
+                )
+            else:
+                _record_outcome(
+                    db_session,
+                    message,
+                    next_attempt_at=now + backoff(attempts),
+                    last_error=error,
+                )
+                logger.warning(
+                    "Outbox message %d to %s failed (attempt %d): %s",
+                    message.id,
+                    message.sink,
+                    attempts,
+                    error,
+                )
+        else:
+            _record_outcome(db_session, message, status=SENT, sent_at=datetime.now())
+    if batch:
+        logger.info("Outbox delivered batch of %d", len(batch))
+    return len(batch)
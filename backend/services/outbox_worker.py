@@ -0,0 +1,86 @@
+import logging
+import os
+import threading
+from collections.abc import Callable
+
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+from backend.services.notification_sinks import sinks
+from backend.services.outbox import OUTBOX_BATCH_SIZE, deliver_batch
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "1"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+
+
+class OutboxWorkerPool:
+    """Threads draining the outbox, which the dose scheduler fills.
+
+    More delivery capacity comes from more threads here or more processes
+    running `python -m backend.services.outbox_worker`: claims use SKIP
+    LOCKED, so workers never hold the same message at once.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        workers: int = OUTBOX_WORKERS,
+        poll_seconds: float = OUTBOX_POLL_SECONDS,
+    ) -> None:
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        if not sinks:
+            logger.info("No notification sinks configured; outbox workers not started")
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run,
+                name=f"outbox-worker-{i}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Started %d outbox worker(s)", self.workers)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            delivered = 0
+            try:
+                with self.session_factory() as db:
+                    delivered = deliver_batch(db)
+            except Exception:
+                logger.exception("Outbox worker pass failed")
+            # Keep going while there is a backlog
+            if delivered < OUTBOX_BATCH_SIZE:
+                self._stop.wait(self.poll_seconds)
+
+
+outbox_workers = OutboxWorkerPool()
+
+
+if __name__ == "__main__":
+    # Extra delivery capacity alongside the API process
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s - %(message)s",
+    )
+    pool = OutboxWorkerPool()
+    pool.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pool.stop()
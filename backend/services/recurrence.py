@@ -0,0 +1,122 @@
+from datetime import date
+
+from pydantic import BaseModel, Field, model_validator
+from sqlalchemy import ColumnElement, literal, or_
+
+from backend.models import DrugSchedule
+
+# Masks are stored in a signed BIGINT, so bit 63 is left unused
+MAX_PERIOD_DAYS = 63
+
+# SQL twin of recurs_on_clause() for raw queries over drug_schedules `s`;
+# date - date is whole days, and DATE '0001-01-01' has ordinal 1
+RECURS_ON_SQL = """(
+    s.recurrence_period_days IS NULL
+    OR ((s.recurrence_mask >> ((:day - DATE '0001-01-01' + 1)
+        % s.recurrence_period_days)) & 1) = 1
+)"""
+
+
+class RecurrenceRule(BaseModel):
+    """How a schedule repeats between its start and end dates.
+
+    Give exactly one of `every_days`, `days_on` with `days_off`, or
+    `weekdays`. Intervals and cycles start counting on the start date.
+    """
+
+    every_days: int | None = Field(
+        None, ge=1, le=MAX_PERIOD_DAYS, description="Every N days"
+    )
+    days_on: int | None = Field(None, ge=1, description="Cycle: days taken")
+    days_off: int | None = Field(None, ge=0, description="Cycle: days paused")
+    weekdays: list[int] | None = Field(
+        None, min_length=1, description="Days of the week, 0 = Monday"
+    )
+
+    @model_validator(mode="after")
+    def _one_form(self) -> "RecurrenceRule":
+        forms = [
+            self.every_days is not None,
+            self.days_on is not None or self.days_off is not None,
+            self.weekdays is not None,
+        ]
+        if sum(forms) != 1:
+            raise ValueError("give one of every_days, days_on/days_off or weekdays")
+        if forms[1]:
+            if self.days_on is None or self.days_off is None:
+                raise ValueError("days_on and days_off go together")
+            if self.days_on + self.days_off > MAX_PERIOD_DAYS:
+                raise ValueError(f"cycle is longer than {MAX_PERIOD_DAYS} days")
+        if self.weekdays is not None and not all(0 <= d <= 6 for d in self.weekdays):
+            raise ValueError("weekdays range from 0 (Monday) to 6 (Sunday)")
+        return self
+
+
+def compile_rule(rule: RecurrenceRule, anchor: date) -> tuple[int | None, int | None]:
+    """(period, mask) for a rule whose cycle starts on `anchor`.
+
+    Bit `d.toordinal() % period` of the mask is set when the schedule is
+    active on day d, so the pattern is fixed to the calendar and survives
+    later changes to the start date. (None, None) means every day.
+    """
+    if rule.every_days is not None:
+        period = rule.every_days
+        days = [anchor.toordinal()]
+    elif rule.weekdays is not None:
+        period = 7
+        # Ordinal 1 (0001-01-01) was a Monday
+        days = [weekday + 1 for weekday in rule.weekdays]
+    else:
+        assert rule.days_on is not None and rule.days_off is not None
+        period = rule.days_on + rule.days_off
+        days = [anchor.toordinal() + i for i in range(rule.days_on)]
+    mask = 0
+    for day in days:
+        mask |= 1 << (day % period)
+    if mask == (1 << period) - 1:
+        return None, None
+    return period, mask
+
+
+def occurs_on(period: int | None, mask: int | None, day: date) -> bool:
+    """Whether the recurrence includes `day` (start/end dates aside)"""
+    if period is None or mask is None:
+        return True
+    return bool(mask >> (day.toordinal() % period) & 1)
+
+
+def recurs_on_clause(day: date) -> ColumnElement[bool]:
+    """SQL filter for schedules whose recurrence includes `day`"""
+    shift = literal(day.toordinal()) % DrugSchedule.recurrence_period_days
+    return or_(
+        DrugSchedule.recurrence_period_days.is_(None),
+        DrugSchedule.recurrence_mask.bitwise_rshift(shift).bitwise_and(1) == 1,
+    )
+
+
+def day_bitmap(
+    start_date: date,
+    end_date: date | None,
+    period: int | None,
+    mask: int | None,
+    first: date,
+    n_days: int,
+) -> int:
+    """Active days of a schedule in [first, first + n_days) as an int bitmap.
+
+    Bit i is set when the schedule is active on first + i. The period's mask
+    is tiled across the range with one multiplication and clipped to the
+    schedule's dates with one AND, so the cost does not grow per day.
+    """
+    lo = max((start_date - first).days, 0)
+    hi = n_days if end_date is None else min((end_date - first).days + 1, n_days)
+    if hi <= lo:
+        return 0
+    window = ((1 << (hi - lo)) - 1) << lo
+    if period is None or mask is None:
+        return window
+    # Enough copies to cover the range after dropping `phase` leading bits
+    copies = n_days // period + 2
+    repunit = ((1 << (period * copies)) - 1) // ((1 << period) - 1)
+    phase = first.toordinal() % period
+    return (mask * repunit >> phase) & window
@@ -0,0 +1,279 @@
+import heapq
+import logging
+import os
+import threading
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from typing import NamedTuple, Protocol
+
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+from backend.models import ScheduledTrigger
+from backend.services.data_version import TIMELINE, get_combined_version
+from backend.services.dose_events import DUE, dose_event, record_dose_events
+from backend.services.timeline_calculator import TimelineCalculator
+
+logger = logging.getLogger(__name__)
+
+# Doses due within this window are armed; memory follows this, not the
+# number of schedules
+SCHEDULER_HORIZON_HOURS = float(os.getenv("SCHEDULER_HORIZON_HOURS", "6"))
+SCHEDULER_POLL_SECONDS = float(os.getenv("SCHEDULER_POLL_SECONDS", "1"))
+# Triggers found this overdue (e.g. after downtime) are retired unhandled
+SCHEDULER_MAX_LATE_SECONDS = int(os.getenv("SCHEDULER_MAX_LATE_SECONDS", "3600"))
+# Fired triggers are kept this long
+SCHEDULER_RETENTION_DAYS = 7
+
+# Only one process at a time arms and fires
+SCHEDULER_LOCK_KEY = 0x7AB0_5C4E
+
+
+class Trigger(NamedTuple):
+    id: int
+    schedule_id: int
+    drug_id: int
+    dose_date: date
+    fire_at: datetime
+
+
+# Called with the session whose transaction marks the triggers fired
+TriggerHandler = Callable[[Session, list[Trigger]], None]
+
+
+class DeadlineQueue(Protocol):
+    """Further timed work run in each tick, under the scheduler's lock"""
+
+    def next_deadline(self) -> datetime | None: ...
+
+    def run_due(self, db_session: Session, now: datetime) -> None: ...
+
+    # Forget in-memory state; it is reloaded on the next run_due()
+    def reset(self) -> None: ...
+
+
+class DoseScheduler:
+    """Min-heap of the next horizon's dose due times, backed by a table.
+
+    Each tick re-arms the horizon in bulk when the data version has moved
+    (one delete and one insert from the due index, then a heapify) and pops
+    whatever is due. Popped triggers are marked fired with UPDATE ...
+    RETURNING and handed to the handlers in that same transaction, so a
+    restart or a second process never fires one twice.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        horizon: timedelta = timedelta(hours=SCHEDULER_HORIZON_HOURS),
+        poll_seconds: float = SCHEDULER_POLL_SECONDS,
+        max_late: timedelta = timedelta(seconds=SCHEDULER_MAX_LATE_SECONDS),
+    ) -> None:
+        self.session_factory = session_factory
+        self.horizon = horizon
+        self.poll_seconds = poll_seconds
+        self.max_late = max_late
+        self._handlers: dict[str, TriggerHandler] = {}
+        self._queues: dict[str, DeadlineQueue] = {}
+        self._heap: list[tuple[datetime, int, Trigger]] = []
+        self._armed_version: int | None = None
+        self._refresh_at = datetime.min
+        # When the last tick in this process committed
+        self._last_tick: datetime | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def add_handler(self, name: str, handler: TriggerHandler) -> None:
+        self._handlers[name] = handler
+
+    def add_queue(self, name: str, queue: DeadlineQueue) -> None:
+        self._queues[name] = queue
+
+    def _reset(self, lost_lock: bool) -> None:
+        self._armed_version = None
+        if lost_lock:
+            self._last_tick = None
+        for queue in self._queues.values():
+            queue.reset()
+
+    def tick(self, db_session: Session, now: datetime) -> list[Trigger]:
+        """Re-arm if needed, fire what is due and commit; returns fired triggers"""
+        locked = db_session.execute(
+            text("SELECT pg_try_advisory_xact_lock(:key)"),
+            {"key": SCHEDULER_LOCK_KEY},
+        ).scalar()
+        if not locked:
+            # Another process is scheduling; reload if this one takes over
+            self._reset(lost_lock=True)
+            db_session.rollback()
+            return []
+        try:
+            # Read under the lock from the database, so writes committed by
+            # any worker re-arm the horizon on the next tick
+            version = get_combined_version(db_session, TIMELINE)
+            if version != self._armed_version or now >= self._refresh_at:
+                self.rearm(db_session, now, self._last_tick or now, version)
+                self._armed_version = version
+                self._refresh_at = now + self.horizon / 2
+            fired = self._fire_due(db_session, now)
+            for queue in self._queues.values():
+                queue.run_due(db_session, now)
+            db_session.commit()
+        except Exception:
+            db_session.rollback()
+            self._reset(lost_lock=False)
+            raise
+        self._last_tick = now
+        return fired
+
+    def rearm(
+        self,
+        db_session: Session,
+        now: datetime,
+        since: datetime,
+        data_version: int | None = None,
+    ) -> None:
+        """Replace unfired triggers after `since` and reload the heap.
+
+        `since` is the previous tick, so doses that came due in between are
+        recomputed too; older unfired triggers (e.g. from before a restart)
+        are kept and fire late. `data_version` is the TIMELINE version the
+        caller already read, if any.
+        """
+        until = now + self.horizon
+        if data_version is None:
+            data_version = get_combined_version(db_session, TIMELINE)
+        calculator = TimelineCalculator(db_session, data_version=data_version)
+        rows = []
+        day = since.date()
+        while day <= until.date():
+            for row in calculator.due_index(day).window(since, until):
+                rows.append(
+                    {
+                        "schedule_id": row.schedule_id,
+                        "drug_id": row.drug_id,
+                        "dose_date": day,
+                        "fire_at": row.scheduled_time,
+                    }
+                )
+            day += timedelta(days=1)
+
+        db_session.execute(
+            delete(ScheduledTrigger).where(
+                ScheduledTrigger.fired_at.is_(None), ScheduledTrigger.fire_at >= since
+            )
+        )
+        db_session.execute(
+            delete(ScheduledTrigger).where(
+                ScheduledTrigger.fired_at.is_not(None),
+                ScheduledTrigger.dose_date
+                < now.date() - timedelta(days=SCHEDULER_RETENTION_DAYS),
+            )
+        )
+        if rows:
+            # A dose fired earlier today keeps its row and is not re-armed
+            db_session.execute(
+                pg_insert(ScheduledTrigger).on_conflict_do_nothing(
+                    constraint="uq_scheduled_triggers_dose"
+                ),
+                rows,
+            )
+        pending = db_session.execute(
+            select(
+                ScheduledTrigger.id,
+                ScheduledTrigger.schedule_id,
+                ScheduledTrigger.drug_id,
+                ScheduledTrigger.dose_date,
+                ScheduledTrigger.fire_at,
+            ).where(
+                ScheduledTrigger.fired_at.is_(None), ScheduledTrigger.fire_at <= until
+            )
+        )
+        self._heap = [(row.fire_at, row.id, Trigger(*row)) for row in pending]
+        heapq.heapify(self._heap)
+        logger.info("Scheduler armed %d trigger(s) until %s", len(self._heap), until)
+
+    def next_fire_at(self) -> datetime | None:
+        """Earliest of the next trigger and the queues' next deadlines"""
+        times = [queue.next_deadline() for queue in self._queues.values()]
+        if self._heap:
+            times.append(self._heap[0][0])
+        return min((t for t in times if t is not None), default=None)
+
+    def _fire_due(self, db_session: Session, now: datetime) -> list[Trigger]:
+        due: list[Trigger] = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[2])
+        if not due:
+            return []
+        claimed = set(
+            db_session.scalars(
+                update(ScheduledTrigger)
+                .where(
+                    ScheduledTrigger.id.in_([t.id for t in due]),
+                    ScheduledTrigger.fired_at.is_(None),
+                )
+                .values(fired_at=now)
+                .returning(ScheduledTrigger.id)
+            )
+        )
+        fired = [t for t in due if t.id in claimed and now - t.fire_at <= self.max_late]
+        if len(fired) < len(claimed):
+            logger.warning(
+                "Scheduler retired %d overdue trigger(s)", len(claimed) - len(fired)
+            )
+        if fired:
+            for handler in self._handlers.values():
+                handler(db_session, fired)
+            logger.info("Scheduler fired %d trigger(s)", len(fired))
+        return fired
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="dose-scheduler", daemon=True
+        )
+        self._thread.start()
+        logger.info("Dose scheduler started, horizon %s", self.horizon)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                with self.session_factory() as db:
+                    self.tick(db, datetime.now())
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            # Sleep until the next trigger, but notice data changes promptly
+            wait = self.poll_seconds
+            next_fire = self.next_fire_at()
+            if next_fire is not None:
+                until_next = (next_fire - datetime.now()).total_seconds()
+                wait = max(0.0, min(wait, until_next))
+            self._stop.wait(wait)
+
+
+def record_due(db_session: Session, triggers: list[Trigger]) -> None:
+    """Handler: append due events, which also queue outbox messages"""
+    now = datetime.now()
+    record_dose_events(
+        db_session,
+        [
+            dose_event(t.schedule_id, t.drug_id, t.dose_date, DUE, t.fire_at, now)
+            for t in triggers
+        ],
+    )
+
+
+dose_scheduler = DoseScheduler()
+dose_scheduler.add_handler("dose_events", record_due)
@@ -0,0 +1,181 @@
+from collections.abc import Collection, Iterable, Sequence
+from datetime import date, datetime, timedelta
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.models import SpacingRule
+from backend.services.dose_time_resolver import DoseTimeResolver
+from backend.services.due_index import DueRow
+
+
+class SpacingConflict(BaseModel):
+    """Two doses closer together than a spacing rule allows"""
+
+    schedule_id: int
+    drug_id: int
+    drug_name: str
+    scheduled_time: datetime
+    other_schedule_id: int
+    other_drug_id: int
+    other_drug_name: str
+    other_scheduled_time: datetime
+    min_gap_minutes: int
+    gap_minutes: int
+
+
+class IntervalTree[T]:
+    """Static interval tree answering "which intervals contain this point".
+
+    Intervals are sorted by start and laid out as an implicit balanced binary
+    tree (each slice's middle element is its root); every node also holds the
+    largest end in its subtree. A query skips any subtree that ends before the
+    point or starts after it, so it walks O(log n) nodes plus the paths to
+    the matches instead of scanning every interval.
+    """
+
+    def __init__(self, intervals: Iterable[tuple[datetime, datetime, T]]) -> None:
+        items = sorted(intervals, key=lambda item: (item[0], item[1]))
+        self._starts = [item[0] for item in items]
+        self._ends = [item[1] for item in items]
+        self._values = [item[2] for item in items]
+        self._max_end = list(self._ends)
+        self._augment(0, len(items))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _augment(self, lo: int, hi: int) -> datetime | None:
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        for child in (self._augment(lo, mid), self._augment(mid + 1, hi)):
+            if child is not None and child > self._max_end[mid]:
+                self._max_end[mid] = child
+        return self._max_end[mid]
+
+    def stab(self, point: datetime) -> list[T]:
+        """Values of the intervals with start <= point <= end"""
+        found: list[T] = []
+        pending = [(0, len(self._values))]
+        while pending:
+            lo, hi = pending.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] < point:
+                continue
+            pending.append((lo, mid))
+            if self._starts[mid] <= point:
+                if self._ends[mid] >= point:
+                    found.append(self._values[mid])
+                pending.append((mid + 1, hi))
+        return found
+
+
+def find_conflicts(
+    doses: Sequence[DueRow],
+    rules: Iterable[tuple[int, int, int]],
+    schedule_ids: Collection[int] | None = None,
+) -> list[SpacingConflict]:
+    """Pairs of doses that break a (drug, other drug, minutes) spacing rule.
+
+    For each drug, the doses of the drugs it must be spaced from are stored
+    as exclusion intervals (dose time +/- gap) in one interval tree, so each
+    dose is checked with one stabbing query rather than against every other
+    dose. Only doses of `schedule_ids` are checked, when given; each pair is
+    reported once.
+    """
+    gaps: dict[int, dict[int, timedelta]] = {}
+    for drug_id, other_drug_id, minutes in rules:
+        gap = timedelta(minutes=minutes)
+        gaps.setdefault(drug_id, {})[other_drug_id] = gap
+        gaps.setdefault(other_drug_id, {})[drug_id] = gap
+    by_drug: dict[int, list[DueRow]] = {}
+    for dose in doses:
+        by_drug.setdefault(dose.drug_id, []).append(dose)
+
+    trees: dict[int, IntervalTree[tuple[DueRow, timedelta]]] = {}
+    seen: set[tuple[int, int]] = set()
+    conflicts: list[SpacingConflict] = []
+    for dose in doses:
+        if dose.drug_id not in gaps:
+            continue
+        if schedule_ids is not None and dose.schedule_id not in schedule_ids:
+            continue
+        tree = trees.get(dose.drug_id)
+        if tree is None:
+            tree = trees[dose.drug_id] = IntervalTree(
+                (other.scheduled_time - gap, other.scheduled_time + gap, (other, gap))
+                for other_drug_id, gap in gaps[dose.drug_id].items()
+                for other in by_drug.get(other_drug_id, ())
+            )
+        for other, gap in tree.stab(dose.scheduled_time):
+            distance = abs(dose.scheduled_time - other.scheduled_time)
+            # Exactly the minimum gap apart is fine
+            if other.schedule_id == dose.schedule_id or distance >= gap:
+                continue
+            pair = (
+                min(dose.schedule_id, other.schedule_id),
+                max(dose.schedule_id, other.schedule_id),
+            )
+            if pair in seen:
+                continue
+            seen.add(pair)
+            conflicts.append(
+                SpacingConflict(
+                    schedule_id=dose.schedule_id,
+                    drug_id=dose.drug_id,
+                    drug_name=dose.drug_name,
+                    scheduled_time=dose.scheduled_time,
+                    other_schedule_id=other.schedule_id,
+                    other_drug_id=other.drug_id,
+                    other_drug_name=other.drug_name,
+                    other_scheduled_time=other.scheduled_time,
+                    min_gap_minutes=int(gap.total_seconds()) // 60,
+                    gap_minutes=int(distance.total_seconds()) // 60,
+                )
+            )
+    return conflicts
+
+
+def spacing_rules(db_session: Session) -> list[tuple[int, int, int]]:
+    """Every rule as (drug_id, other_drug_id, min_gap_minutes)"""
+    rows = db_session.execute(
+        select(
+            SpacingRule.drug_id, SpacingRule.other_drug_id, SpacingRule.min_gap_minutes
+        )
+    )
+    return [(row.drug_id, row.other_drug_id, row.min_gap_minutes) for row in rows]
+
+
+def spacing_conflicts(
+    db_session: Session, day: date, schedule_ids: Collection[int] | None = None
+) -> list[SpacingConflict]:
+    """Conflicts among the day's planned dose times.
+
+    Spacing is a property of the schedule, so snoozes and dismissals of the
+    day are ignored. Times come from the shared resolved-time cache and the
+    due index is left alone.
+    """
+    rules = spacing_rules(db_session)
+    if not rules:
+        return []
+    resolver = DoseTimeResolver(db_session, day)
+    doses = sorted(
+        (
+            DueRow(
+                scheduled_time=resolver.planned_time(schedule),
+                schedule_id=schedule.id,
+                drug_id=schedule.drug_id,
+                drug_name=schedule.drug.name,
+                dependency_type=schedule.dependency_type.value,
+                amount_per_dose=schedule.drug.amount_per_dose,
+                kind=schedule.drug.kind,
+            )
+            for schedule in resolver.active_schedules()
+        ),
+        key=lambda dose: (dose.scheduled_time, dose.schedule_id),
+    )
+    return find_conflicts(doses, rules, schedule_ids)
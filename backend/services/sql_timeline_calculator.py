@@ -0,0 +1,209 @@
+from datetime import date as date_type
+from datetime import datetime, timedelta
+
+from sqlalchemy import Date, DateTime, bindparam, text
+from sqlalchemy.orm import Session
+
+from backend.models import DependencyType
+from backend.services.dose_time_resolver import FALLBACK_TIME
+from backend.services.recurrence import RECURS_ON_SQL
+from backend.services.timeline_calculator import (
+    DUE_WINDOW_EARLY_SECONDS,
+    DUE_WINDOW_LATE_SECONDS,
+    TimelineItem,
+)
+
+# Effective time of every active, non-dismissed schedule for :day. Mirrors
+# DoseTimeResolver: anchors use recorded intake/meal times, drug chains are
+# resolved top-down from their roots, schedules on a dependency cycle use the
+# fallback time, and the latest notification override applies snooze/dismiss.
+_EFFECTIVE_TIMES_CTE = f"""
+WITH RECURSIVE
+active AS (
+    SELECT s.*
+    FROM drug_schedules s
+    WHERE s.start_date <= :day
+      AND (s.end_date >= :day OR s.end_date IS NULL)
+      AND s.is_active
+      AND {RECURS_ON_SQL}
+),
+primary_schedule AS (
+    SELECT DISTINCT ON (drug_id) drug_id, id AS schedule_id
+    FROM active
+    ORDER BY drug_id, id
+),
+intake AS (
+    SELECT DISTINCT ON (schedule_id) schedule_id, taken_at
+    FROM intake_events
+    WHERE event_date = :day
+    ORDER BY schedule_id, id DESC
+),
+meal_eaten AS (
+    SELECT DISTINCT ON (meal_schedule_id) meal_schedule_id, eaten_at
+    FROM meal_events
+    WHERE event_date = :day
+    ORDER BY meal_schedule_id, id DESC
+),
+node AS (
+    SELECT
+        a.id,
+        p.schedule_id AS parent_id,
+        pi.taken_at AS parent_taken_at,
+        make_interval(mins => COALESCE(a.drug_offset_minutes, 0)) AS drug_offset,
+        CASE
+            WHEN a.dependency_type = 'ABSOLUTE' THEN
+                COALESCE(:day + a.absolute_time, :fallback)
+            WHEN a.dependency_type = 'MEAL' THEN
+                CASE
+                    WHEN m.id IS NULL OR a.meal_offset_minutes IS NULL THEN :fallback
+                    WHEN a.meal_timing = 'before' THEN
+                        COALESCE(me.eaten_at, :day + m.base_time)
+                        - make_interval(mins => a.meal_offset_minutes)
+                    ELSE
+                        COALESCE(me.eaten_at, :day + m.base_time)
+                        + make_interval(mins => a.meal_offset_minutes)
+                END
+            WHEN a.dependency_type = 'DRUG' THEN
+                CASE WHEN p.schedule_id IS NULL THEN :fallback END
+            ELSE :fallback
+        END AS own_time
+    FROM active a
+    LEFT JOIN primary_schedule p
+        ON a.dependency_type = 'DRUG' AND p.drug_id = a.depends_on_drug_id
+    LEFT JOIN intake pi ON pi.schedule_id = p.schedule_id
+    LEFT JOIN meal_schedules m ON m.id = a.meal_schedule_id
+    LEFT JOIN meal_eaten me ON me.meal_schedule_id = m.id
+),
+-- Roots (own time or anchored on a recorded intake), then down drug chains
+resolved (id, planned) AS (
+    SELECT id, COALESCE(own_time, parent_taken_at + drug_offset)
+    FROM node
+    WHERE own_time IS NOT NULL OR parent_taken_at IS NOT NULL
+    UNION ALL
+    SELECT n.id, r.planned + n.drug_offset
+    FROM resolved r
+    JOIN node n ON n.parent_id = r.id
+    WHERE n.own_time IS NULL AND n.parent_taken_at IS NULL
+),
+-- Anything not reached hangs off a dependency cycle
+unreached AS (
+    SELECT n.* FROM node n WHERE n.id NOT IN (SELECT id FROM resolved)
+),
+cycle_walk (start_id, current_id, depth) AS (
+    SELECT id, parent_id, 1 FROM unreached
+    UNION ALL
+    SELECT w.start_id, u.parent_id, w.depth + 1
+    FROM cycle_walk w
+    JOIN unreached u ON u.id = w.current_id
+    WHERE w.current_id <> w.start_id
+      AND w.depth <= (SELECT count(*) FROM unreached)
+),
+resolved_cycles (id, planned) AS (
+    SELECT DISTINCT start_id, CAST(:fallback AS timestamp)
+    FROM cycle_walk
+    WHERE current_id = start_id
+    UNION ALL
+    SELECT n.id, r.planned + n.drug_offset
+    FROM resolved_cycles r
+    JOIN unreached n ON n.parent_id = r.id
+    WHERE n.id NOT IN (
+        SELECT start_id FROM cycle_walk WHERE current_id = start_id
+    )
+),
+planned AS (
+    SELECT id, planned FROM resolved
+    UNION ALL
+    SELECT id, planned FROM resolved_cycles
+),
+latest_override AS (
+    SELECT DISTINCT ON (schedule_id) schedule_id, snoozed_until, dismissed
+    FROM notification_overrides
+    WHERE override_date = :day
+    ORDER BY schedule_id, id DESC
+),
+effective AS (
+    SELECT
+        a.id AS schedule_id,
+        a.drug_id,
+        a.dependency_type,
+        COALESCE(o.snoozed_until, pl.planned) AS scheduled_time
+    FROM active a
+    JOIN planned pl ON pl.id = a.id
+    LEFT JOIN latest_override o ON o.schedule_id = a.id
+    WHERE NOT COALESCE(o.dismissed, false)
+)
+"""
+
+# Due rows and the next dose after the window from one evaluation of the CTE,
+# against one window. The one-row next_due side keeps a row even when nothing
+# is due; its due columns are then NULL.
+_DUE_QUERY = _EFFECTIVE_TIMES_CTE + """,
+due AS (
+    SELECT DISTINCT ON (drug_id) *
+    FROM effective
+    WHERE scheduled_time BETWEEN :window_start AND :window_end
+    ORDER BY drug_id, scheduled_time, schedule_id
+)
+SELECT due.schedule_id, due.drug_id, d.name AS drug_name, due.scheduled_time,
+       due.dependency_type, d.amount_per_dose, d.kind, upcoming.next_due
+FROM (
+    SELECT min(scheduled_time) AS next_due
+    FROM effective
+    WHERE scheduled_time > :window_end
+) upcoming
+LEFT JOIN (due JOIN drugs d ON d.id = due.drug_id) ON true
+ORDER BY due.scheduled_time, due.schedule_id
+"""
+
+_DUE_STATEMENT = text(_DUE_QUERY).bindparams(
+    bindparam("day", type_=Date),
+    bindparam("fallback", type_=DateTime),
+    bindparam("window_start", type_=DateTime),
+    bindparam("window_end", type_=DateTime),
+)
+
+
+class SqlTimelineCalculator:
+    """Timeline engine that resolves the whole day inside PostgreSQL.
+
+    Produces the same results as TimelineCalculator, but walks drug
+    dependencies with a recursive CTE and returns only the due rows, so no
+    schedule is loaded into Python unless it is due.
+    """
+
+    def __init__(self, db_session: Session) -> None:
+        self.db: Session = db_session
+
+    def calculate_daily_timeline(self, date: date_type) -> list[TimelineItem]:
+        """Calculate timeline for a specific date, returning only notifications ready to show now"""
+        return self.calculate_timeline_and_next_due(date)[0]
+
+    def calculate_timeline_and_next_due(
+        self, date: date_type
+    ) -> tuple[list[TimelineItem], datetime | None]:
+        """Notifications ready now, plus the time of the next dose after the window"""
+        rows = self.db.execute(_DUE_STATEMENT, self._params(date)).mappings().all()
+        timeline = [
+            TimelineItem(
+                schedule_id=row["schedule_id"],
+                drug_id=row["drug_id"],
+                drug_name=row["drug_name"],
+                scheduled_time=row["scheduled_time"],
+                dependency_type=DependencyType[row["dependency_type"]].value,
+                amount_per_dose=row["amount_per_dose"],
+                kind=row["kind"],
+            )
+            for row in rows
+            if row["schedule_id"] is not None
+        ]
+        next_due: datetime | None = rows[0]["next_due"]
+        return timeline, next_due
+
+    def _params(self, date: date_type) -> dict[str, object]:
+        now = datetime.now()
+        return {
+            "day": date,
+            "fallback": datetime.combine(date, FALLBACK_TIME),
+            "window_start": now - timedelta(seconds=DUE_WINDOW_LATE_SECONDS),
+            "window_end": now + timedelta(seconds=DUE_WINDOW_EARLY_SECONDS),
+        }
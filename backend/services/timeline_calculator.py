@@ -1,10 +1,17 @@
+from collections.abc import Iterable
 from datetime import date as date_type
-from datetime import datetime, time, timedelta
+from datetime import datetime, timedelta
 
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from backend.models import DependencyType, DrugSchedule, NotificationOverride
+from backend.models import DrugSchedule
+from backend.services.dose_time_resolver import DoseTimeResolver
+from backend.services.due_index import DueIndex, DueRow, due_index_cache
+
+# Due window around now, in seconds: a dose shows from 5s early to 60s late
+DUE_WINDOW_EARLY_SECONDS = 5
+DUE_WINDOW_LATE_SECONDS = 60
 
 
 class TimelineItem(BaseModel):
@@ -20,117 +27,72 @@ class TimelineItem(BaseModel):
 
 
 class TimelineCalculator:
-    def __init__(self, db_session: Session) -> None:
+    def __init__(
+        self,
+        db_session: Session,
+        data_version: int | None = None,
+        schedules: Iterable[DrugSchedule] | None = None,
+    ) -> None:
         self.db: Session = db_session
+        # The TIMELINE data version; when set, the day's due index is reused
+        # until it moves. Read it before loading `schedules`.
+        self.data_version = data_version
+        # Already-loaded schedules to resolve from, see DoseTimeResolver
+        self.schedules = schedules
 
     def calculate_daily_timeline(self, date: date_type) -> list[TimelineItem]:
         """Calculate timeline for a specific date, returning only notifications ready to show now"""
-
-        # Get all active drug schedules for the date
-        schedules = (
-            self.db.query(DrugSchedule)
-            .filter(
-                DrugSchedule.start_date <= date,
-                (DrugSchedule.end_date >= date) | (DrugSchedule.end_date.is_(None)),
-                DrugSchedule.is_active,
-            )
-            .all()
-        )
-
-        timeline: list[TimelineItem] = []
-        drug_times: dict[int, datetime] = {}  # Cache for calculated times
+        timeline, _ = self.calculate_timeline_and_next_due(date)
+        return timeline
+
+    def calculate_timeline_and_next_due(
+        self, date: date_type
+    ) -> tuple[list[TimelineItem], datetime | None]:
+        """Notifications ready now, plus the time of the next dose after the window"""
+        index = self.due_index(date)
         now = datetime.now()
+        window_end = now + timedelta(seconds=DUE_WINDOW_EARLY_SECONDS)
+        due = index.window(now - timedelta(seconds=DUE_WINDOW_LATE_SECONDS), window_end)
 
-        # Calculate times for each schedule
-        for schedule in schedules:
-            calculated_time = self._calculate_drug_time(schedule, date, drug_times)
-            drug_times[schedule.drug_id] = calculated_time
-
-            # Check for notification overrides (snooze/dismiss)
-            override = (
-                self.db.query(NotificationOverride)
-                .filter(
-                    NotificationOverride.schedule_id == schedule.id,
-                    NotificationOverride.override_date == date,
+        # Ensure each drug appears only once (rows are already sorted by time)
+        seen_drugs: set[int] = set()
+        timeline: list[TimelineItem] = []
+        for row in due:
+            if row.drug_id not in seen_drugs:
+                seen_drugs.add(row.drug_id)
+                timeline.append(TimelineItem(**row._asdict()))
+
+        return timeline, index.first_after(window_end)
+
+    def due_index(self, date: date_type) -> DueIndex:
+        """The day's due index, cached per data version when one is given"""
+        if self.data_version is None:
+            return self.build_due_index(date)
+        index = due_index_cache.get(date, self.data_version)
+        if index is None:
+            index = self.build_due_index(date)
+            due_index_cache.put(self.data_version, index)
+        return index
+
+    def build_due_index(self, date: date_type) -> DueIndex:
+        """Resolve every active schedule's effective time for the date"""
+        resolver = DoseTimeResolver(
+            self.db, date, schedules=self.schedules, data_version=self.data_version
+        )
+        rows: list[DueRow] = []
+        for schedule in resolver.active_schedules():
+            # Dismissed doses stay hidden for the rest of the day
+            if resolver.is_dismissed(schedule):
+                continue
+            rows.append(
+                DueRow(
+                    scheduled_time=resolver.effective_time(schedule),
+                    schedule_id=schedule.id,
+                    drug_id=schedule.drug_id,
+                    drug_name=schedule.drug.name,
+                    dependency_type=schedule.dependency_type.value,
+                    amount_per_dose=schedule.drug.amount_per_dose,
+                    kind=schedule.drug.kind,
                 )
-                .order_by(NotificationOverride.id.desc())
-                .first()
             )
-
-            if override:
-                if override.dismissed:
-                    continue
-                if override.snoozed_until:
-                    # Use the snoozed time as the notification time
-                    calculated_time = override.snoozed_until
-
-            # Only include notifications that are ready to show now (within a small window)
-            time_diff = (calculated_time - now).total_seconds()  # seconds
-
-            # Show notifications that are due now
-            if -60 <= time_diff <= 5:
-                timeline.append(
-                    TimelineItem(
-                        schedule_id=schedule.id,
-                        drug_id=schedule.drug_id,
-                        drug_name=schedule.drug.name,
-                        scheduled_time=calculated_time,
-                        dependency_type=schedule.dependency_type.value,
-                        amount_per_dose=schedule.drug.amount_per_dose,
-                        kind=schedule.drug.kind,
-                    )
-                )
-
-        # Sort by time
-        timeline.sort(key=lambda x: x.scheduled_time)
-
-        # Ensure each drug appears only once (deduplicate by drug_id)
-        seen_drugs: set[int] = set()
-        unique_timeline: list[TimelineItem] = []
-        for item in timeline:
-            if item.drug_id not in seen_drugs:
-                seen_drugs.add(item.drug_id)
-                unique_timeline.append(item)
-
-        return unique_timeline
-
-    def _calculate_drug_time(
-        self, schedule: DrugSchedule, date: date_type, drug_times: dict[int, datetime]
-    ) -> datetime:
-        """Calculate time for a drug based on its dependency type"""
-
-        if schedule.dependency_type == DependencyType.ABSOLUTE:
-            # Absolute time: take at specific time
-            if schedule.absolute_time is None:
-                # Fallback if absolute_time is not set
-                return datetime.combine(date, time(9, 0))
-            return datetime.combine(date, schedule.absolute_time)
-
-        elif schedule.dependency_type == DependencyType.MEAL:
-            # Meal dependency: take before/after meal
-            if schedule.meal_schedule is None or schedule.meal_offset_minutes is None:
-                # Fallback if meal schedule or offset is not set
-                return datetime.combine(date, time(9, 0))
-            meal_time = schedule.meal_schedule.base_time
-            base_time = datetime.combine(date, meal_time)
-
-            if schedule.meal_timing == "before":
-                return base_time - timedelta(minutes=schedule.meal_offset_minutes)
-            else:  # 'after'
-                return base_time + timedelta(minutes=schedule.meal_offset_minutes)
-
-        elif schedule.dependency_type == DependencyType.DRUG:
-            # Drug dependency: take after/before another drug
-            if schedule.depends_on_drug_id in drug_times:
-                base_time = drug_times[schedule.depends_on_drug_id]
-                if schedule.drug_offset_minutes is None:
-                    # Fallback if offset is not set
-                    return base_time
-                return base_time + timedelta(minutes=schedule.drug_offset_minutes)
-            else:
-                # Dependent drug not calculated yet, use default time
-                return datetime.combine(date, time(9, 0))
-
-        else:  # INDEPENDENT
-            # Independent: use default time
-            return datetime.combine(date, time(9, 0))
+        return DueIndex(date, rows)
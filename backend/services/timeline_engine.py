@@ -0,0 +1,45 @@
+import logging
+import os
+from collections.abc import Iterable
+from datetime import date as date_type
+from datetime import datetime
+from typing import Protocol
+
+from sqlalchemy.orm import Session
+
+from backend.models import DrugSchedule
+from backend.services.sql_timeline_calculator import SqlTimelineCalculator
+from backend.services.timeline_calculator import TimelineCalculator, TimelineItem
+
+logger = logging.getLogger(__name__)
+
+# Timeline engine used by the notification endpoints: "python" or "sql"
+TIMELINE_ENGINE = os.getenv("TIMELINE_ENGINE", "python")
+
+
+class TimelineEngine(Protocol):
+    def calculate_daily_timeline(self, date: date_type) -> list[TimelineItem]: ...
+
+    def calculate_timeline_and_next_due(
+        self, date: date_type
+    ) -> tuple[list[TimelineItem], datetime | None]: ...
+
+
+def get_timeline_calculator(
+    db_session: Session,
+    engine: str | None = None,
+    data_version: int | None = None,
+    schedules: Iterable[DrugSchedule] | None = None,
+) -> TimelineEngine:
+    """Timeline calculator for the configured (or given) engine.
+
+    `data_version` lets the Python engine reuse its due index across polls,
+    and `schedules` lets it resolve from schedules the caller already loaded.
+    The SQL engine resolves in the database and ignores both.
+    """
+    name = engine or TIMELINE_ENGINE
+    if name == "sql":
+        return SqlTimelineCalculator(db_session)
+    if name != "python":
+        logger.warning("Unknown TIMELINE_ENGINE=%s, using python", name)
+    return TimelineCalculator(db_session, data_version, schedules)
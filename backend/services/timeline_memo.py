@@ -0,0 +1,148 @@
+import threading
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from datetime import date as date_type
+from datetime import datetime, timedelta
+from typing import cast
+
+from backend.services.timeline_calculator import (
+    DUE_WINDOW_EARLY_SECONDS,
+    DUE_WINDOW_LATE_SECONDS,
+    TimelineItem,
+)
+
+TimelineResult = tuple[list[TimelineItem], datetime | None]
+
+
+class _Call[T]:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: T | None = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight[T]:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller runs the function; callers arriving while it runs block
+    until it finishes and share its result (or exception).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call[T]] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return cast(T, call.result)
+
+
+@dataclass(frozen=True)
+class _MemoEntry:
+    date: date_type
+    version: int
+    computed_at: datetime
+    valid_until: datetime
+    result: TimelineResult
+
+
+class TimelineMemo:
+    """Short-lived memo of the due timeline, shared by all pollers.
+
+    An entry is keyed on the date and the data version, and is valid until
+    the end of the minute it was computed in or until a dose enters or
+    leaves the due window, whichever comes first. A write bumps the data
+    version, which invalidates the entry immediately. Concurrent misses for
+    the same key are coalesced into a single computation.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entry: _MemoEntry | None = None
+        self._flight: SingleFlight[TimelineResult] = SingleFlight()
+
+    def get_or_compute(
+        self,
+        date: date_type,
+        version: int,
+        compute: Callable[[], TimelineResult],
+    ) -> TimelineResult:
+        now = datetime.now()
+        cached = self._lookup(date, version, now)
+        if cached is not None:
+            return cached
+
+        def run() -> TimelineResult:
+            # A concurrent leader may have just filled the memo
+            hit = self._lookup(date, version, datetime.now())
+            if hit is not None:
+                return hit
+            computed_at = datetime.now()
+            result = compute()
+            entry = _MemoEntry(
+                date=date,
+                version=version,
+                computed_at=computed_at,
+                valid_until=_valid_until(result, computed_at),
+                result=result,
+            )
+            with self._lock:
+                self._entry = entry
+            return result
+
+        bucket = now.replace(second=0, microsecond=0)
+        return self._flight.do((date, version, bucket), run)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entry = None
+
+    def _lookup(
+        self, date: date_type, version: int, now: datetime
+    ) -> TimelineResult | None:
+        with self._lock:
+            entry = self._entry
+        if (
+            entry is not None
+            and entry.date == date
+            and entry.version == version
+            and entry.computed_at <= now < entry.valid_until
+        ):
+            return entry.result
+        return None
+
+
+def _valid_until(result: TimelineResult, computed_at: datetime) -> datetime:
+    """Earliest time the due list could change without a write"""
+    timeline, next_due = result
+    valid_until = computed_at.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    if next_due is not None:
+        entering = next_due - timedelta(seconds=DUE_WINDOW_EARLY_SECONDS)
+        valid_until = min(valid_until, entering)
+    for item in timeline:
+        leaving = item.scheduled_time + timedelta(seconds=DUE_WINDOW_LATE_SECONDS)
+        valid_until = min(valid_until, leaving)
+    return valid_until
+
+
+timeline_memo = TimelineMemo()
@@ -1,4 +1,9 @@
+from datetime import date
+
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from backend.test.conftest import get_db_drug
 
 # Test data for all three meals
 TEST_MEALS = [
@@ -237,3 +242,90 @@ def test_realistic_meal_management_workflow(test_client: TestClient) -> None:
     assert "breakfast" in meal_names
     assert "lunch" not in meal_names
     assert "dinner" in meal_names
+
+
+def test_update_meal_recomputes_downstream_doses(
+    db_session: Session, test_client: TestClient
+) -> None:
+    """Test that a meal update returns exactly the transitively affected doses"""
+    today = date.today().isoformat()
+    lunch = test_client.post("/meal-schedules", json=TEST_MEALS[1]).json()
+    base = {
+        "kind": "pill",
+        "amount_per_dose": 1,
+        "frequency_per_day": 1,
+        "start_date": today,
+    }
+    meal_drug = test_client.post(
+        "/drug",
+        json={
+            **base,
+            "name": "WithLunch",
+            "dependency_type": "meal",
+            "meal_schedule_id": lunch["id"],
+            "meal_offset_minutes": 15,
+            "meal_timing": "before",
+        },
+    ).json()
+    anchor = get_db_drug(db_session, "WithLunch")
+    assert anchor is not None
+    chained = test_client.post(
+        "/drug",
+        json={
+            **base,
+            "name": "AfterWithLunch",
+            "dependency_type": "drug",
+            "depends_on_drug_id": anchor.id,
+            "drug_offset_minutes": 60,
+        },
+    ).json()
+    test_client.post(
+        "/drug",
+        json={
+            **base,
+            "name": "Unrelated",
+            "dependency_type": "absolute",
+            "absolute_time": "07:00",
+        },
+    )
+
+    response = test_client.put("/meal-schedules/lunch", json={"base_time": "12:00"})
+    assert response.status_code == 200
+    affected = {
+        dose["schedule_id"]: dose["scheduled_time"]
+        for dose in response.json()["affected_doses"]
+    }
+    assert affected == {
+        meal_drug["id"]: f"{today}T11:45:00",
+        chained["id"]: f"{today}T12:45:00",
+    }
+
+
+def test_get_meal_schedules_conditional(test_client: TestClient) -> None:
+    """Test meal ETags, and that deleting a meal also changes the drug ETag"""
+    meal = test_client.post("/meal-schedules", json=TEST_MEALS[0]).json()
+    test_client.post(
+        "/drug",
+        json={
+            "name": "WithBreakfast",
+            "kind": "pill",
+            "amount_per_dose": 1,
+            "dependency_type": "meal",
+            "meal_schedule_id": meal["id"],
+            "meal_offset_minutes": 15,
+            "meal_timing": "after",
+        },
+    )
+    meal_etag = test_client.get("/meal-schedules").headers["ETag"]
+    drug_etag = test_client.get("/drug").headers["ETag"]
+
+    cached = test_client.get("/meal-schedules", headers={"If-None-Match": meal_etag})
+    assert cached.status_code == 304
+
+    test_client.delete("/meal-schedules/breakfast")
+    meals = test_client.get("/meal-schedules", headers={"If-None-Match": meal_etag})
+    drugs = test_client.get("/drug", headers={"If-None-Match": drug_etag})
+    assert meals.status_code == 200
+    assert meals.json() == []
+    assert drugs.status_code == 200
+    assert drugs.json() == []
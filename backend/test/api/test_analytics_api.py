@@ -0,0 +1,129 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from freezegun import freeze_time
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.models import AdherenceDaily, DrugSchedule
+from backend.services.adherence import rollup_adherence
+from backend.services.dose_events import (
+    DISMISSED,
+    TAKEN,
+    dose_event,
+    record_dose_events,
+)
+
+
+def _add_absolute(test_client: TestClient, name: str, hhmm: str, start: str) -> int:
+    payload = {
+        "name": name,
+        "kind": "pill",
+        "amount_per_dose": 1,
+        "start_date": start,
+        "dependency_type": "absolute",
+        "absolute_time": hhmm,
+    }
+    return int(test_client.post("/drug", json=payload).json()["id"])
+
+
+def _take(db: Session, schedule_id: int, day: date, at: time, late: int) -> None:
+    schedule = db.get(DrugSchedule, schedule_id)
+    assert schedule is not None
+    due = datetime.combine(day, at)
+    event = dose_event(
+        schedule_id, schedule.drug_id, day, TAKEN, due, due + timedelta(seconds=late)
+    )
+    record_dose_events(db, [event])
+
+
+def _dismiss(db: Session, schedule_id: int, day: date, at: time) -> None:
+    schedule = db.get(DrugSchedule, schedule_id)
+    assert schedule is not None
+    due = datetime.combine(day, at)
+    record_dose_events(
+        db, [dose_event(schedule_id, schedule.drug_id, day, DISMISSED, due)]
+    )
+
+
+@freeze_time("2025-10-26 20:00:00")
+def test_adherence_rates_delays_and_streaks(
+    test_client: TestClient, db_session: Session
+) -> None:
+    """Test per-drug stats over closed days plus the doses due so far today"""
+    morning = _add_absolute(test_client, "Morning", "08:00", "2025-10-20")
+    night = _add_absolute(test_client, "Night", "21:00", "2025-10-24")
+    for day in (20, 21, 22, 24, 25):
+        _take(db_session, morning, date(2025, 10, day), time(8), 60)
+    _take(db_session, night, date(2025, 10, 24), time(21), 0)
+    db_session.commit()
+    test_client.post(
+        "/events/intake",
+        json={"schedule_id": morning, "taken_at": "2025-10-26T08:02:00"},
+    )
+
+    resp = test_client.get(
+        "/analytics/adherence", params={"from": "2025-10-20", "to": "2025-10-31"}
+    )
+
+    assert resp.status_code == 200
+    stats = {d["drug_name"]: d for d in resp.json()["drugs"]}
+    # Six closed days plus today's 08:00 dose; the 23rd was missed
+    assert stats["Morning"]["expected_doses"] == 7
+    assert stats["Morning"]["taken_doses"] == 6
+    assert stats["Morning"]["adherence_rate"] == pytest.approx(6 / 7)
+    assert stats["Morning"]["average_delay_seconds"] == pytest.approx(70)
+    assert stats["Morning"]["longest_missed_streak_days"] == 1
+    assert stats["Morning"]["current_missed_streak_days"] == 0
+    # Tonight's 21:00 dose is not due yet
+    assert stats["Night"]["expected_doses"] == 2
+    assert stats["Night"]["missed_doses"] == 1
+    assert stats["Night"]["current_missed_streak_days"] == 1
+
+
+@freeze_time("2025-10-26 20:00:00")
+def test_adherence_reads_rollup_and_unrolled_events(
+    test_client: TestClient, db_session: Session
+) -> None:
+    """Test that reads combine rolled-up and newer events and write nothing"""
+    sid = _add_absolute(test_client, "Daily", "09:00", "2025-10-20")
+    params = {"from": "2025-10-20", "to": "2025-10-25"}
+    _take(db_session, sid, date(2025, 10, 20), time(9), 30)
+    db_session.commit()
+    rollup_adherence(db_session)
+    db_session.commit()
+    _take(db_session, sid, date(2025, 10, 21), time(9), 90)
+    # Dismissed is neither taken nor missed
+    _dismiss(db_session, sid, date(2025, 10, 22), time(9))
+    db_session.commit()
+
+    (stats,) = test_client.get("/analytics/adherence", params=params).json()["drugs"]
+    assert (stats["taken_doses"], stats["missed_doses"]) == (2, 3)
+    assert stats["longest_missed_streak_days"] == 3
+    assert stats["average_delay_seconds"] == pytest.approx(60)
+    rolled = db_session.scalars(select(AdherenceDaily)).all()
+    assert [row.day for row in rolled] == [date(2025, 10, 20)]
+
+
+@freeze_time("2025-10-26 20:00:00")
+def test_adherence_cache_and_validation(
+    test_client: TestClient, db_session: Session
+) -> None:
+    """Test that late events invalidate cached past ranges, and range checks"""
+    sid = _add_absolute(test_client, "Weekly", "09:00", "2025-10-01")
+    params = {"from": "2025-10-01", "to": "2025-10-07"}
+    before = test_client.get("/analytics/adherence", params=params).json()
+    assert before["drugs"][0]["taken_doses"] == 0
+    assert before == test_client.get("/analytics/adherence", params=params).json()
+
+    _take(db_session, sid, date(2025, 10, 3), time(9), 30)
+    db_session.commit()
+    after = test_client.get("/analytics/adherence", params=params).json()
+    assert after["drugs"][0]["taken_doses"] == 1
+    assert after["drugs"][0]["longest_missed_streak_days"] == 4
+
+    backwards = {"from": "2025-10-07", "to": "2025-10-01"}
+    assert test_client.get("/analytics/adherence", params=backwards).status_code == 400
+    too_long = {"from": "2020-01-01", "to": "2025-10-01"}
+    assert test_client.get("/analytics/adherence", params=too_long).status_code == 400
@@ -0,0 +1,62 @@
+from fastapi.testclient import TestClient
+from freezegun import freeze_time
+
+
+def _create_drug(test_client: TestClient, name: str, hhmm: str) -> None:
+    payload = {
+        "name": name,
+        "kind": "pill",
+        "amount_per_dose": 1,
+        "start_date": "2025-10-26",
+        "dependency_type": "absolute",
+        "absolute_time": hhmm,
+    }
+    assert test_client.post("/drug", json=payload).status_code == 200
+
+
+@freeze_time("2025-10-26 20:00:00")
+def test_dashboard_matches_separate_endpoints(test_client: TestClient) -> None:
+    """Test that each dashboard section equals its standalone endpoint"""
+    test_client.post(
+        "/meal-schedules", json={"meal_name": "Dinner", "base_time": "19:00"}
+    )
+    _create_drug(test_client, "DueNow", "20:00")
+    _create_drug(test_client, "Later", "22:00")
+
+    resp = test_client.get("/dashboard")
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["drugs"] == test_client.get("/drug").json()
+    assert body["meal_schedules"] == test_client.get("/meal-schedules").json()
+    assert body["notifications"] == test_client.get("/notifications").json()
+    assert [n["drug_name"] for n in body["notifications"]] == ["DueNow"]
+    assert resp.headers["X-Next-Due"] == "2025-10-26T22:00:00"
+
+
+@freeze_time("2025-10-26 20:00:00")
+def test_dashboard_fields_and_etag(test_client: TestClient) -> None:
+    """Test partial sections and revalidation as data and the clock move"""
+    _create_drug(test_client, "Evening", "20:30")
+
+    partial = test_client.get("/dashboard", params={"fields": "drugs"})
+    assert list(partial.json()) == ["drugs"]
+    bad = test_client.get("/dashboard", params={"fields": "drugs,weather"})
+    assert bad.status_code == 400
+
+    first = test_client.get("/dashboard")
+    etag = first.headers["ETag"]
+    assert etag != partial.headers["ETag"]
+    cached = test_client.get("/dashboard", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    # No write, but a dose has become due
+    with freeze_time("2025-10-26 20:30:00"):
+        due = test_client.get("/dashboard", headers={"If-None-Match": etag})
+    assert due.status_code == 200
+    assert [n["drug_name"] for n in due.json()["notifications"]] == ["Evening"]
+
+    _create_drug(test_client, "Another", "23:00")
+    changed = test_client.get("/dashboard", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert len(changed.json()["drugs"]) == 2
@@ -0,0 +1,110 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+from freezegun import freeze_time
+from sqlalchemy.orm import Session
+
+from backend.test.conftest import get_db_drug
+
+
+def create_chain(db_session: Session, test_client: TestClient) -> tuple[int, int, int]:
+    """Create lunch -> WithLunch -> AfterWithLunch plus an unrelated drug"""
+    today = date.today().isoformat()
+    base = {
+        "kind": "pill",
+        "amount_per_dose": 1,
+        "frequency_per_day": 1,
+        "start_date": today,
+        "end_date": today,
+    }
+    lunch = test_client.post(
+        "/meal-schedules", json={"meal_name": "lunch", "base_time": "13:00"}
+    ).json()
+    meal_drug = test_client.post(
+        "/drug",
+        json={
+            **base,
+            "name": "WithLunch",
+            "dependency_type": "meal",
+            "meal_schedule_id": lunch["id"],
+            "meal_offset_minutes": 0,
+            "meal_timing": "after",
+        },
+    ).json()
+    anchor = get_db_drug(db_session, "WithLunch")
+    assert anchor is not None
+    chained = test_client.post(
+        "/drug",
+        json={
+            **base,
+            "name": "AfterWithLunch",
+            "dependency_type": "drug",
+            "depends_on_drug_id": anchor.id,
+            "drug_offset_minutes": 30,
+        },
+    ).json()
+    unrelated = test_client.post(
+        "/drug",
+        json={
+            **base,
+            "name": "Unrelated",
+            "dependency_type": "absolute",
+            "absolute_time": "12:00",
+        },
+    ).json()
+    return meal_drug["id"], chained["id"], unrelated["id"]
+
+
+@freeze_time("2025-10-26 12:45:00")
+def test_meal_event_shifts_dependent_doses(
+    db_session: Session, test_client: TestClient
+) -> None:
+    """Test that eating early shifts only the doses anchored on the meal"""
+    meal_sid, chained_sid, _ = create_chain(db_session, test_client)
+
+    resp = test_client.post(
+        "/events/meal",
+        json={"meal_name": "lunch", "eaten_at": "2025-10-26T12:45:00"},
+    )
+    assert resp.status_code == 200
+    shifted = {
+        dose["schedule_id"]: dose["scheduled_time"]
+        for dose in resp.json()["shifted_doses"]
+    }
+    assert shifted == {
+        meal_sid: "2025-10-26T12:45:00",
+        chained_sid: "2025-10-26T13:15:00",
+    }
+
+    # The meal-anchored dose is now due instead of at 13:00
+    notifications = test_client.get("/notifications").json()
+    assert [n["schedule_id"] for n in notifications] == [meal_sid]
+
+
+@freeze_time("2025-10-26 13:40:00")
+def test_intake_event_shifts_dependent_doses(
+    db_session: Session, test_client: TestClient
+) -> None:
+    """Test that taking the anchor drug late re-anchors its dependents"""
+    meal_sid, chained_sid, _ = create_chain(db_session, test_client)
+
+    resp = test_client.post(
+        "/events/intake",
+        json={"schedule_id": meal_sid, "taken_at": "2025-10-26T13:10:00"},
+    )
+    assert resp.status_code == 200
+    shifted = resp.json()["shifted_doses"]
+    assert [(d["schedule_id"], d["scheduled_time"]) for d in shifted] == [
+        (chained_sid, "2025-10-26T13:40:00")
+    ]
+
+    notifications = test_client.get("/notifications").json()
+    assert [n["schedule_id"] for n in notifications] == [chained_sid]
+
+
+def test_events_unknown_anchor(test_client: TestClient) -> None:
+    """Test that events for unknown schedules or meals are rejected"""
+    resp = test_client.post("/events/intake", json={"schedule_id": 999})
+    assert resp.status_code == 404
+    resp = test_client.post("/events/meal", json={"meal_name": "brunch"})
+    assert resp.status_code == 404
@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from backend.services.export import begin_snapshot, export_rows
+
+
+def _seed(test_client: TestClient) -> None:
+    test_client.post(
+        "/meal-schedules", json={"meal_name": "Breakfast", "base_time": "08:00"}
+    )
+    test_client.post(
+        "/drug",
+        json={
+            "name": "Metformin",
+            "kind": "pill",
+            "amount_per_dose": 1,
+            "start_date": "2025-10-26",
+            "dependency_type": "meal",
+            "meal_schedule_id": 1,
+            "meal_offset_minutes": 15,
+            "meal_timing": "after",
+        },
+    )
+
+
+def test_export_ndjson(test_client: TestClient) -> None:
+    """Test that the NDJSON export has a header line and every table's rows"""
+    _seed(test_client)
+
+    resp = test_client.get("/export")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    assert "attachment" in resp.headers["content-disposition"]
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    header = lines[0]
+    assert header["entity"] == "export"
+    assert header["data"]["cursor"] > 0
+    by_entity = {line["entity"]: line["data"] for line in lines[1:]}
+    assert by_entity["drugs"]["name"] == "Metformin"
+    assert by_entity["meal_schedules"]["base_time"] == "08:00:00"
+    assert by_entity["drug_schedules"]["dependency_type"] == "meal"
+
+
+def test_export_csv(test_client: TestClient) -> None:
+    """Test single-table CSV export and its argument checks"""
+    _seed(test_client)
+
+    resp = test_client.get(
+        "/export", params={"format": "csv", "entities": "drug_schedules"}
+    )
+
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert len(rows) == 1
+    assert rows[0]["dependency_type"] == "meal"
+    assert rows[0]["end_date"] == ""
+    assert test_client.get("/export", params={"format": "csv"}).status_code == 400
+    bad = test_client.get("/export", params={"entities": "drugs,patients"})
+    assert bad.status_code == 400
+
+
+def test_export_reads_one_snapshot(
+    test_client: TestClient, db_session: Session
+) -> None:
+    """Test that rows committed after the export started are not included"""
+    _seed(test_client)
+    begin_snapshot(db_session)
+    assert [row["name"] for row in export_rows(db_session, "drugs")] == ["Metformin"]
+
+    test_client.post(
+        "/drug", json={"name": "Late", "kind": "pill", "amount_per_dose": 1}
+    )
+
+    names = [row["name"] for row in export_rows(db_session, "drugs")]
+    assert names == ["Metformin"]
+    isolation = db_session.execute(text("SHOW transaction_isolation")).scalar()
+    assert isolation == "repeatable read"
+    db_session.rollback()
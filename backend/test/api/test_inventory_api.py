@@ -0,0 +1,74 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+from freezegun import freeze_time
+from sqlalchemy.orm import Session
+
+from backend.services.inventory import forecast
+from backend.test.conftest import get_db_drug
+
+
+def test_forecast() -> None:
+    today = date(2025, 10, 26)
+    assert forecast(20, 2.0, None, today) == date(2025, 11, 5)
+    assert forecast(20, 0.0, None, today) is None
+    # The schedule ends before the stock does
+    assert forecast(20, 2.0, date(2025, 11, 4), today) is None
+    assert forecast(20, 2.0, date(2025, 11, 5), today) == date(2025, 11, 5)
+
+
+@freeze_time("2025-10-26 09:00:00")
+def test_inventory_tracks_taken_doses(
+    db_session: Session, test_client: TestClient
+) -> None:
+    """Test that intakes draw stock down and move the run-out forecast"""
+    schedule = test_client.post(
+        "/drug",
+        json={
+            "name": "Metformin",
+            "kind": "pill",
+            "amount_per_dose": 2,
+            "start_date": "2025-10-26",
+            "dependency_type": "absolute",
+            "absolute_time": "08:00",
+        },
+    ).json()
+    drug = get_db_drug(db_session, "Metformin")
+    assert drug is not None
+
+    assert test_client.put("/inventory/999", json={"on_hand": 5}).status_code == 404
+    stock = test_client.put(f"/inventory/{drug.id}", json={"on_hand": 20}).json()
+    assert stock["daily_use"] == 2.0
+    assert stock["runs_out_on"] == "2025-11-05"
+    assert stock["refill_by"] == "2025-10-29"
+
+    test_client.post("/events/intake", json={"schedule_id": schedule["id"]})
+    (stock,) = test_client.get("/inventory").json()
+    assert stock["on_hand"] == 18
+    assert stock["runs_out_on"] == "2025-11-04"
+
+    soon = test_client.get("/inventory/running-out", params={"days": 9}).json()
+    assert [s["drug_name"] for s in soon] == ["Metformin"]
+    assert test_client.get("/inventory/running-out", params={"days": 8}).json() == []
+    assert test_client.get("/inventory/refill-alerts").json() == []
+
+    # Every other day halves the daily use
+    resp = test_client.put(
+        f"/drug-id/{schedule['id']}",
+        json={
+            "name": "Metformin",
+            "kind": "pill",
+            "amount_per_dose": 2,
+            "dependency_type": "absolute",
+            "absolute_time": "08:00",
+            "recurrence": {"every_days": 2},
+        },
+    )
+    assert resp.status_code == 200
+    (stock,) = test_client.get("/inventory").json()
+    assert stock["daily_use"] == 1.0
+    assert stock["runs_out_on"] == "2025-11-13"
+
+    test_client.put(f"/inventory/{drug.id}", json={"on_hand": 4, "refill_lead_days": 7})
+    alerts = test_client.get("/inventory/refill-alerts").json()
+    assert [a["runs_out_on"] for a in alerts] == ["2025-10-30"]
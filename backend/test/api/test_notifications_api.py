@@ -1,7 +1,15 @@
+import threading
+import time
 from datetime import date
 
+import msgpack
 from fastapi.testclient import TestClient
 from freezegun import freeze_time
+from sqlalchemy.orm import Session
+
+from backend.models import NotificationOverride
+from backend.services.data_version import NOTIFICATION_OVERRIDES, bump_data_version
+from backend.test.conftest import get_db_drug
 
 
 def create_absolute_payload(
@@ -452,3 +460,195 @@ def test_notifications_update_time_clears_snooze_and_reappears(
         assert (
             "20:11" in notif_after_snooze_expires[0]["scheduled_time"]
         ), "Notification time should reflect the new base time plus snooze"
+
+
+@freeze_time("2025-10-26 20:00:00")
+def test_notifications_snooze_meal_dependent(test_client: TestClient) -> None:
+    """Test that meal-dependent notifications can be snoozed from their resolved time"""
+    today = date.today().isoformat()
+    meal = test_client.post(
+        "/meal-schedules", json={"meal_name": "dinner", "base_time": "19:30"}
+    )
+    assert meal.status_code == 200
+    payload = {
+        "name": "MealSnoozeDrug",
+        "kind": "pill",
+        "amount_per_dose": 1,
+        "frequency_per_day": 1,
+        "start_date": today,
+        "end_date": today,
+        "dependency_type": "meal",
+        "meal_schedule_id": meal.json()["id"],
+        "meal_offset_minutes": 30,
+        "meal_timing": "after",
+    }
+    r = test_client.post("/drug", json=payload)
+    assert r.status_code == 200
+    sid = r.json()["id"]
+
+    notif_initial = test_client.get("/notifications").json()
+    assert len(notif_initial) == 1
+
+    snooze = test_client.post(f"/notifications/{sid}/snooze", json={"minutes": 15})
+    assert snooze.status_code == 200
+    assert snooze.json()["snoozed_until"].endswith("20:15:00")
+    assert test_client.get("/notifications").json() == []
+
+    with freeze_time("2025-10-26 20:15:00"):
+        notif_after = test_client.get("/notifications").json()
+        assert len(notif_after) == 1
+        assert notif_after[0]["drug_name"] == "MealSnoozeDrug"
+
+
+@freeze_time("2025-10-26 20:00:00")
+def test_notifications_dismiss_drug_dependent_uses_chain_time(
+    db_session: Session, test_client: TestClient
+) -> None:
+    """Test that dismissing a drug-dependent dose reports its resolved chain time"""
+    today = date.today().isoformat()
+    parent = test_client.post(
+        "/drug", json=create_absolute_payload("ParentDrug", "19:40", today, today)
+    )
+    assert parent.status_code == 200
+    parent_drug = get_db_drug(db_session, "ParentDrug")
+    assert parent_drug is not None
+    assert test_client.get("/notifications").json() == []
+
+    child_payload = {
+        "name": "ChildDrug",
+        "kind": "pill",
+        "amount_per_dose": 1,
+        "frequency_per_day": 1,
+        "start_date": today,
+        "end_date": today,
+        "dependency_type": "drug",
+        "depends_on_drug_id": parent_drug.id,
+        "drug_offset_minutes": 20,
+    }
+    child = test_client.post("/drug", json=child_payload)
+    assert child.status_code == 200
+    sid = child.json()["id"]
+
+    notifications = test_client.get("/notifications").json()
+    assert len(notifications) == 1
+    assert notifications[0]["drug_name"] == "ChildDrug"
+    assert notifications[0]["scheduled_time"].endswith("20:00:00")
+
+    dismiss = test_client.post(f"/notifications/{sid}/dismiss")
+    assert dismiss.status_code == 200
+    assert dismiss.json()["notification"]["scheduled_time"].endswith("20:00:00")
+    assert test_client.get("/notifications").json() == []
+
+
+@freeze_time("2025-10-26 20:00:00")
+def test_notifications_next_due_header(test_client: TestClient) -> None:
+    """Test that responses carry the next upcoming dose time"""
+    today = date.today().isoformat()
+    test_client.post(
+        "/drug", json=create_absolute_payload("LaterDrug", "21:30", today, today)
+    )
+    test_client.post(
+        "/drug", json=create_absolute_payload("EarlierDrug", "20:45", today, today)
+    )
+
+    resp = test_client.get("/notifications")
+    assert resp.status_code == 200
+    assert resp.json() == []
+    assert resp.headers["X-Next-Due"] == "2025-10-26T20:45:00"
+
+
+@freeze_time("2025-10-26 20:00:00")
+def test_notifications_msgpack(test_client: TestClient) -> None:
+    """Test that Accept: application/msgpack gets the same items, binary encoded"""
+    today = date.today().isoformat()
+    test_client.post(
+        "/drug", json=create_absolute_payload("PackedDrug", "20:00", today, today)
+    )
+
+    as_json = test_client.get("/notifications")
+    packed = test_client.get(
+        "/notifications", headers={"Accept": "application/msgpack"}
+    )
+
+    assert packed.status_code == 200
+    assert packed.headers["content-type"] == "application/msgpack"
+    assert "Accept" in packed.headers["Vary"]
+    assert msgpack.unpackb(packed.content) == as_json.json()
+    assert len(packed.content) < len(as_json.content)
+
+
+def test_notifications_long_poll_times_out(test_client: TestClient) -> None:
+    """Test that a long-poll with nothing due returns empty after the wait"""
+    started = time.monotonic()
+    resp = test_client.get("/notifications", params={"wait": 1})
+    elapsed = time.monotonic() - started
+
+    assert resp.status_code == 200
+    assert resp.json() == []
+    assert "X-Next-Due" not in resp.headers
+    assert elapsed >= 0.9
+
+
+def test_notifications_long_poll_wakes_on_write(test_client: TestClient) -> None:
+    """Test that a write wakes a waiting long-poll before its timeout"""
+    result: dict[str, float] = {}
+
+    def poll() -> None:
+        started = time.monotonic()
+        resp = test_client.get("/notifications", params={"wait": 30})
+        assert resp.status_code == 200
+        result["elapsed"] = time.monotonic() - started
+
+    poller = threading.Thread(target=poll)
+    poller.start()
+    time.sleep(0.5)
+    test_client.post(
+        "/meal-schedules", json={"meal_name": "breakfast", "base_time": "08:00"}
+    )
+    poller.join(timeout=10)
+
+    assert not poller.is_alive()
+    assert result["elapsed"] < 10
+
+
+@freeze_time("2025-10-26 20:00:00")  # a Sunday
+def test_notifications_follow_recurrence(test_client: TestClient) -> None:
+    payload: dict[str, object] = {
+        **create_absolute_payload("Weekdays", "20:00", "2025-10-01"),
+        "recurrence": {"weekdays": [0, 1, 2, 3, 4]},
+    }
+    created = test_client.post("/drug", json=payload).json()
+    assert created["recurrence_period_days"] == 7
+    assert test_client.get("/notifications").json() == []
+
+    payload["recurrence"] = {"weekdays": [6]}
+    updated = test_client.put(f"/drug-id/{created['id']}", json=payload)
+    assert [d["schedule_id"] for d in updated.json()["affected_doses"]] == [
+        created["id"]
+    ]
+    due = test_client.get("/notifications").json()
+    assert [n["drug_name"] for n in due] == ["Weekdays"]
+
+    bad = test_client.put(
+        f"/drug-id/{created['id']}", json={**payload, "recurrence": {"days_on": 2}}
+    )
+    assert bad.status_code == 422
+
+
+@freeze_time("2025-10-26 20:00:00")
+def test_notifications_see_writes_from_other_workers(
+    test_client: TestClient, db_session: Session
+) -> None:
+    payload = create_absolute_payload("AbsDrug", "20:00", "2025-10-26")
+    sid = test_client.post("/drug", json=payload).json()["id"]
+    assert len(test_client.get("/notifications").json()) == 1
+
+    # Dismissed by another worker: committed and bumped, nothing published here
+    db_session.add(
+        NotificationOverride(
+            schedule_id=sid, override_date=date(2025, 10, 26), dismissed=True
+        )
+    )
+    bump_data_version(db_session, NOTIFICATION_OVERRIDES)
+    db_session.commit()
+    assert test_client.get("/notifications").json() == []
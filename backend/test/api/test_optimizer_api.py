@@ -0,0 +1,127 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from backend.services.dependency_index import dependency_index
+from backend.test.conftest import get_db_drug
+
+
+def test_propose_and_apply_schedule(
+    db_session: Session, test_client: TestClient
+) -> None:
+    today = date.today().isoformat()
+    test_client.post(
+        "/meal-schedules", json={"meal_name": "breakfast", "base_time": "08:00"}
+    )
+    lunch = test_client.post(
+        "/meal-schedules", json={"meal_name": "lunch", "base_time": "12:30"}
+    ).json()
+    ids = []
+    for name, at in [("Levothyroxine", "07:30"), ("Calcium", "08:00")]:
+        created = test_client.post(
+            "/drug",
+            json={
+                "name": name,
+                "kind": "pill",
+                "amount_per_dose": 1,
+                "start_date": today,
+                "dependency_type": "absolute",
+                "absolute_time": at,
+            },
+        ).json()
+        ids.append(created["id"])
+    levo_drug, calcium_drug = (
+        get_db_drug(db_session, name) for name in ("Levothyroxine", "Calcium")
+    )
+    assert levo_drug is not None and calcium_drug is not None
+    test_client.post(
+        "/spacing-rules",
+        json={
+            "drug_id": levo_drug.id,
+            "other_drug_id": calcium_drug.id,
+            "min_gap_minutes": 240,
+        },
+    )
+
+    proposal = test_client.post(
+        "/optimizer/propose",
+        json={
+            "drug_ids": [calcium_drug.id],
+            "constraints": [{"drug_id": calcium_drug.id, "food": "with"}],
+        },
+    ).json()
+    assert proposal["feasible"] and proposal["complete"]
+    [change] = proposal["changes"]
+    assert change["schedule_id"] == ids[1]
+    assert change["dependency_type"] == "meal"
+    # Breakfast is too close to levothyroxine; lunch is the nearest meal
+    assert change["meal_schedule_id"] == lunch["id"]
+    assert change["proposed_time"].endswith("12:30:00")
+
+    applied = test_client.post("/optimizer/apply", json={"changes": [change]})
+    assert applied.status_code == 200
+    assert applied.json()["conflicts"] == []
+    assert test_client.get("/spacing-rules/conflicts").json() == []
+    [calcium] = [d for d in test_client.get("/drug").json() if d["id"] == ids[1]]
+    assert calcium["dependency_type"] == "meal"
+
+    missing = test_client.post(
+        "/optimizer/apply", json={"changes": [{**change, "schedule_id": 999}]}
+    )
+    assert missing.status_code == 404
+
+
+def test_rejected_apply_leaves_the_shared_index_alone(
+    db_session: Session, test_client: TestClient
+) -> None:
+    base = {
+        "kind": "pill",
+        "amount_per_dose": 1,
+        "start_date": date.today().isoformat(),
+        "dependency_type": "absolute",
+        "absolute_time": "08:00",
+    }
+    a, b = (
+        test_client.post("/drug", json={**base, "name": name}).json()["id"]
+        for name in ("A", "B")
+    )
+    a_drug, b_drug = (get_db_drug(db_session, name) for name in ("A", "B"))
+    assert a_drug is not None and b_drug is not None
+    c = test_client.post(
+        "/drug",
+        json={
+            **base,
+            "name": "C",
+            "dependency_type": "drug",
+            "depends_on_drug_id": a_drug.id,
+            "drug_offset_minutes": 30,
+        },
+    ).json()["id"]
+
+    def change(schedule_id: int, drug_id: int, anchor: int) -> dict[str, object]:
+        return {
+            "schedule_id": schedule_id,
+            "drug_id": drug_id,
+            "drug_name": "",
+            "dependency_type": "drug",
+            "depends_on_drug_id": anchor,
+            "drug_offset_minutes": 10,
+            "previous_time": "2025-10-26T08:00:00",
+            "proposed_time": "2025-10-26T08:10:00",
+        }
+
+    # Each link is fine on its own; together they close a cycle
+    cycle = test_client.post(
+        "/optimizer/apply",
+        json={
+            "changes": [
+                change(b, b_drug.id, a_drug.id),
+                change(a, a_drug.id, b_drug.id),
+            ]
+        },
+    )
+    assert cycle.status_code == 400
+    assert "cycle" in cycle.json()["detail"]
+    assert dependency_index.dependents_of_drug(a_drug.id) == {c}
+    assert dependency_index.dependents_of_drug(b_drug.id) == set()
@@ -0,0 +1,89 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+
+
+def create_drug(client: TestClient, name: str, hhmm: str) -> dict[str, object]:
+    payload = {
+        "name": name,
+        "kind": "pill",
+        "amount_per_dose": 1,
+        "frequency_per_day": 1,
+        "start_date": date.today().isoformat(),
+        "dependency_type": "absolute",
+        "absolute_time": hhmm,
+    }
+    resp = client.post("/drug", json=payload)
+    assert resp.status_code == 200
+    data: dict[str, object] = resp.json()
+    return data
+
+
+def test_drug_writes_report_spacing_conflicts(test_client: TestClient) -> None:
+    levo = create_drug(test_client, "Levothyroxine", "07:00")
+    antacid = create_drug(test_client, "Antacid", "12:00")
+    assert antacid["conflicts"] == []
+
+    rule = test_client.post(
+        "/spacing-rules",
+        json={
+            "drug_id": antacid["id"],
+            "other_drug_id": levo["id"],
+            "min_gap_minutes": 240,
+        },
+    )
+    assert rule.status_code == 200
+    # Stored with the lower drug id first
+    assert rule.json()["drug_id"] == levo["id"]
+    duplicate = test_client.post(
+        "/spacing-rules",
+        json={
+            "drug_id": levo["id"],
+            "other_drug_id": antacid["id"],
+            "min_gap_minutes": 60,
+        },
+    )
+    assert duplicate.status_code == 400
+
+    moved = test_client.put(
+        f"/drug-id/{antacid['id']}",
+        json={
+            "name": "Antacid",
+            "kind": "pill",
+            "amount_per_dose": 1,
+            "dependency_type": "absolute",
+            "absolute_time": "08:30",
+        },
+    ).json()
+    [conflict] = moved["conflicts"]
+    assert conflict["schedule_id"] == antacid["id"]
+    assert conflict["other_drug_name"] == "Levothyroxine"
+    assert (conflict["min_gap_minutes"], conflict["gap_minutes"]) == (240, 90)
+
+    listed = test_client.get("/spacing-rules/conflicts").json()
+    assert [(c["schedule_id"], c["other_schedule_id"]) for c in listed] == [
+        (levo["id"], antacid["id"])
+    ]
+
+    test_client.delete(f"/spacing-rules/{rule.json()['id']}")
+    assert test_client.get("/spacing-rules/conflicts").json() == []
+    assert test_client.delete(f"/spacing-rules/{rule.json()['id']}").status_code == 404
+
+
+def test_spacing_conflicts_use_planned_times(test_client: TestClient) -> None:
+    levo = create_drug(test_client, "Levothyroxine", "07:00")
+    antacid = create_drug(test_client, "Antacid", "08:00")
+    test_client.post(
+        "/spacing-rules",
+        json={
+            "drug_id": levo["id"],
+            "other_drug_id": antacid["id"],
+            "min_gap_minutes": 240,
+        },
+    )
+    # Neither a snooze past the gap nor a dismissal resolves the conflict
+    test_client.post(f"/notifications/{antacid['id']}/snooze", json={"minutes": 300})
+    test_client.post(f"/notifications/{levo['id']}/dismiss")
+
+    [conflict] = test_client.get("/spacing-rules/conflicts").json()
+    assert conflict["gap_minutes"] == 60
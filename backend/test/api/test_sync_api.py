@@ -0,0 +1,122 @@
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from backend.models import ChangeLogEntry
+from backend.services.change_log import compact_change_log
+
+DRUG = {"kind": "pill", "amount_per_dose": 1}
+
+
+def test_sync_initial_snapshot(test_client: TestClient) -> None:
+    """Test that a client without a cursor gets a full snapshot"""
+    test_client.post(
+        "/meal-schedules", json={"meal_name": "lunch", "base_time": "13:00"}
+    )
+    test_client.post("/drug", json={**DRUG, "name": "SnapDrug"})
+
+    data = test_client.get("/sync").json()
+
+    assert data["reset"] is True
+    assert data["cursor"] > 0
+    assert {(c["entity"], c["op"]) for c in data["changes"]} == {
+        ("drug", "upsert"),
+        ("meal_schedule", "upsert"),
+    }
+    drug = next(c for c in data["changes"] if c["entity"] == "drug")
+    assert drug["data"]["name"] == "SnapDrug"
+
+
+def test_sync_returns_coalesced_changes_since_cursor(test_client: TestClient) -> None:
+    """Test that each changed row is returned once, in its current state"""
+    kept = test_client.post("/drug", json={**DRUG, "name": "Kept"}).json()
+    gone = test_client.post("/drug", json={**DRUG, "name": "Gone"}).json()
+    cursor = test_client.get("/sync").json()["cursor"]
+
+    for amount in (2, 3, 4):
+        test_client.put(
+            f"/drug-id/{kept['id']}",
+            json={**DRUG, "name": "Kept", "amount_per_dose": amount},
+        )
+    test_client.delete(f"/drug-id/{gone['id']}")
+    test_client.post(f"/notifications/{kept['id']}/snooze", json={"minutes": 5})
+
+    data = test_client.get("/sync", params={"since": cursor}).json()
+
+    assert data["reset"] is False
+    assert data["has_more"] is False
+    changes = [(c["entity"], c["id"], c["op"]) for c in data["changes"]]
+    assert len(changes) == 3
+    assert ("drug", kept["id"], "upsert") in changes
+    assert ("drug", gone["id"], "delete") in changes
+    kept_change = next(c for c in data["changes"] if c["id"] == kept["id"])
+    assert kept_change["data"]["amount_per_dose"] == 4
+    override = next(
+        c for c in data["changes"] if c["entity"] == "notification_override"
+    )
+    assert override["data"]["schedule_id"] == kept["id"]
+
+    # Paging with a small limit yields the same changes, then an empty delta
+    first = test_client.get("/sync", params={"since": cursor, "limit": 2}).json()
+    assert first["has_more"] is True
+    rest = test_client.get("/sync", params={"since": first["cursor"]}).json()
+    assert len(first["changes"]) + len(rest["changes"]) == 3
+    done = test_client.get("/sync", params={"since": data["cursor"]}).json()
+    assert done["changes"] == []
+    assert done["cursor"] == data["cursor"]
+
+
+def test_sync_meal_delete_reports_cascaded_schedules(test_client: TestClient) -> None:
+    """Test that schedules deleted with their meal are synced as deletes"""
+    lunch = test_client.post(
+        "/meal-schedules", json={"meal_name": "lunch", "base_time": "13:00"}
+    ).json()
+    drug = test_client.post(
+        "/drug",
+        json={
+            **DRUG,
+            "name": "WithLunch",
+            "dependency_type": "meal",
+            "meal_schedule_id": lunch["id"],
+            "meal_offset_minutes": 0,
+            "meal_timing": "after",
+        },
+    ).json()
+    cursor = test_client.get("/sync").json()["cursor"]
+
+    test_client.delete("/meal-schedules/lunch")
+    changes = test_client.get("/sync", params={"since": cursor}).json()["changes"]
+
+    assert {(c["entity"], c["id"], c["op"]) for c in changes} == {
+        ("meal_schedule", lunch["id"], "delete"),
+        ("drug", drug["id"], "delete"),
+    }
+
+
+def test_sync_resets_clients_behind_compaction(
+    db_session: Session, test_client: TestClient
+) -> None:
+    """Test that purging old deletes forces older cursors to a full resync"""
+    old = test_client.post("/drug", json={**DRUG, "name": "Old"}).json()
+    stale_cursor = test_client.get("/sync").json()["cursor"]
+    test_client.delete(f"/drug-id/{old['id']}")
+    test_client.post("/drug", json={**DRUG, "name": "New"})
+
+    # Age the log past retention and compact
+    db_session.execute(
+        update(ChangeLogEntry).values(
+            changed_at=ChangeLogEntry.changed_at - timedelta(days=60)
+        )
+    )
+    assert compact_change_log(db_session, timedelta(days=30)) == 2
+    db_session.commit()
+
+    data = test_client.get("/sync", params={"since": stale_cursor}).json()
+    assert data["reset"] is True
+    assert [c["data"]["name"] for c in data["changes"]] == ["New"]
+
+    current = test_client.get("/sync", params={"since": data["cursor"]}).json()
+    assert current["reset"] is False
+    assert current["changes"] == []
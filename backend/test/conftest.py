@@ -15,6 +15,14 @@ os.environ["DATABASE_URL"] = os.getenv(
 from backend.database import Base, get_db  # noqa: E402
 from backend.main import app  # noqa: E402
 from backend.models import DrugORM, MealSchedule  # noqa: E402
+from backend.services.adherence_analytics import (  # noqa: E402
+    adherence_report_cache,
+)
+from backend.services.dependency_index import dependency_index  # noqa: E402
+from backend.services.dose_time_resolver import resolved_time_cache  # noqa: E402
+from backend.services.due_index import due_index_cache  # noqa: E402
+from backend.services.notification_sinks import sinks  # noqa: E402
+from backend.services.timeline_memo import timeline_memo  # noqa: E402
 
 
 @pytest.fixture(scope="session")
@@ -111,6 +119,24 @@ def clean_db_between_tests(
         session.close()
 
 
+@pytest.fixture(autouse=True)
+def reset_schedule_caches() -> Generator[None, None, None]:
+    """Reset process-wide schedule caches, since tables are recreated per test"""
+    dependency_index.clear()
+    resolved_time_cache.clear()
+    timeline_memo.clear()
+    due_index_cache.clear()
+    adherence_report_cache.clear()
+    sinks.clear()
+    yield
+    dependency_index.clear()
+    resolved_time_cache.clear()
+    timeline_memo.clear()
+    due_index_cache.clear()
+    adherence_report_cache.clear()
+    sinks.clear()
+
+
 def get_db_count(session: Session) -> int:
     """Helper to count drugs in database"""
     return session.query(DrugORM).count()
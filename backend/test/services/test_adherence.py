@@ -0,0 +1,124 @@
+from datetime import date, datetime
+
+from fastapi.testclient import TestClient
+from freezegun import freeze_time
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.models import AdherenceDaily, DoseEvent
+from backend.services.adherence import (
+    AdherenceRollupJob,
+    daily_adherence,
+    rollup_adherence,
+)
+from backend.services.dose_events import (
+    DUE,
+    TAKEN,
+    dose_event,
+    record_dose_events,
+)
+from backend.services.scheduler import DoseScheduler, record_due
+
+DAY = date(2025, 10, 26)
+
+
+def _at(hhmm: str) -> datetime:
+    return datetime.combine(DAY, datetime.strptime(hhmm, "%H:%M").time())
+
+
+@freeze_time("2025-10-26 20:00:00")
+def test_notification_endpoints_append_dose_events(
+    test_client: TestClient, db_session: Session
+) -> None:
+    """Test that due doses, snoozes and intakes are recorded as dose events"""
+    payload = {
+        "name": "Evening",
+        "kind": "pill",
+        "amount_per_dose": 1,
+        "start_date": "2025-10-26",
+        "dependency_type": "absolute",
+        "absolute_time": "20:00",
+    }
+    sid = test_client.post("/drug", json=payload).json()["id"]
+
+    scheduler = DoseScheduler()
+    scheduler.add_handler("dose_events", record_due)
+    scheduler.tick(db_session, _at("19:59"))
+    scheduler.tick(db_session, _at("20:00"))
+    # Polls only read
+    test_client.get("/notifications")
+    test_client.get("/notifications")
+    test_client.post(f"/notifications/{sid}/snooze", json={"minutes": 10})
+    test_client.post(
+        "/events/intake",
+        json={"schedule_id": sid, "taken_at": "2025-10-26T20:12:00"},
+    )
+
+    events = db_session.scalars(select(DoseEvent).order_by(DoseEvent.id)).all()
+    assert [e.kind for e in events] == ["due", "snoozed", "taken"]
+    # Reads leave the rollup to the background job
+    assert db_session.scalars(select(AdherenceDaily)).all() == []
+    assert events[0].scheduled_time == _at("20:00")
+    # Taken 2 minutes after the snoozed time
+    assert events[2].delay_seconds == 120
+
+
+def test_rollup_is_incremental_and_marks_missed(db_session: Session) -> None:
+    """Test rollup counts, missed detection and that reruns add nothing"""
+    record_dose_events(
+        db_session,
+        [
+            dose_event(1, 10, DAY, DUE, _at("08:00"), _at("08:00")),
+            dose_event(1, 10, DAY, TAKEN, _at("08:00"), _at("08:05")),
+            dose_event(2, 20, DAY, DUE, _at("09:00"), _at("09:00")),
+            # Repeated due events are dropped
+            dose_event(2, 20, DAY, DUE, _at("09:00"), _at("09:01")),
+        ],
+    )
+    db_session.commit()
+
+    assert rollup_adherence(db_session, today=date(2025, 10, 27)) == 4
+    db_session.commit()
+    assert rollup_adherence(db_session, today=date(2025, 10, 27)) == 0
+    db_session.commit()
+
+    rows = {r.drug_id: r for r in daily_adherence(db_session, DAY, DAY)}
+    assert (rows[10].due_count, rows[10].taken_count) == (1, 1)
+    assert rows[10].delay_seconds_total == 300
+    assert (rows[20].due_count, rows[20].missed_count) == (1, 1)
+
+    # A late intake is added on top of the existing row and takes back the
+    # missed mark
+    record_dose_events(
+        db_session, [dose_event(2, 20, DAY, TAKEN, _at("09:00"), _at("09:30"))]
+    )
+    db_session.commit()
+    assert rollup_adherence(db_session, today=date(2025, 10, 27)) == 1
+    db_session.commit()
+    db_session.expire_all()
+    row = daily_adherence(db_session, DAY, DAY, drug_id=20)[0]
+    assert (row.due_count, row.taken_count, row.missed_count) == (1, 1, 0)
+    assert row.delay_seconds_total == 1800
+
+    # Only the first intake does
+    record_dose_events(
+        db_session, [dose_event(2, 20, DAY, TAKEN, _at("09:00"), _at("09:40"))]
+    )
+    db_session.commit()
+    rollup_adherence(db_session, today=date(2025, 10, 27))
+    db_session.commit()
+    db_session.expire_all()
+    assert daily_adherence(db_session, DAY, DAY, drug_id=20)[0].missed_count == 0
+
+
+@freeze_time("2025-10-26 12:00:00")
+def test_rollup_job_commits_its_run(
+    db_session: Session, test_session_factory: sessionmaker[Session]
+) -> None:
+    record_dose_events(
+        db_session, [dose_event(1, 10, DAY, DUE, _at("08:00"), _at("08:00"))]
+    )
+    db_session.commit()
+
+    assert AdherenceRollupJob(test_session_factory).run_once() == 1
+    assert daily_adherence(db_session, DAY, DAY)[0].due_count == 1
@@ -0,0 +1,72 @@
+import threading
+import time
+from datetime import date, datetime
+from datetime import time as time_of_day
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.models import DrugSchedule, MealSchedule
+from backend.services.change_log import DRUG, UPSERT, record_changes
+from backend.services.data_version import DRUGS, bump_data_version, get_data_version
+from backend.services.dose_time_resolver import DoseTimeResolver
+
+
+def test_log_first_and_bump_first_writers_do_not_deadlock(
+    test_session_factory: sessionmaker[Session],
+) -> None:
+    errors: list[Exception] = []
+
+    def bump_then_log() -> None:
+        # Like POST /drug: bump, then the commit's flush logs the change
+        with test_session_factory() as db:
+            try:
+                bump_data_version(db, DRUGS)
+                db.add(MealSchedule(meal_name="lunch", base_time=time_of_day(12)))
+                db.commit()
+            except Exception as e:
+                errors.append(e)
+
+    with test_session_factory() as db:
+        # Like PUT /drug-id: log the change first, then bump
+        record_changes(db, [(DRUG, 1, UPSERT)])
+        other = threading.Thread(target=bump_then_log)
+        other.start()
+        time.sleep(0.3)
+        bump_data_version(db, DRUGS)
+        db.commit()
+    other.join(10)
+
+    assert errors == []
+    with test_session_factory() as db:
+        assert get_data_version(db, DRUGS) == 2
+
+
+def test_resolved_times_follow_writes_from_other_workers(
+    test_client: TestClient, test_session_factory: sessionmaker[Session]
+) -> None:
+    schedule_id = test_client.post(
+        "/drug",
+        json={
+            "name": "Metformin",
+            "kind": "pill",
+            "amount_per_dose": 1,
+            "start_date": "2025-10-26",
+            "dependency_type": "absolute",
+            "absolute_time": "08:00",
+        },
+    ).json()["id"]
+    day = date(2025, 10, 26)
+
+    def planned() -> datetime:
+        with test_session_factory() as db:
+            schedule = db.get_one(DrugSchedule, schedule_id)
+            return DoseTimeResolver(db, day).planned_time(schedule)
+
+    assert planned() == datetime(2025, 10, 26, 8)
+    # Another worker's edit: committed and bumped, but not evicted here
+    with test_session_factory() as db:
+        db.get_one(DrugSchedule, schedule_id).absolute_time = time_of_day(9)
+        bump_data_version(db, DRUGS)
+        db.commit()
+    assert planned() == datetime(2025, 10, 26, 9)
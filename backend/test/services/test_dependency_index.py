@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from backend.models import DependencyType, DrugSchedule
+from backend.services.dependency_index import (
+    MAX_CHAIN_DEPTH,
+    DependencyError,
+    DependencyIndex,
+)
+
+
+def chain(index: DependencyIndex, drug_ids: list[int]) -> None:
+    """Make each drug depend on the one before it; the first is absolute"""
+    for position, drug_id in enumerate(drug_ids):
+        index.upsert(
+            DrugSchedule(
+                id=drug_id,
+                drug_id=drug_id,
+                dependency_type=(
+                    DependencyType.DRUG if position else DependencyType.ABSOLUTE
+                ),
+                depends_on_drug_id=drug_ids[position - 1] if position else None,
+            )
+        )
+
+
+def test_check_drug_anchor(db_session: Session) -> None:
+    index = DependencyIndex()
+    index.ensure_loaded(db_session)
+    chain(index, [1, 2, 3])
+
+    index.check_drug_anchor(4, 3)
+    with pytest.raises(DependencyError, match="itself"):
+        index.check_drug_anchor(2, 2)
+    with pytest.raises(DependencyError, match="cycle"):
+        index.check_drug_anchor(1, 3)
+
+    # Depth counts the dependent's own chain below it as well
+    chain(index, list(range(10, 10 + MAX_CHAIN_DEPTH - 1)))
+    with pytest.raises(DependencyError, match="deep"):
+        index.check_drug_anchor(10, 3)
+    index.check_drug_anchor(10, 1)
@@ -0,0 +1,56 @@
+from datetime import date, datetime
+
+from backend.services.due_index import DueIndex, DueRow
+
+DAY = date(2025, 10, 26)
+
+
+def make_row(schedule_id: int, scheduled: str) -> DueRow:
+    return DueRow(
+        scheduled_time=datetime.fromisoformat(scheduled),
+        schedule_id=schedule_id,
+        drug_id=schedule_id,
+        drug_name=f"IndexDrug{schedule_id}",
+        dependency_type="absolute",
+        amount_per_dose=1,
+        kind="pill",
+    )
+
+
+def test_window_is_inclusive_and_ordered() -> None:
+    """Test that window bounds are inclusive and rows come back sorted"""
+    index = DueIndex(
+        DAY,
+        [
+            make_row(3, "2025-10-26T09:01:00"),
+            make_row(2, "2025-10-26T09:00:00"),
+            make_row(1, "2025-10-26T09:00:00"),
+            make_row(4, "2025-10-26T08:58:59.999999"),
+        ],
+    )
+
+    rows = index.window(
+        datetime.fromisoformat("2025-10-26T08:59:00"),
+        datetime.fromisoformat("2025-10-26T09:01:00"),
+    )
+
+    assert [r.schedule_id for r in rows] == [1, 2, 3]
+
+
+def test_first_after_handles_times_outside_the_day() -> None:
+    """Test next-due lookup across midnight, e.g. a dose before an early meal"""
+    index = DueIndex(
+        DAY,
+        [
+            make_row(1, "2025-10-25T23:45:00"),
+            make_row(2, "2025-10-27T00:15:00"),
+        ],
+    )
+
+    assert index.first_after(datetime.fromisoformat("2025-10-25T23:00:00")) == (
+        datetime.fromisoformat("2025-10-25T23:45:00")
+    )
+    assert index.first_after(datetime.fromisoformat("2025-10-26T23:59:00")) == (
+        datetime.fromisoformat("2025-10-27T00:15:00")
+    )
+    assert index.first_after(datetime.fromisoformat("2025-10-27T00:15:00")) is None
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from freezegun import freeze_time
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.models import DoseEscalation, DoseEvent, NotificationOutbox
+from backend.services.escalation_engine import EscalationEngine
+from backend.services.notification_sinks import FakeSink, register_sink
+from backend.services.scheduler import DoseScheduler, record_due
+
+START = datetime(2025, 10, 26, 7, 59)
+DUE_AT = datetime(2025, 10, 26, 8)
+
+
+def add_drug(test_client: TestClient, name: str) -> int:
+    response = test_client.post(
+        "/drug",
+        json={
+            "name": name,
+            "kind": "pill",
+            "amount_per_dose": 1,
+            "start_date": "2025-10-26",
+            "dependency_type": "absolute",
+            "absolute_time": "08:00",
+        },
+    )
+    return int(response.json()["id"])
+
+
+def escalating_scheduler() -> tuple[DoseScheduler, EscalationEngine]:
+    engine = EscalationEngine(
+        interval=timedelta(minutes=15), reminders=2, caregiver_sinks=["email"]
+    )
+    scheduler = DoseScheduler()
+    scheduler.add_handler("dose_events", record_due)
+    scheduler.add_handler("escalations", engine.open)
+    scheduler.add_queue("escalations", engine)
+    return scheduler, engine
+
+
+def outbox(db_session: Session) -> list[tuple[str, str]]:
+    return [
+        (row.kind, row.sink)
+        for row in db_session.scalars(
+            select(NotificationOutbox).order_by(NotificationOutbox.id)
+        )
+    ]
+
+
+@freeze_time(START)
+def test_unacknowledged_dose_escalates_then_is_missed(
+    db_session: Session, test_client: TestClient
+) -> None:
+    register_sink(FakeSink("push"))
+    register_sink(FakeSink("email"))
+    schedule_id = add_drug(test_client, "Metformin")
+    scheduler, engine = escalating_scheduler()
+
+    scheduler.tick(db_session, START)
+    scheduler.tick(db_session, DUE_AT)
+    assert scheduler.next_fire_at() == DUE_AT + timedelta(minutes=15)
+    for minutes in (15, 30, 45):
+        scheduler.tick(db_session, DUE_AT + timedelta(minutes=minutes))
+
+    assert outbox(db_session) == [
+        ("due", "push"),
+        ("due", "email"),
+        ("reminder-1", "push"),
+        ("reminder-1", "email"),
+        ("reminder-2", "push"),
+        ("reminder-2", "email"),
+        # Only the caregivers hear about the escalation
+        ("escalation", "email"),
+    ]
+    (pending,) = test_client.get("/notifications/escalations").json()
+    assert (pending["state"], pending["reminders"]) == ("escalated", 2)
+
+    scheduler.tick(db_session, DUE_AT + timedelta(minutes=60))
+    missed = db_session.scalars(
+        select(DoseEvent).where(DoseEvent.kind == "missed")
+    ).one()
+    assert missed.scheduled_time == DUE_AT
+    assert len(engine) == 0
+    assert test_client.get("/notifications/escalations").json() == []
+
+    # Taken late after all: acknowledged, with both events kept in the log
+    test_client.post(
+        "/events/intake",
+        json={"schedule_id": schedule_id, "taken_at": "2025-10-26T09:30:00"},
+    )
+    escalation = db_session.scalars(select(DoseEscalation)).one()
+    db_session.refresh(escalation)
+    assert escalation.state == "acknowledged"
+    kinds = db_session.scalars(select(DoseEvent.kind).order_by(DoseEvent.id)).all()
+    assert kinds == ["due", "missed", "taken"]
+
+
+@freeze_time(START)
+def test_taken_and_snoozed_doses_stop_or_defer_escalation(
+    db_session: Session, test_client: TestClient
+) -> None:
+    register_sink(FakeSink("push"))
+    taken = add_drug(test_client, "Metformin")
+    snoozed = add_drug(test_client, "Lisinopril")
+    scheduler, engine = escalating_scheduler()
+    scheduler.tick(db_session, START)
+    scheduler.tick(db_session, DUE_AT)
+    assert len(engine) == 2
+
+    test_client.post(
+        "/events/intake",
+        json={"schedule_id": taken, "taken_at": "2025-10-26T08:05:00"},
+    )
+    test_client.post(f"/notifications/{snoozed}/snooze", json={"minutes": 30})
+    (pending,) = test_client.get("/notifications/escalations").json()
+    assert pending["schedule_id"] == snoozed
+    # One interval after the snoozed notification comes back at 08:30
+    assert pending["next_step_at"] == "2025-10-26T08:45:00"
+
+    # The stale 08:15 entries pop: one is dropped, the other pushed back
+    scheduler.tick(db_session, DUE_AT + timedelta(minutes=15))
+    assert engine.next_deadline() == datetime(2025, 10, 26, 8, 45)
+    assert len(engine) == 1
+    assert [kind for kind, _ in outbox(db_session)] == ["due", "due"]
+
+    scheduler.tick(db_session, datetime(2025, 10, 26, 8, 45))
+    assert outbox(db_session)[-1] == ("reminder-1", "push")
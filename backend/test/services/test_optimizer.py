@@ -0,0 +1,74 @@
+from datetime import date, time
+
+from backend.models import DependencyType
+from backend.services.optimizer import (
+    Dose,
+    DrugConstraint,
+    Placement,
+    ScheduleOptimizer,
+)
+
+DAY = date(2025, 10, 26)
+MEALS = {1: time(8, 0), 2: time(12, 30), 3: time(19, 0)}
+
+
+def absolute(schedule_id: int, drug_id: int, at: time) -> Dose:
+    placement = Placement(DependencyType.ABSOLUTE, absolute_time=at)
+    return Dose(schedule_id, drug_id, f"drug{drug_id}", placement, True)
+
+
+def test_optimizer_resolves_spacing_and_food_constraints() -> None:
+    levo = absolute(1, 1, time(7, 30))  # empty stomach, but 30 min before breakfast
+    antacid = absolute(2, 2, time(8, 0))
+    chained = Dose(
+        3,
+        3,
+        "drug3",
+        Placement(DependencyType.DRUG, depends_on_drug_id=2, drug_offset_minutes=30),
+        True,
+    )
+    fixed = Dose(4, 4, "drug4", Placement(DependencyType.ABSOLUTE, time(21, 0)), False)
+    constraints = [
+        DrugConstraint(drug_id=1, food="without"),
+        DrugConstraint(drug_id=2, food="with"),
+        DrugConstraint(drug_id=4, window_start=time(6, 0), window_end=time(20, 0)),
+    ]
+    rules = [(1, 2, 240), (3, 4, 60)]
+
+    def solve() -> list[tuple[int, str, time]]:
+        optimizer = ScheduleOptimizer(
+            [levo, antacid, chained, fixed], MEALS, rules, constraints
+        )
+        proposal = optimizer.solve(DAY)
+        assert proposal.complete
+        assert proposal.conflicts == []
+        # The fixed dose may not move, so its window stays unmet
+        assert [(u.schedule_id, u.constraint) for u in proposal.unmet_constraints] == [
+            (4, "window")
+        ]
+        return [
+            (c.schedule_id, c.dependency_type, c.proposed_time.time())
+            for c in proposal.changes
+        ]
+
+    changes = solve()
+    assert solve() == changes  # deterministic
+    by_id = {schedule_id: (kind, at) for schedule_id, kind, at in changes}
+    # Levothyroxine moves the least it can to clear breakfast
+    assert by_id[1] == ("absolute", time(7, 0))
+    # The antacid stays with a meal, four hours from levothyroxine
+    kind, antacid_at = by_id[2]
+    assert kind == "meal" and antacid_at >= time(11, 0)
+    # The chained dose keeps its anchor and follows the antacid
+    assert 3 not in by_id
+
+
+def test_optimizer_keeps_a_feasible_day_and_respects_budget() -> None:
+    doses = [absolute(1, 1, time(9, 0)), absolute(2, 2, time(9, 30))]
+    calm = ScheduleOptimizer(doses, MEALS, []).solve(DAY)
+    assert calm.feasible and calm.changes == [] and calm.cost == 0
+
+    tight = ScheduleOptimizer(doses, MEALS, [(1, 2, 120)], max_steps=1).solve(DAY)
+    assert not tight.complete
+    # Out of budget before any full assignment: the current day is returned
+    assert tight.changes == [] and not tight.feasible
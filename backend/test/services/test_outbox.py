@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta
+
+from fastapi.testclient import TestClient
+from freezegun import freeze_time
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.models import DrugSchedule, NotificationOutbox
+from backend.services.dose_events import DUE, dose_event, record_dose_events
+from backend.services.notification_sinks import FakeSink, register_sink
+from backend.services.outbox import (
+    DEAD,
+    OUTBOX_LEASE_SECONDS,
+    SENT,
+    claim_batch,
+    deliver_batch,
+)
+
+NOW = datetime(2025, 10, 26, 8, 0, 30)
+
+
+def add_drug(test_client: TestClient, name: str) -> None:
+    test_client.post(
+        "/drug",
+        json={
+            "name": name,
+            "kind": "pill",
+            "amount_per_dose": 1,
+            "start_date": "2025-10-26",
+            "dependency_type": "absolute",
+            "absolute_time": "08:00",
+        },
+    )
+
+
+def announce_due(db_session: Session) -> None:
+    """Record the 08:00 due event of every schedule"""
+    record_dose_events(
+        db_session,
+        [
+            dose_event(s.id, s.drug_id, NOW.date(), DUE, NOW.replace(second=0), NOW)
+            for s in db_session.scalars(select(DrugSchedule))
+        ],
+    )
+    db_session.commit()
+
+
+@freeze_time(NOW)
+def test_due_doses_are_delivered_once(
+    db_session: Session, test_client: TestClient
+) -> None:
+    sink = FakeSink()
+    register_sink(sink)
+    add_drug(test_client, "Metformin")
+
+    announce_due(db_session)
+    # A repeated due event queues nothing more
+    announce_due(db_session)
+
+    assert deliver_batch(db_session, NOW) == 1
+    assert deliver_batch(db_session, NOW) == 0
+    ((message_id, payload),) = sink.sent
+    assert payload["drug_name"] == "Metformin"
+    assert payload["scheduled_time"] == "2025-10-26T08:00:00"
+    message = db_session.get(NotificationOutbox, message_id)
+    assert message is not None
+    assert message.status == SENT
+
+
+@freeze_time(NOW)
+def test_failed_delivery_backs_off_then_dies(
+    db_session: Session, test_client: TestClient
+) -> None:
+    sink = FakeSink(fail_times=3)
+    register_sink(sink)
+    add_drug(test_client, "Metformin")
+    announce_due(db_session)
+
+    assert deliver_batch(db_session, NOW, max_attempts=3) == 1
+    message = db_session.scalars(select(NotificationOutbox)).one()
+    assert message.attempts == 1
+    assert message.next_attempt_at == NOW + timedelta(seconds=30)
+    # Not due again until the backoff has passed
+    assert deliver_batch(db_session, NOW + timedelta(seconds=29)) == 0
+    assert deliver_batch(db_session, NOW + timedelta(seconds=30), max_attempts=3) == 1
+    db_session.refresh(message)
+    assert message.next_attempt_at == NOW + timedelta(seconds=90)
+
+    deliver_batch(db_session, NOW + timedelta(seconds=90), max_attempts=3)
+    db_session.refresh(message)
+    assert message.status == DEAD
+    assert message.last_error == "RuntimeError: fake sink failure"
+    assert sink.sent == []
+
+
+@freeze_time(NOW)
+def test_concurrent_claims_are_disjoint(
+    test_session_factory: sessionmaker[Session],
+    db_session: Session,
+    test_client: TestClient,
+) -> None:
+    register_sink(FakeSink())
+    add_drug(test_client, "Metformin")
+    add_drug(test_client, "Lisinopril")
+    announce_due(db_session)
+
+    first, second = test_session_factory(), test_session_factory()
+    try:
+        claimed = claim_batch(first, NOW, limit=1)
+        others = claim_batch(second, NOW)
+        assert len(claimed) == 1
+        assert len(others) == 1
+        assert claimed[0].id != others[0].id
+    finally:
+        first.close()
+        second.close()
+
+
+@freeze_time(NOW)
+def test_claimed_messages_return_when_the_lease_runs_out(
+    test_session_factory: sessionmaker[Session],
+    db_session: Session,
+    test_client: TestClient,
+) -> None:
+    sink = FakeSink()
+    register_sink(sink)
+    add_drug(test_client, "Metformin")
+    announce_due(db_session)
+
+    # A worker claims the message and dies before sending it
+    with test_session_factory() as crashed:
+        assert len(claim_batch(crashed, NOW)) == 1
+    assert deliver_batch(db_session, NOW) == 0
+
+    expired = NOW + timedelta(seconds=OUTBOX_LEASE_SECONDS)
+    assert deliver_batch(db_session, expired) == 1
+    assert len(sink.sent) == 1
+    message = db_session.scalars(select(NotificationOutbox)).one()
+    assert (message.status, message.attempts) == (SENT, 1)
@@ -0,0 +1,104 @@
+from datetime import date, timedelta
+from typing import Any
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.models import DependencyType, DrugORM, DrugSchedule
+from backend.services.recurrence import (
+    RecurrenceRule,
+    compile_rule,
+    day_bitmap,
+    occurs_on,
+    recurs_on_clause,
+)
+
+START = date(2025, 3, 3)  # a Monday
+
+
+def active_days(rule: RecurrenceRule, days: int) -> list[int]:
+    period, mask = compile_rule(rule, START)
+    return [
+        i for i in range(days) if occurs_on(period, mask, START + timedelta(days=i))
+    ]
+
+
+def test_rules_compile_to_calendar_patterns() -> None:
+    assert active_days(RecurrenceRule(every_days=2), 7) == [0, 2, 4, 6]
+    cycle = active_days(RecurrenceRule(days_on=21, days_off=7), 60)
+    assert cycle == list(range(21)) + list(range(28, 49)) + list(range(56, 60))
+    assert active_days(RecurrenceRule(weekdays=[0, 1, 2, 3, 4]), 14) == [
+        0, 1, 2, 3, 4, 7, 8, 9, 10, 11,
+    ]  # fmt: skip
+    # Weekdays stay on the same days whatever the anchor
+    assert compile_rule(RecurrenceRule(weekdays=[5]), START) == compile_rule(
+        RecurrenceRule(weekdays=[5]), START + timedelta(days=3)
+    )
+    assert compile_rule(RecurrenceRule(every_days=1), START) == (None, None)
+    assert compile_rule(RecurrenceRule(days_on=4, days_off=0), START) == (None, None)
+
+    bad_rules: list[dict[str, Any]] = [
+        {},
+        {"every_days": 2, "weekdays": [1]},
+        {"days_on": 3},
+        {"weekdays": [7]},
+    ]
+    for bad in bad_rules:
+        with pytest.raises(ValidationError):
+            RecurrenceRule.model_validate(bad)
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [None, RecurrenceRule(every_days=3), RecurrenceRule(days_on=5, days_off=58)],
+)
+def test_day_bitmap_matches_per_day_test(rule: RecurrenceRule | None) -> None:
+    period, mask = compile_rule(rule, START) if rule else (None, None)
+    end = START + timedelta(days=200)
+    for first, n_days in [
+        (START - timedelta(days=10), 400),
+        (START + timedelta(days=33), 90),
+    ]:
+        bits = day_bitmap(START, end, period, mask, first, n_days)
+        expected = [
+            START <= first + timedelta(days=i) <= end
+            and occurs_on(period, mask, first + timedelta(days=i))
+            for i in range(n_days)
+        ]
+        assert [bool(bits >> i & 1) for i in range(n_days)] == expected
+
+
+def test_sql_clause_matches_python(db_session: Session) -> None:
+    drug = DrugORM(name="Cycled", kind="pill", amount_per_dose=1)
+    db_session.add(drug)
+    db_session.flush()
+    rules = [None, RecurrenceRule(days_on=21, days_off=7), RecurrenceRule(weekdays=[2])]
+    schedules = []
+    for rule in rules:
+        period, mask = compile_rule(rule, START) if rule else (None, None)
+        schedules.append(
+            DrugSchedule(
+                drug_id=drug.id,
+                dependency_type=DependencyType.INDEPENDENT,
+                frequency_per_day=1,
+                start_date=START,
+                recurrence_period_days=period,
+                recurrence_mask=mask,
+            )
+        )
+    db_session.add_all(schedules)
+    db_session.flush()
+
+    for offset in range(0, 60, 3):
+        day = START + timedelta(days=offset)
+        in_sql = set(
+            db_session.scalars(select(DrugSchedule.id).where(recurs_on_clause(day)))
+        )
+        in_python = {
+            s.id
+            for s in schedules
+            if occurs_on(s.recurrence_period_days, s.recurrence_mask, day)
+        }
+        assert in_sql == in_python
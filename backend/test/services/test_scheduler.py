@@ -0,0 +1,93 @@
+from datetime import datetime, time
+
+from fastapi.testclient import TestClient
+from freezegun import freeze_time
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.models import DoseEvent, DrugSchedule
+from backend.services.data_version import DRUGS, bump_data_version
+from backend.services.scheduler import DoseScheduler, Trigger, record_due
+
+START = datetime(2025, 10, 26, 7, 59)
+
+
+def drug_payload(name: str, at: str) -> dict[str, object]:
+    return {
+        "name": name,
+        "kind": "pill",
+        "amount_per_dose": 1,
+        "start_date": "2025-10-26",
+        "dependency_type": "absolute",
+        "absolute_time": at,
+    }
+
+
+def recording_scheduler(fired: list[Trigger]) -> DoseScheduler:
+    scheduler = DoseScheduler()
+    scheduler.add_handler("record", lambda db, triggers: fired.extend(triggers))
+    return scheduler
+
+
+@freeze_time(START)
+def test_triggers_fire_once_across_restarts(
+    db_session: Session, test_client: TestClient
+) -> None:
+    test_client.post("/drug", json=drug_payload("Metformin", "08:00"))
+    test_client.post("/drug", json=drug_payload("Lisinopril", "09:00"))
+    fired: list[Trigger] = []
+    scheduler = recording_scheduler(fired)
+
+    assert scheduler.tick(db_session, START) == []
+    assert len(scheduler) == 2
+    (trigger,) = scheduler.tick(db_session, datetime(2025, 10, 26, 8, 0, 1))
+    assert trigger.fire_at == datetime(2025, 10, 26, 8)
+    assert fired == [trigger]
+
+    # A fresh scheduler reloads the armed triggers from the table
+    restarted = recording_scheduler(fired)
+    (trigger,) = restarted.tick(db_session, datetime(2025, 10, 26, 9, 0, 5))
+    assert trigger.fire_at == datetime(2025, 10, 26, 9)
+    # The first one still holds it in its heap but cannot fire it again
+    assert scheduler.tick(db_session, datetime(2025, 10, 26, 9, 0, 6)) == []
+    assert len(fired) == 2
+
+
+@freeze_time(START)
+def test_schedule_changes_rearm(db_session: Session, test_client: TestClient) -> None:
+    schedule = test_client.post("/drug", json=drug_payload("Metformin", "08:00")).json()
+    scheduler = DoseScheduler()
+    scheduler.add_handler("dose_events", record_due)
+    scheduler.tick(db_session, START)
+    assert scheduler.next_fire_at() == datetime(2025, 10, 26, 8)
+
+    test_client.put(
+        f"/drug-id/{schedule['id']}", json=drug_payload("Metformin", "08:30")
+    )
+    assert scheduler.tick(db_session, datetime(2025, 10, 26, 8, 0, 1)) == []
+    assert scheduler.next_fire_at() == datetime(2025, 10, 26, 8, 30)
+
+    assert len(scheduler.tick(db_session, datetime(2025, 10, 26, 8, 30))) == 1
+    event = db_session.scalars(select(DoseEvent)).one()
+    assert (event.kind, event.scheduled_time) == ("due", datetime(2025, 10, 26, 8, 30))
+
+
+@freeze_time(START)
+def test_writes_from_other_workers_rearm(
+    db_session: Session,
+    test_client: TestClient,
+    test_session_factory: sessionmaker[Session],
+) -> None:
+    schedule_id = test_client.post(
+        "/drug", json=drug_payload("Metformin", "08:00")
+    ).json()["id"]
+    scheduler = DoseScheduler()
+    scheduler.tick(db_session, START)
+
+    # Committed and bumped elsewhere; nothing is published in this process
+    with test_session_factory() as db:
+        db.get_one(DrugSchedule, schedule_id).absolute_time = time(8, 30)
+        bump_data_version(db, DRUGS)
+        db.commit()
+    assert scheduler.tick(db_session, datetime(2025, 10, 26, 8, 0, 1)) == []
+    assert scheduler.next_fire_at() == datetime(2025, 10, 26, 8, 30)
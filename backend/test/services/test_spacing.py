@@ -0,0 +1,74 @@
+import random
+from datetime import datetime, timedelta
+
+from backend.services.due_index import DueRow
+from backend.services.spacing import IntervalTree, find_conflicts
+
+MIDNIGHT = datetime(2025, 10, 26)
+
+
+def dose(schedule_id: int, drug_id: int, minute: int) -> DueRow:
+    return DueRow(
+        scheduled_time=MIDNIGHT + timedelta(minutes=minute),
+        schedule_id=schedule_id,
+        drug_id=drug_id,
+        drug_name=f"drug{drug_id}",
+        dependency_type="absolute",
+        amount_per_dose=1,
+        kind="pill",
+    )
+
+
+def test_interval_tree_matches_linear_scan() -> None:
+    rng = random.Random(7)
+    intervals = []
+    for i in range(300):
+        start = MIDNIGHT + timedelta(minutes=rng.randint(0, 1440))
+        intervals.append((start, start + timedelta(minutes=rng.randint(0, 240)), i))
+    tree = IntervalTree(intervals)
+    assert len(tree) == 300
+    assert IntervalTree([]).stab(MIDNIGHT) == []
+    for _ in range(200):
+        point = MIDNIGHT + timedelta(minutes=rng.randint(-60, 1700))
+        expected = {i for start, end, i in intervals if start <= point <= end}
+        assert set(tree.stab(point)) == expected
+
+
+def test_find_conflicts_matches_pairwise_check() -> None:
+    rng = random.Random(11)
+    doses = sorted(
+        (dose(i, rng.randint(1, 25), rng.randint(360, 1320)) for i in range(80)),
+        key=lambda d: d.scheduled_time,
+    )
+    rules = {
+        (a, b): rng.choice([30, 60, 120, 240])
+        for a, b in (sorted(rng.sample(range(1, 26), 2)) for _ in range(40))
+    }
+    rules[(3, 3)] = 180  # a drug spaced from its own doses
+
+    conflicts = find_conflicts(doses, [(a, b, g) for (a, b), g in rules.items()])
+    found = {frozenset((c.schedule_id, c.other_schedule_id)) for c in conflicts}
+    expected = set()
+    for i, x in enumerate(doses):
+        for y in doses[i + 1 :]:
+            gap = rules.get((min(x.drug_id, y.drug_id), max(x.drug_id, y.drug_id)))
+            distance = abs(x.scheduled_time - y.scheduled_time)
+            if gap is not None and distance < timedelta(minutes=gap):
+                expected.add(frozenset((x.schedule_id, y.schedule_id)))
+    assert found == expected
+    assert len(found) == len(conflicts)
+
+    # Scoped to some schedules: only pairs involving them
+    scope = {d.schedule_id for d in doses[:10]}
+    scoped = find_conflicts(doses, [(a, b, g) for (a, b), g in rules.items()], scope)
+    assert {frozenset((c.schedule_id, c.other_schedule_id)) for c in scoped} == {
+        pair for pair in expected if pair & scope
+    }
+
+
+def test_exact_gap_is_not_a_conflict() -> None:
+    doses = [dose(1, 1, 480), dose(2, 2, 600), dose(3, 2, 540)]
+    conflicts = find_conflicts(doses, [(1, 2, 120)])
+    assert [(c.schedule_id, c.other_schedule_id, c.gap_minutes) for c in conflicts] == [
+        (1, 3, 60)
+    ]
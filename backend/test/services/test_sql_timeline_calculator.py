@@ -0,0 +1,146 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from freezegun import freeze_time
+from sqlalchemy.orm import Session
+
+from backend.models import (
+    DependencyType,
+    DrugORM,
+    DrugSchedule,
+    IntakeEvent,
+    MealEvent,
+    MealSchedule,
+    NotificationOverride,
+)
+from backend.services.dose_time_resolver import DoseTimeResolver, resolved_time_cache
+from backend.services.recurrence import RecurrenceRule, compile_rule
+from backend.services.sql_timeline_calculator import SqlTimelineCalculator
+from backend.services.timeline_calculator import TimelineCalculator
+
+DAY = date(2025, 10, 26)
+RULES = [
+    RecurrenceRule(every_days=2),
+    RecurrenceRule(days_on=3, days_off=2),
+    RecurrenceRule(weekdays=[0, 2, 4]),
+    RecurrenceRule(weekdays=[6]),
+]
+
+
+def random_time(rng: random.Random) -> time:
+    return time(rng.randint(5, 22), rng.choice([0, 10, 15, 30, 45, 50]))
+
+
+def build_dataset(session: Session, rng: random.Random, size: int) -> None:
+    """Generate meals, drugs and schedules covering every dependency edge case"""
+    meals = [
+        MealSchedule(meal_name=f"meal{i}", base_time=random_time(rng)) for i in range(3)
+    ]
+    drugs = [
+        DrugORM(name=f"drug{i}", kind="pill", amount_per_dose=rng.randint(1, 3))
+        for i in range(size)
+    ]
+    session.add_all(meals)
+    session.add_all(drugs)
+    session.flush()
+
+    schedules: list[DrugSchedule] = []
+    for drug in drugs:
+        for _ in range(rng.choice([1, 1, 1, 2])):
+            dependency_type = rng.choice(list(DependencyType))
+            schedule = DrugSchedule(
+                drug_id=drug.id,
+                dependency_type=dependency_type,
+                frequency_per_day=1,
+                start_date=DAY - timedelta(days=rng.choice([0, 1, 5, -1])),
+                end_date=rng.choice(
+                    [None, DAY, DAY + timedelta(days=3), DAY - timedelta(days=1)]
+                ),
+                is_active=rng.random() > 0.1,
+            )
+            if rng.random() < 0.3:
+                rule = rng.choice(RULES)
+                schedule.recurrence_period_days, schedule.recurrence_mask = (
+                    compile_rule(rule, schedule.start_date)
+                )
+            if dependency_type == DependencyType.ABSOLUTE:
+                schedule.absolute_time = rng.choice([random_time(rng), None])
+            elif dependency_type == DependencyType.MEAL:
+                schedule.meal_schedule_id = rng.choice([m.id for m in meals] + [None])
+                schedule.meal_offset_minutes = rng.choice([0, 15, 30, None])
+                schedule.meal_timing = rng.choice(["before", "after", None])
+            elif dependency_type == DependencyType.DRUG:
+                # Any drug, including itself, so chains and cycles both occur
+                schedule.depends_on_drug_id = rng.choice(drugs).id
+                schedule.drug_offset_minutes = rng.choice([-30, 0, 20, 45, None])
+            schedules.append(schedule)
+    session.add_all(schedules)
+    session.flush()
+
+    for schedule in rng.sample(schedules, k=len(schedules) // 4):
+        for _ in range(rng.choice([1, 2])):
+            session.add(
+                NotificationOverride(
+                    schedule_id=schedule.id,
+                    override_date=DAY,
+                    snoozed_until=rng.choice(
+                        [datetime.combine(DAY, random_time(rng)), None]
+                    ),
+                    dismissed=rng.random() < 0.3,
+                )
+            )
+    for schedule in rng.sample(schedules, k=len(schedules) // 5):
+        session.add(
+            IntakeEvent(
+                schedule_id=schedule.id,
+                event_date=DAY,
+                taken_at=datetime.combine(DAY, random_time(rng)),
+            )
+        )
+    for meal in rng.sample(meals, k=1):
+        session.add(
+            MealEvent(
+                meal_schedule_id=meal.id,
+                event_date=DAY,
+                eaten_at=datetime.combine(DAY, random_time(rng)),
+            )
+        )
+    session.commit()
+
+
+def probe_times(session: Session, rng: random.Random) -> list[datetime]:
+    """Moments around resolved dose times, so the due window is exercised"""
+    resolver = DoseTimeResolver(session, DAY)
+    times = [resolver.effective_time(s) for s in resolver.active_schedules()]
+    probes = [t + timedelta(seconds=rng.randint(-10, 65)) for t in times]
+    probes += [datetime.combine(DAY, random_time(rng)) for _ in range(5)]
+    return probes
+
+
+def test_sql_engine_matches_python_engine(db_session: Session) -> None:
+    """Differential test: both engines agree on generated datasets"""
+    rng = random.Random(20251026)
+    compared = 0
+    for _ in range(12):
+        db_session.query(DrugORM).delete()
+        db_session.query(MealSchedule).delete()
+        db_session.commit()
+        resolved_time_cache.clear()
+
+        build_dataset(db_session, rng, size=rng.randint(3, 14))
+        for now in probe_times(db_session, rng):
+            with freeze_time(now):
+                expected = TimelineCalculator(
+                    db_session
+                ).calculate_timeline_and_next_due(DAY)
+                actual = SqlTimelineCalculator(
+                    db_session
+                ).calculate_timeline_and_next_due(DAY)
+            assert [i.model_dump() for i in actual[0]] == [
+                i.model_dump() for i in expected[0]
+            ], f"due mismatch at {now}"
+            assert actual[1] == expected[1], f"next due mismatch at {now}"
+            compared += len(expected[0])
+
+    # The generated probes must actually hit due doses
+    assert compared > 50
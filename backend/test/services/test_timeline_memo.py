@@ -0,0 +1,100 @@
+import threading
+import time
+from datetime import date, datetime
+
+from freezegun import freeze_time
+
+from backend.services.timeline_calculator import TimelineItem
+from backend.services.timeline_memo import SingleFlight, TimelineMemo, TimelineResult
+
+
+def make_item(scheduled: str) -> TimelineItem:
+    return TimelineItem(
+        schedule_id=1,
+        drug_id=1,
+        drug_name="MemoDrug",
+        scheduled_time=datetime.fromisoformat(scheduled),
+        dependency_type="absolute",
+        amount_per_dose=1,
+        kind="pill",
+    )
+
+
+def test_single_flight_coalesces_concurrent_calls() -> None:
+    """Test that concurrent callers with the same key share one execution"""
+    flight: SingleFlight[int] = SingleFlight()
+    calls = 0
+    results: list[int] = []
+
+    def compute() -> int:
+        nonlocal calls
+        calls += 1
+        time.sleep(0.2)
+        return 42
+
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("key", compute)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == 1
+    assert results == [42] * 8
+
+
+@freeze_time("2025-10-26 20:00:10")
+def test_memo_reuses_result_until_version_changes() -> None:
+    """Test that the memo serves repeats and misses on a new data version"""
+    memo = TimelineMemo()
+    calls = 0
+
+    def compute() -> TimelineResult:
+        nonlocal calls
+        calls += 1
+        return [], None
+
+    today = date(2025, 10, 26)
+    for _ in range(5):
+        memo.get_or_compute(today, 1, compute)
+    assert calls == 1
+
+    memo.get_or_compute(today, 2, compute)
+    assert calls == 2
+
+
+def test_memo_expires_when_due_window_changes() -> None:
+    """Test that entries expire when a dose enters or leaves the due window"""
+    memo = TimelineMemo()
+    calls = 0
+    today = date(2025, 10, 26)
+
+    def upcoming() -> TimelineResult:
+        nonlocal calls
+        calls += 1
+        return [], datetime(2025, 10, 26, 20, 0, 30)
+
+    with freeze_time("2025-10-26 20:00:00"):
+        memo.get_or_compute(today, 1, upcoming)
+    with freeze_time("2025-10-26 20:00:20"):
+        memo.get_or_compute(today, 1, upcoming)
+    assert calls == 1
+    with freeze_time("2025-10-26 20:00:25"):
+        memo.get_or_compute(today, 1, upcoming)
+    assert calls == 2
+
+    def due() -> TimelineResult:
+        nonlocal calls
+        calls += 1
+        return [make_item("2025-10-26T20:10:00")], None
+
+    with freeze_time("2025-10-26 20:10:30"):
+        memo.get_or_compute(today, 2, due)
+    with freeze_time("2025-10-26 20:10:59"):
+        memo.get_or_compute(today, 2, due)
+    assert calls == 3
+    with freeze_time("2025-10-26 20:11:00"):
+        memo.get_or_compute(today, 2, due)
+    assert calls == 4
@@ -0,0 +1,91 @@
+import gzip
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.compression import (
+    IMMUTABLE_CACHE_CONTROL,
+    CompressionMiddleware,
+    PrecompressedStaticFiles,
+)
+
+
+def make_app(minimum_size: int = 500) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        CompressionMiddleware, encodings=["br", "gzip"], minimum_size=minimum_size
+    )
+
+    @app.get("/small")
+    def small() -> list[int]:
+        return []
+
+    @app.get("/large")
+    def large() -> list[str]:
+        return ["dose"] * 1000
+
+    return app
+
+
+def test_compresses_large_responses_only() -> None:
+    """Test that bodies under the threshold are sent uncompressed"""
+    client = TestClient(make_app())
+    headers = {"Accept-Encoding": "gzip"}
+
+    large = client.get("/large", headers=headers)
+    small = client.get("/small", headers=headers)
+
+    assert large.headers["Content-Encoding"] == "gzip"
+    assert large.json() == ["dose"] * 1000
+    assert "Content-Encoding" not in small.headers
+    assert small.json() == []
+
+
+def test_identity_when_client_does_not_accept() -> None:
+    """Test that nothing is compressed without a matching Accept-Encoding"""
+    client = TestClient(make_app())
+
+    resp = client.get("/large", headers={"Accept-Encoding": "gzip;q=0, identity"})
+
+    assert "Content-Encoding" not in resp.headers
+
+
+def test_prefers_brotli_when_available() -> None:
+    """Test that br is chosen over gzip when brotli is installed"""
+    pytest.importorskip("brotli")
+    client = TestClient(make_app())
+
+    resp = client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+
+    assert resp.headers["Content-Encoding"] == "br"
+
+
+def test_static_files_use_precompressed_assets(tmp_path: Path) -> None:
+    """Test precompressed siblings and immutable caching for hashed assets"""
+    script = b"console.log('tabbuddy');" * 100
+    (tmp_path / "index.html").write_bytes(b"<html>TabBuddy</html>")
+    (tmp_path / "static" / "js").mkdir(parents=True)
+    asset = tmp_path / "static" / "js" / "main.abc123.js"
+    asset.write_bytes(script)
+    Path(f"{asset}.gz").write_bytes(gzip.compress(script))
+
+    app = FastAPI()
+    app.mount("/", PrecompressedStaticFiles(str(tmp_path), encodings=["gzip"]))
+    client = TestClient(app)
+
+    packed = client.get(
+        "/static/js/main.abc123.js", headers={"Accept-Encoding": "gzip"}
+    )
+    plain = client.get("/static/js/main.abc123.js", headers={"Accept-Encoding": ""})
+    index = client.get("/")
+
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert packed.headers["Content-Type"].startswith("text/javascript")
+    assert packed.content == script
+    assert packed.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["ETag"] == packed.headers["ETag"]
+    assert index.text == "<html>TabBuddy</html>"
+    assert index.headers["Cache-Control"] == "no-cache"
@@ -35,6 +35,19 @@ function App() {
     }
   };
 
+  // Backend handles all timing logic - just add new notifications to queue
+  const enqueueNotifications = (notifications: NotificationDto[]) => {
+    setNotificationQueue(prev => {
+      const existingIds = new Set(prev.map(n => n.schedule_id));
+      const newNotifications = notifications.filter(n => !existingIds.has(n.schedule_id));
+
+      if (newNotifications.length > 0) {
+        console.log(`Adding ${newNotifications.length} new notifications to queue`);
+      }
+      return [...prev, ...newNotifications];
+    });
+  };
+
   // Notification polling
   const pollNotifications = async () => {
     try {
@@ -42,22 +55,28 @@ function App() {
       const notifications = await api.getNotifications(today);
 
       console.log(`Polling notifications: ${notifications.length} due now`);
-
-      // Backend handles all timing logic - just add new notifications to queue
-      setNotificationQueue(prev => {
-        const existingIds = new Set(prev.map(n => n.schedule_id));
-        const newNotifications = notifications.filter(n => !existingIds.has(n.schedule_id));
-
-        if (newNotifications.length > 0) {
-          console.log(`Adding ${newNotifications.length} new notifications to queue`);
-        }
-        return [...prev, ...newNotifications];
-      });
+      enqueueNotifications(notifications);
     } catch (err) {
       console.error('Failed to poll notifications:', err);
     }
   };
 
+  // Initial load: drugs and due notifications in one round trip
+  const loadDashboard = async () => {
+    try {
+      setLoading(true);
+      setError(null);
+      const dashboard = await api.getDashboard(['drugs', 'notifications']);
+      setDrugs(dashboard.drugs ?? []);
+      enqueueNotifications(dashboard.notifications ?? []);
+    } catch (err: any) {
+      const errorMessage = err?.message || err?.toString() || 'Failed to load drugs';
+      setError(errorMessage);
+    } finally {
+      setLoading(false);
+    }
+  };
+
   // Show next notification in queue
   const showNextNotification = () => {
     console.log(`showNextNotification: queue=${notificationQueue.length}, active=${!!activeNotification}`);
@@ -109,15 +128,12 @@ function App() {
   };
 
   useEffect(() => {
-    loadDrugs();
+    loadDashboard();
 
     // Start polling for notifications every 5 seconds (for testing)
     const timer = setInterval(pollNotifications, 5000);
     setPollTimer(timer);
 
-    // Initial poll
-    pollNotifications();
-
     return () => {
       if (timer) clearInterval(timer);
     };
@@ -9,6 +9,8 @@ export interface DrugDto {
 	frequency_per_day: number;
 	start_date: string; // YYYY-MM-DD format
 	end_date?: string; // YYYY-MM-DD format
+	recurrence_period_days?: number | null; // unset = every day
+	recurrence_mask?: number | null; // bit (day ordinal % period) = active
 	dependency_type: DependencyType;
 	absolute_time?: string; // HH:MM format
 	meal_schedule_id?: number;
@@ -27,6 +29,7 @@ export interface DrugCreateDto {
   frequency_per_day: number;
   start_date: string; // YYYY-MM-DD format
   end_date?: string; // YYYY-MM-DD format
+  recurrence?: RecurrenceRule;
   dependency_type: DependencyType;
   absolute_time?: string; // HH:MM format
   meal_schedule_id?: number;
@@ -36,6 +39,14 @@ export interface DrugCreateDto {
   drug_offset_minutes?: number;
 }
 
+// Exactly one form: every_days, days_on + days_off, or weekdays (0 = Monday)
+export interface RecurrenceRule {
+  every_days?: number;
+  days_on?: number;
+  days_off?: number;
+  weekdays?: number[];
+}
+
 // Notification types
 export interface NotificationDto {
   schedule_id: number;
@@ -59,6 +70,14 @@ export interface MealScheduleDto {
 	created_at: string;
 }
 
+export interface DashboardDto {
+	drugs?: DrugDto[];
+	meal_schedules?: MealScheduleDto[];
+	notifications?: NotificationDto[];
+}
+
+export type DashboardField = keyof DashboardDto;
+
 export interface MealScheduleCreate {
 	meal_name: string;
 	base_time: string; // HH:MM format
@@ -68,7 +87,8 @@ export interface MealScheduleUpdate {
 	base_time: string; // HH:MM format
 }
 
-const BASE_URL = process.env.REACT_APP_API_URL || 'http://127.0.0.1:8000';
+// An empty REACT_APP_API_URL means same origin (frontend served by the backend)
+const BASE_URL = process.env.REACT_APP_API_URL ?? 'http://127.0.0.1:8000';
 
 async function http<T>(path: string, options?: RequestInit): Promise<T> {
 	try {
@@ -107,6 +127,9 @@ export const api = {
 	updateMealSchedule: (mealName: string, meal: MealScheduleUpdate) => http<{ message: string }>(`/meal-schedules/${encodeURIComponent(mealName)}`, { method: 'PUT', body: JSON.stringify(meal) }),
 	deleteMealSchedule: (mealName: string) => http<{ message: string }>(`/meal-schedules/${encodeURIComponent(mealName)}`, { method: 'DELETE' }),
 
+	// Drugs, meal schedules and due notifications in one request
+	getDashboard: (fields?: DashboardField[]) => http<DashboardDto>(fields ? `/dashboard?fields=${fields.join(',')}` : '/dashboard'),
+
 	// Notification endpoints
 	getNotifications: (day: string = new Date().toISOString().split('T')[0]) => http<NotificationDto[]>(`/notifications?day=${day}`),
 	snoozeNotification: (scheduleId: number, minutes: number, day: string = new Date().toISOString().split('T')[0]) => {
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Write .gz (and, with brotli installed, .br) siblings for the frontend build,
+so the backend can serve them with FRONTEND_DIST_DIR set.
+
+Usage: python tools/precompress_frontend.py [frontend/build]
+"""
+
+import gzip
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = {".html", ".js", ".css", ".json", ".map", ".svg", ".txt", ".ico"}
+MIN_SIZE = 1024
+
+
+def precompress(build_dir: Path) -> int:
+    written = 0
+    for path in sorted(build_dir.rglob("*")):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE:
+            continue
+        data = path.read_bytes()
+        if len(data) < MIN_SIZE:
+            continue
+        # mtime=0 keeps the output reproducible across builds
+        Path(f"{path}.gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+        written += 1
+        if brotli is not None:
+            Path(f"{path}.br").write_bytes(brotli.compress(data, quality=11))
+            written += 1
+    return written
+
+
+def main():
+    build_dir = Path(sys.argv[1] if len(sys.argv) > 1 else "frontend/build")
+    if not build_dir.is_dir():
+        print(f"Build directory not found: {build_dir}")
+        sys.exit(1)
+    if brotli is None:
+        print("brotli is not installed; writing .gz files only")
+    print(f"Wrote {precompress(build_dir)} precompressed files in {build_dir}")
+
+
+if __name__ == "__main__":
+    main()